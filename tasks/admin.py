@@ -1,9 +1,30 @@
 from django.contrib import admin
 from .models import Task
+from .cache import invalidate_task_lists, invalidation_batch, task_list_namespace
+from .search import fts_available, search_tasks
 
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
-    list_display = ('title', 'priority', 'due_date', 'completed', 'created_at', 'updated_at')
+    list_display = ('title', 'owner', 'priority', 'due_date', 'completed', 'created_at', 'updated_at')
     list_filter = ('priority', 'completed', 'due_date')
+    list_select_related = ('owner',)
+    raw_id_fields = ('owner',)
     search_fields = ('title', 'description')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Use the full-text index when available instead of LIKE scans."""
+        if search_term.strip() and fts_available(queryset.db):
+            return search_tasks(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def save_model(self, request, obj, form, change):
+        """Moving a task to another owner also invalidates the previous owner's cached lists."""
+        if change and 'owner' in form.changed_data:
+            invalidate_task_lists(task_list_namespace(form.initial.get('owner')))
+        super().save_model(request, obj, form, change)
+
+    def delete_queryset(self, request, queryset):
+        """Invalidate cached task lists once for the whole selection, not once per row."""
+        with invalidation_batch():
+            super().delete_queryset(request, queryset)
@@ -0,0 +1,258 @@
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django_filters.rest_framework import DjangoFilterBackend
+from math import ceil
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from tasks.authentication import CachedJWTAuthentication
+from tasks.cache import CachedResponse, aget_generation, aget_or_compute, apeek, task_list_namespace
+from tasks.conditional import (
+    cached_response,
+    conditional_response,
+    content_etag,
+    if_match_versions,
+    is_conditional,
+    last_modified_timestamp,
+    set_validators,
+    task_etag,
+    task_list_etag,
+)
+from tasks.filters import TaskFilter, TaskOrderingFilter
+from tasks.metrics import timer
+from tasks.renderers import TaskJSONRenderer
+from tasks.serializers import TaskRowSerializer, TaskSerializer, requested_fields
+from tasks.services import TaskConflict, TaskService
+from tasks.utils import custom_exception_handler
+from tasks.views import (
+    CustomPagination,
+    KeysetPagination,
+    PreconditionFailed,
+    TaskListView,
+    UncountedPagination,
+    active_filters,
+    count_mode,
+    sparse_page_fields,
+    task_list_cache_key,
+    task_list_signature,
+    task_list_version_key,
+    trim_fields,
+)
+import logging
+
+logger = logging.getLogger('tasks')
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """Render ``data`` with the same JSON renderer as the sync views, so bodies match byte for byte."""
+    return HttpResponse(TaskJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of DRF's APIView for the ASGI request path.
+
+    Authenticates with JWT through the async ORM, exposes a DRF ``Request`` for
+    parsing and query params, and renders errors through ``custom_exception_handler``.
+    """
+    authentication_class = CachedJWTAuthentication
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Token-authenticated like the DRF views, so session CSRF checks do not apply
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return HttpResponseNotAllowed(self._allowed_methods())
+
+        try:
+            user, _ = await self.authentication_class().aauthenticate(request)
+            request = Request(request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES])
+            request.user = user
+            self.request = request
+            return await handler(request, *args, **kwargs)
+        except APIException as exc:
+            return self.handle_exception(exc)
+
+    def handle_exception(self, exc):
+        """Build the same error envelope and status codes as the DRF views."""
+        response = custom_exception_handler(exc, {'view': self})
+        return json_response(response.data, response.status_code)
+
+
+class AsyncTaskListView(AsyncAPIView):
+    """Async variant of TaskListView: listing all tasks and creating a new task."""
+    filterset_class = TaskFilter
+    ordering_fields = TaskListView.ordering_fields
+
+    async def get(self, request):
+        """List all tasks with caching, filtering, sorting, and pagination."""
+        logger.info(f"AsyncTaskListView GET request by user {request.user}")
+        fields = requested_fields(request.query_params)
+        mode = count_mode(request)
+        cache_key = task_list_cache_key(request, await aget_generation(task_list_namespace(request.user.id)))
+
+        if is_conditional(request):
+            cached = await apeek(cache_key)
+            if cached is not None:
+                return cached_response(request, cached)
+
+            if mode == 'exact':
+                version = await self._list_version(request, self._filter_queryset(request))
+                etag, last_modified = self._list_validators(request, version)
+                not_modified = conditional_response(request, etag, last_modified)
+                if not_modified is not None:
+                    return not_modified
+
+        cached = await aget_or_compute(cache_key, lambda: self._build_cached_response(request, fields, mode))
+        return cached_response(request, cached)
+
+    async def post(self, request):
+        """Create a new task."""
+        logger.info(f"AsyncTaskListView POST request by user {request.user}")
+        serializer = TaskSerializer(data=request.data)
+        if serializer.is_valid():
+            task = await TaskService.acreate_task(request.user, serializer.validated_data)
+            logger.info(f"Task created: {task.title}")
+            return json_response(TaskSerializer(task).data, status.HTTP_201_CREATED)
+        logger.error(f"Task creation failed: {serializer.errors}")
+        return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    def _filter_queryset(self, request):
+        """Return the user's (lazy) tasks matching the request's TaskFilter parameters."""
+        return DjangoFilterBackend().filter_queryset(request, TaskService.get_all_tasks(request.user), self)
+
+    async def _list_version(self, request, tasks):
+        """The filtered set's ``(max(updated_at), count)``, computed once per filter signature."""
+        key = task_list_version_key(request, await aget_generation(task_list_namespace(request.user.id)))
+        return await aget_or_compute(key, lambda: TaskService.aget_tasks_version(tasks))
+
+    def _list_validators(self, request, version):
+        last_updated, count = version
+        etag = task_list_etag(task_list_signature(request), last_updated, count)
+        return etag, last_modified_timestamp(last_updated)
+
+    async def _build_cached_response(self, request, fields, mode):
+        return CachedResponse.pack(await self._build_response(request, fields, mode))
+
+    async def _build_response(self, request, fields=None, mode='exact'):
+        """Filter, sort, paginate, serialize, and render a task list page of ``fields``."""
+        tasks = self._filter_queryset(request)
+        version = await self._list_version(request, tasks) if mode == 'exact' else None
+
+        ordering_backend = TaskOrderingFilter()
+        tasks = ordering_backend.filter_queryset(request, tasks, self)
+
+        if KeysetPagination.cursor_query_param in request.query_params:
+            paginator = KeysetPagination(ordering_backend.get_ordering(request, tasks, self))
+            serializer = TaskRowSerializer(fields=sparse_page_fields(fields, paginator))
+            page = await TaskService.afetch_tasks(paginator.get_page_queryset(serializer.rows(tasks), request))
+            with timer('serializer', 'task_list'):
+                page = paginator.paginate_rows(serializer.to_representation(page))
+                page = trim_fields(page, fields, serializer.fields)
+            data = paginator.get_paginated_response(page).data
+        elif mode == 'exact':
+            serializer = TaskRowSerializer(fields=fields)
+            data = await self._paginate_by_page(request, serializer.rows(tasks), serializer, version[1])
+        else:
+            serializer = TaskRowSerializer(fields=fields)
+            estimate = None
+            if mode == 'estimate':
+                estimate = await TaskService.aestimate_task_count(request.user, tasks, active_filters(request, self))
+            paginator = UncountedPagination(estimate)
+            page = await TaskService.afetch_tasks(paginator.get_page_queryset(serializer.rows(tasks), request))
+            with timer('serializer', 'task_list'):
+                page = serializer.to_representation(paginator.paginate_rows(page))
+            data = paginator.get_paginated_response(page).data
+        with timer('render', 'task_list'):
+            response = json_response(data)
+        if version is None:
+            return set_validators(response, content_etag(response.content), None)
+        return set_validators(response, *self._list_validators(request, version))
+
+    async def _paginate_by_page(self, request, rows, serializer, count):
+        """Page-number pagination producing the exact CustomPagination envelope, for a known ``count``."""
+        paginator = CustomPagination()
+        page_size = paginator.get_page_size(request)
+        total_pages = max(1, ceil(count / page_size))
+
+        page_number = request.query_params.get(paginator.page_query_param) or 1
+        if page_number in paginator.last_page_strings:
+            page_number = total_pages
+        try:
+            page_number = int(page_number)
+        except (TypeError, ValueError):
+            raise NotFound(paginator.invalid_page_message)
+        if not 1 <= page_number <= total_pages:
+            raise NotFound(paginator.invalid_page_message)
+
+        start = (page_number - 1) * page_size
+        page = await TaskService.afetch_tasks(rows[start:start + page_size])
+        with timer('serializer', 'task_list'):
+            page = serializer.to_representation(page)
+        return {
+            'pagination': {
+                'current_page': page_number,
+                'total_pages': total_pages,
+                'total_items': count,
+                'page_size': paginator.page_size,
+            },
+            'results': page
+        }
+
+
+class AsyncTaskDetailView(AsyncAPIView):
+    """Async variant of TaskDetailView: retrieving, updating, and deleting a single task."""
+
+    async def get(self, request, task_id):
+        """Retrieve a task (or its ``?fields=``) by ID, answering conditional requests from ``updated_at`` alone."""
+        if is_conditional(request):
+            updated_at = await TaskService.aget_task_version(request.user, task_id)
+            if updated_at is None:
+                raise NotFound(detail="Task not found")
+            not_modified = conditional_response(
+                request, task_etag(task_id, updated_at), last_modified_timestamp(updated_at)
+            )
+            if not_modified is not None:
+                return not_modified
+
+        fields = requested_fields(request.query_params)
+        task = await TaskService.aget_task_by_id(request.user, task_id, fields)
+        if not task:
+            raise NotFound(detail="Task not found")
+        response = json_response(TaskSerializer(task, fields=fields).data)
+        return set_validators(response, task_etag(task.id, task.updated_at), last_modified_timestamp(task.updated_at))
+
+    async def put(self, request, task_id):
+        """Update the given fields of a task by ID, optionally guarded by ``If-Match``."""
+        serializer = TaskSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            updated_task = await TaskService.aupdate_task(
+                request.user, task_id, serializer.validated_data, if_match_versions(request, task_id)
+            )
+        except TaskConflict:
+            raise PreconditionFailed()
+        if not updated_task:
+            raise NotFound(detail="Task not found")
+        response = json_response(TaskSerializer(updated_task).data)
+        return set_validators(
+            response, task_etag(updated_task.id, updated_task.updated_at), last_modified_timestamp(updated_task.updated_at)
+        )
+
+    async def delete(self, request, task_id):
+        """Delete a task by ID, optionally guarded by ``If-Match``."""
+        try:
+            success = await TaskService.adelete_task(request.user, task_id, if_match_versions(request, task_id))
+        except TaskConflict:
+            raise PreconditionFailed()
+        if not success:
+            raise NotFound(detail="Task not found")
+        return json_response({"message": "Task deleted successfully"}, status.HTTP_204_NO_CONTENT)
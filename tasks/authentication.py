@@ -0,0 +1,136 @@
+import copy
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from tasks.cache import LRUCache
+from tasks.config import AppConfig
+from tasks.metrics import record_auth_lookup
+
+# Users resolved by CachedJWTAuthentication in this process, keyed by USER_ID_FIELD
+_local_users = LRUCache(AppConfig().auth_user_cache_size, AppConfig().auth_user_cache_ttl, name='auth_users')
+
+
+def _shared_key(user_id) -> str:
+    return f"auth_user:{user_id}"
+
+
+def forget_user(user_id) -> None:
+    """Drop a user from the local and shared authentication caches, e.g. after it changed."""
+    _local_users.delete(str(user_id))
+    cache.delete(_shared_key(user_id))
+
+
+def clear_user_cache() -> None:
+    """Empty this process's authentication LRU."""
+    _local_users.clear()
+
+
+def _token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+def _check_user(user, validated_token):
+    """The per-request checks of ``JWTAuthentication.get_user`` on an already loaded user."""
+    if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+    if api_settings.CHECK_REVOKE_TOKEN:
+        if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+    return user
+
+
+class AsyncJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with an ``aauthenticate`` that loads the user through the async ORM."""
+
+    async def aauthenticate(self, request):
+        """Return ``(user, validated_token)``, raising NotAuthenticated if no token was sent."""
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raise NotAuthenticated()
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """Async counterpart of ``JWTAuthentication.get_user`` with the same checks."""
+        user_id = _token_user_id(validated_token)
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        return _check_user(user, validated_token)
+
+
+class CachedJWTAuthentication(AsyncJWTAuthentication):
+    """
+    JWT authentication that resolves users without a query on repeat requests.
+
+    Users are looked up in a bounded, TTL'd in-process LRU, then (with
+    ``auth_user_cache_shared``) in the shared cache, and only then in the database.
+    Saving or deleting a user evicts it (see ``tasks.signals``); changes made by other
+    processes show up here within ``auth_user_cache_ttl`` seconds. With
+    ``auth_trust_token_claims`` the user is built from the token claims alone.
+    """
+
+    def get_user(self, validated_token):
+        config = AppConfig()
+        if config.auth_trust_token_claims:
+            return self._token_user(validated_token)
+        user_id = _token_user_id(validated_token)
+        user = self._cached_user(user_id)
+        if user is None and config.auth_user_cache_shared:
+            user = cache.get(_shared_key(user_id))
+            if user is not None:
+                record_auth_lookup('shared')
+                _local_users.set(str(user_id), user)
+        if user is None:
+            user = super().get_user(validated_token)
+            record_auth_lookup('database')
+            _local_users.set(str(user_id), user)
+            if config.auth_user_cache_shared:
+                cache.set(_shared_key(user_id), user, timeout=config.auth_user_cache_ttl)
+        # Checked on every request: the revocation claim differs between tokens
+        return copy.copy(_check_user(user, validated_token))
+
+    async def aget_user(self, validated_token):
+        config = AppConfig()
+        if config.auth_trust_token_claims:
+            return self._token_user(validated_token)
+        user_id = _token_user_id(validated_token)
+        user = self._cached_user(user_id)
+        if user is None and config.auth_user_cache_shared:
+            user = await cache.aget(_shared_key(user_id))
+            if user is not None:
+                record_auth_lookup('shared')
+                _local_users.set(str(user_id), user)
+        if user is None:
+            user = await super().aget_user(validated_token)
+            record_auth_lookup('database')
+            _local_users.set(str(user_id), user)
+            if config.auth_user_cache_shared:
+                await cache.aset(_shared_key(user_id), user, timeout=config.auth_user_cache_ttl)
+        return copy.copy(_check_user(user, validated_token))
+
+    @staticmethod
+    def _token_user(validated_token):
+        """A stateless user backed by the token, as ``JWTStatelessUserAuthentication`` builds it."""
+        _token_user_id(validated_token)
+        record_auth_lookup('claims')
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    @staticmethod
+    def _cached_user(user_id):
+        user = _local_users.get(str(user_id))
+        if user is not None:
+            record_auth_lookup('local')
+        return user
@@ -0,0 +1,519 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from tasks.compression import ENCODERS, compress, is_compressible, set_content_encoding
+from tasks.config import AppConfig
+from tasks.metrics import record_cache, record_cache_event
+from typing import NamedTuple, Optional
+import asyncio
+import random
+import sys
+import threading
+import time
+import uuid
+import weakref
+import logging
+
+logger = logging.getLogger('tasks')
+
+TASK_LIST_NAMESPACE = 'task_list'
+
+_batch_state = threading.local()
+
+# Per-key locks coalescing recomputes between threads of this process
+_key_locks = weakref.WeakValueDictionary()
+_async_key_locks = weakref.WeakValueDictionary()
+_key_locks_guard = threading.Lock()
+
+_WAIT_POLL_INTERVAL = 0.05
+
+
+def task_list_namespace(owner_id) -> str:
+    """Namespace of one owner's cached task lists, so a write only invalidates that owner's pages."""
+    return f"{TASK_LIST_NAMESPACE}:{owner_id}"
+
+
+def _generation_key(namespace: str) -> str:
+    return f"{namespace}:generation"
+
+
+def _fresh_generation() -> int:
+    """Seed value for a missing counter, larger than any generation handed out before it was lost."""
+    return time.time_ns() // 1000
+
+
+def get_generation(namespace: str) -> int:
+    """Return the current generation of a cache namespace, creating it if needed."""
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _fresh_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_generation(namespace: str) -> int:
+    """Async variant of ``get_generation`` using the async cache API."""
+    key = _generation_key(namespace)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, _fresh_generation(), timeout=None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def bump_generation(namespace: str) -> int:
+    """Atomically advance a namespace's generation, orphaning every key built from the old one."""
+    key = _generation_key(namespace)
+    try:
+        generation = cache.incr(key)
+    except ValueError:
+        # The counter was evicted; restart it above any value it could have held
+        generation = _fresh_generation()
+        if not cache.add(key, generation, timeout=None):
+            generation = cache.incr(key)
+    logger.info(f"Cache namespace '{namespace}' advanced to generation {generation}")
+    return generation
+
+
+def invalidate_task_lists(namespace: str) -> None:
+    """
+    Invalidate every task list cached under ``namespace`` in O(1) by bumping its generation.
+
+    The bump runs once the surrounding transaction commits, so readers never cache
+    pre-commit data under the new generation. Inside ``invalidation_batch()`` the
+    bump is deferred until the batch ends and issued only once.
+    """
+    if getattr(_batch_state, 'depth', 0):
+        _batch_state.pending.add(namespace)
+        return
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+@contextmanager
+def invalidation_batch():
+    """Collapse every invalidation issued inside the block into one bump per namespace."""
+    depth = getattr(_batch_state, 'depth', 0)
+    if not depth:
+        _batch_state.pending = set()
+    _batch_state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _batch_state.depth -= 1
+        if not _batch_state.depth:
+            pending, _batch_state.pending = _batch_state.pending, set()
+            for namespace in pending:
+                invalidate_task_lists(namespace)
+
+
+class LRUCache:
+    """
+    Bounded, thread-safe in-process LRU whose entries expire ``ttl`` seconds after they are set.
+
+    With ``max_bytes``, entries are also evicted by total size as given by ``weigh``.
+    A ``name`` reports hits, misses and evictions to the metrics endpoint.
+    """
+
+    def __init__(self, max_size: int, ttl: float, max_bytes: int = None, weigh=None, name: str = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.weigh = weigh
+        self.name = name
+        self.size_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _record(self, event, amount=1):
+        if self.name:
+            record_cache_event(self.name, event, amount)
+
+    def get(self, key, default=None):
+        """Return the live value for ``key`` and mark it most recently used, or ``default``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() >= entry[1]:
+                self._pop(key)
+                entry = None
+            if entry is None:
+                self._record('miss')
+                return default
+            self._entries.move_to_end(key)
+        self._record('hit')
+        return entry[0]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """Store ``value``, evicting the least recently used entries beyond the size bounds."""
+        weight = self.weigh(value) if self.weigh else 0
+        evicted = 0
+        with self._lock:
+            self._pop(key)
+            if self.max_bytes is not None and weight > self.max_bytes:
+                return  # Would evict everything else and still not fit
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl), weight)
+            self.size_bytes += weight
+            while len(self._entries) > self.max_size or (
+                    self.max_bytes is not None and self.size_bytes > self.max_bytes):
+                self._pop(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self._record('eviction', evicted)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _entry_weight(entry) -> int:
+    value = entry[0]
+    return getattr(value, 'nbytes', None) or sys.getsizeof(value)
+
+
+# Local tier of get_or_compute: entries are immutable per key (keys embed the cache
+# generation), so copies held by one worker never need invalidating by another
+_local_entries = LRUCache(
+    AppConfig().local_cache_max_entries,
+    AppConfig().list_cache_timeout + AppConfig().list_cache_stale_timeout,
+    max_bytes=AppConfig().local_cache_max_bytes,
+    weigh=_entry_weight,
+    name='local',
+)
+
+
+def clear_local_cache() -> None:
+    """Empty this process's tier in front of the shared cache."""
+    _local_entries.clear()
+
+
+class CachedResponse(NamedTuple):
+    """
+    A rendered response reduced to what replaying it needs.
+
+    Cached instead of the response object, which would pickle its headers, renderer
+    and request state along with it. ``bodies`` maps ``identity`` and each available
+    encoding to its body, so hits are served without compressing or decompressing.
+    Bodies below ``compress_min_bytes`` are kept uncompressed only.
+    """
+    bodies: dict
+    content_type: str
+    status: int
+    etag: Optional[str]
+    last_modified: Optional[int]
+
+    @classmethod
+    def pack(cls, response) -> 'CachedResponse':
+        last_modified = response.get('Last-Modified')
+        content = response.content
+        bodies = {'identity': content}
+        if is_compressible(response['Content-Type'], len(content)):
+            bodies.update((encoding, compress(content, encoding)) for encoding in ENCODERS)
+        return cls(
+            bodies,
+            response['Content-Type'],
+            response.status_code,
+            response.get('ETag'),
+            parse_http_date_safe(last_modified) if last_modified else None,
+        )
+
+    def unpack(self, encoding: str = None) -> HttpResponse:
+        """Rebuild the response in ``encoding`` (identity if None), validators included."""
+        response = HttpResponse(status=self.status, content_type=self.content_type)
+        if self.etag:
+            response['ETag'] = self.etag
+        if self.last_modified is not None:
+            response['Last-Modified'] = http_date(self.last_modified)
+        if encoding in self.bodies and encoding != 'identity':
+            return set_content_encoding(response, self.bodies[encoding], encoding)
+        response.content = self.bodies['identity']
+        if len(self.bodies) > 1:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(body) for body in self.bodies.values()) + len(self.content_type) + len(self.etag or '')
+
+
+class _KeyLock:
+    """Weak-referenceable holder for a per-key lock."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+class _AsyncKeyLock:
+    """Weak-referenceable holder for a per-key asyncio lock."""
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+
+
+def _local_lock(key: str) -> _KeyLock:
+    with _key_locks_guard:
+        key_lock = _key_locks.get(key)
+        if key_lock is None:
+            key_lock = _key_locks[key] = _KeyLock()
+        return key_lock
+
+
+def _local_async_lock(key: str) -> _AsyncKeyLock:
+    with _key_locks_guard:
+        key_lock = _async_key_locks.get(key)
+        if key_lock is None:
+            key_lock = _async_key_locks[key] = _AsyncKeyLock()
+        return key_lock
+
+
+def _jittered(timeout: float) -> float:
+    jitter = AppConfig().cache_ttl_jitter
+    return timeout * random.uniform(1 - jitter, 1 + jitter)
+
+
+def _entry(value, timeout: float, stale_timeout: float):
+    """``(value, fresh_until, expires_at)`` for a value fresh for a jittered ``timeout``, then stale."""
+    fresh_until = time.time() + _jittered(timeout)
+    return value, fresh_until, fresh_until + stale_timeout
+
+
+def _remember(key: str, entry):
+    """Keep a copy of a shared entry in the local LRU until the shared one expires."""
+    ttl = entry[2] - time.time()
+    if ttl > 0:
+        _local_entries.set(key, entry, ttl=ttl)
+
+
+def _get_entry(key: str):
+    """
+    Return the entry for ``key`` from the local LRU while fresh, else from the shared cache.
+
+    A stale local copy is re-read from the shared cache, which another worker may
+    already have refreshed.
+    """
+    entry = _local_entries.get(key)
+    if entry is not None and time.time() < entry[1]:
+        return entry
+    entry = cache.get(key)
+    if entry is not None:
+        _remember(key, entry)
+    return entry
+
+
+def _store(key: str, value, timeout: float, stale_timeout: float):
+    """Cache ``value`` in both tiers as fresh for a jittered ``timeout``, then stale for ``stale_timeout``."""
+    entry = _entry(value, timeout, stale_timeout)
+    cache.set(key, entry, timeout=entry[2] - time.time())
+    _remember(key, entry)
+    return value
+
+
+@contextmanager
+def _recompute_lock(key: str):
+    """Try to become the single recomputing worker for ``key``; yields whether it succeeded."""
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    acquired = cache.add(lock_key, token, timeout=AppConfig().cache_lock_timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def peek(key: str):
+    """Return the value cached by ``get_or_compute`` for ``key`` (fresh or stale), or None."""
+    entry = _get_entry(key)
+    if entry is None:
+        return None
+    record_cache('hit')
+    return entry[0]
+
+
+def get_or_compute(key: str, compute, timeout: float = None, stale_timeout: float = None):
+    """
+    Return the cached value for ``key``, computing it at most once across concurrent requests.
+
+    - Fresh hit: returned as is.
+    - Stale hit: one request (per shared cache) recomputes it while everyone else is
+      served the stale value (stale-while-revalidate).
+    - Miss: threads of this process queue on a local lock and workers sharing the
+      cache backend on an ``add()``-based lock; only the winner runs ``compute`` and
+      the rest pick up its result, computing themselves only if it takes longer than
+      ``cache_wait_timeout``.
+    """
+    config = AppConfig()
+    timeout = config.list_cache_timeout if timeout is None else timeout
+    stale_timeout = config.list_cache_stale_timeout if stale_timeout is None else stale_timeout
+
+    entry = _get_entry(key)
+    if entry is not None:
+        value, fresh_until, _ = entry
+        if time.time() < fresh_until:
+            logger.info(f"Cache hit for key: {key}")
+            record_cache('hit')
+            return value
+        with _recompute_lock(key) as acquired:
+            if not acquired:
+                logger.info(f"Serving stale value for key: {key}")
+                record_cache('stale')
+                return value
+            logger.info(f"Refreshing stale value for key: {key}")
+            record_cache('refresh')
+            return _store(key, compute(), timeout, stale_timeout)
+
+    key_lock = _local_lock(key)
+    if not key_lock.lock.acquire(timeout=config.cache_wait_timeout):
+        logger.warning(f"Timed out waiting for a local recompute of key: {key}")
+        record_cache('miss')
+        return _store(key, compute(), timeout, stale_timeout)
+    try:
+        # Another thread may have filled the entry while this one was waiting
+        entry = _get_entry(key)
+        if entry is not None:
+            record_cache('coalesced')
+            return entry[0]
+
+        deadline = time.time() + config.cache_wait_timeout
+        while True:
+            with _recompute_lock(key) as acquired:
+                if acquired:
+                    logger.info(f"Cache miss for key: {key}")
+                    record_cache('miss')
+                    return _store(key, compute(), timeout, stale_timeout)
+            # Another worker holds the lock: wait for its result
+            time.sleep(_WAIT_POLL_INTERVAL)
+            entry = _get_entry(key)
+            if entry is not None:
+                record_cache('coalesced')
+                return entry[0]
+            if time.time() >= deadline:
+                logger.warning(f"Timed out waiting for a shared recompute of key: {key}")
+                record_cache('miss')
+                return _store(key, compute(), timeout, stale_timeout)
+    finally:
+        key_lock.lock.release()
+
+
+async def _aget_entry(key: str):
+    """Async variant of ``_get_entry``."""
+    entry = _local_entries.get(key)
+    if entry is not None and time.time() < entry[1]:
+        return entry
+    entry = await cache.aget(key)
+    if entry is not None:
+        _remember(key, entry)
+    return entry
+
+
+async def _astore(key: str, value, timeout: float, stale_timeout: float):
+    """Async variant of ``_store``."""
+    entry = _entry(value, timeout, stale_timeout)
+    await cache.aset(key, entry, timeout=entry[2] - time.time())
+    _remember(key, entry)
+    return value
+
+
+async def _atry_recompute_lock(key: str):
+    """Try to take the shared recompute lock for ``key``; returns a token, or None if it is held."""
+    token = uuid.uuid4().hex
+    if await cache.aadd(f"{key}:lock", token, timeout=AppConfig().cache_lock_timeout):
+        return token
+    return None
+
+
+async def _arelease_recompute_lock(key: str, token: str):
+    lock_key = f"{key}:lock"
+    if await cache.aget(lock_key) == token:
+        await cache.adelete(lock_key)
+
+
+async def apeek(key: str):
+    """Async variant of ``peek``."""
+    entry = await _aget_entry(key)
+    if entry is None:
+        return None
+    record_cache('hit')
+    return entry[0]
+
+
+async def aget_or_compute(key: str, compute, timeout: float = None, stale_timeout: float = None):
+    """
+    Async variant of ``get_or_compute``; ``compute`` is a coroutine function.
+
+    Coroutines of this process queue on a per-key ``asyncio.Lock`` instead of a thread
+    lock, and waiting for another worker's recompute never blocks the event loop.
+    """
+    config = AppConfig()
+    timeout = config.list_cache_timeout if timeout is None else timeout
+    stale_timeout = config.list_cache_stale_timeout if stale_timeout is None else stale_timeout
+
+    entry = await _aget_entry(key)
+    if entry is not None:
+        value, fresh_until, _ = entry
+        if time.time() < fresh_until:
+            logger.info(f"Cache hit for key: {key}")
+            record_cache('hit')
+            return value
+        token = await _atry_recompute_lock(key)
+        if token is None:
+            logger.info(f"Serving stale value for key: {key}")
+            record_cache('stale')
+            return value
+        try:
+            logger.info(f"Refreshing stale value for key: {key}")
+            record_cache('refresh')
+            return await _astore(key, await compute(), timeout, stale_timeout)
+        finally:
+            await _arelease_recompute_lock(key, token)
+
+    key_lock = _local_async_lock(key)
+    try:
+        await asyncio.wait_for(key_lock.lock.acquire(), timeout=config.cache_wait_timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Timed out waiting for a local recompute of key: {key}")
+        record_cache('miss')
+        return await _astore(key, await compute(), timeout, stale_timeout)
+    try:
+        entry = await _aget_entry(key)
+        if entry is not None:
+            record_cache('coalesced')
+            return entry[0]
+
+        deadline = time.time() + config.cache_wait_timeout
+        while True:
+            token = await _atry_recompute_lock(key)
+            if token is not None:
+                try:
+                    logger.info(f"Cache miss for key: {key}")
+                    record_cache('miss')
+                    return await _astore(key, await compute(), timeout, stale_timeout)
+                finally:
+                    await _arelease_recompute_lock(key, token)
+            await asyncio.sleep(_WAIT_POLL_INTERVAL)
+            entry = await _aget_entry(key)
+            if entry is not None:
+                record_cache('coalesced')
+                return entry[0]
+            if time.time() >= deadline:
+                logger.warning(f"Timed out waiting for a shared recompute of key: {key}")
+                record_cache('miss')
+                return await _astore(key, await compute(), timeout, stale_timeout)
+    finally:
+        key_lock.lock.release()
@@ -0,0 +1,203 @@
+from contextlib import contextmanager
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.test.utils import override_settings
+from tasks.metrics import record_cache_event
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+
+logger = logging.getLogger('tasks')
+
+# Entry sizes are summed into cache_stats by triggers, so culling never scans the table
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL, size INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)",
+    "CREATE TABLE IF NOT EXISTS cache_stats (id INTEGER PRIMARY KEY CHECK (id = 1), bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO cache_stats (id, bytes) VALUES (1, 0)",
+    """CREATE TRIGGER IF NOT EXISTS cache_entries_ai AFTER INSERT ON cache_entries BEGIN
+        UPDATE cache_stats SET bytes = bytes + new.size;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS cache_entries_ad AFTER DELETE ON cache_entries BEGIN
+        UPDATE cache_stats SET bytes = bytes - old.size;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS cache_entries_au AFTER UPDATE OF size ON cache_entries BEGIN
+        UPDATE cache_stats SET bytes = bytes - old.size + new.size;
+    END""",
+]
+
+_UPSERT = (
+    "INSERT INTO cache_entries (key, value, expires, size) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires = excluded.expires, size = excluded.size"
+)
+
+_CULL_BATCH = 64
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache backend keeping pickled values in one SQLite file, shared by every worker on the host.
+
+    Unlike LocMemCache, a value (and an invalidation, such as a generation bump) written
+    by one worker is seen by all of them. ``add()`` and ``incr()`` are atomic across
+    processes. Once the entries exceed ``OPTIONS['MAX_BYTES']``, expired entries are
+    dropped, then those closest to expiring, down to ``CULL_TARGET`` of the limit.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_bytes = options.get('MAX_BYTES', 64 * 1024 * 1024)
+        self._cull_target = options.get('CULL_TARGET', 0.9)
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._local = threading.local()
+        # Threads of this process queue here instead of in SQLite's busy handler, which
+        # sleeps in millisecond steps; other processes still wait on the busy timeout
+        self._write_lock = threading.Lock()
+
+    def _connection(self):
+        """This thread's connection, reopened after a fork."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self._path, timeout=self._busy_timeout, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    @contextmanager
+    def _write(self):
+        """An IMMEDIATE transaction, so read-modify-write operations are atomic across processes."""
+        connection = self._connection()
+        with self._write_lock:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    @staticmethod
+    def _live(expires):
+        return expires is None or expires > time.time()
+
+    def _row(self, connection, key):
+        row = connection.execute('SELECT value, expires FROM cache_entries WHERE key = ?', (key,)).fetchone()
+        return row if row is not None and self._live(row[1]) else None
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._row(self._connection(), key)
+        if row is None:
+            record_cache_event('shared', 'miss')
+            return default
+        record_cache_event('shared', 'hit')
+        return pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._write() as connection:
+            connection.execute(_UPSERT, (key, blob, self.get_backend_timeout(timeout), len(key) + len(blob)))
+            self._cull(connection)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._write() as connection:
+            # Replaces only an expired entry; a live one leaves the row unchanged
+            cursor = connection.execute(
+                _UPSERT + " WHERE cache_entries.expires IS NOT NULL AND cache_entries.expires <= ?",
+                (key, blob, self.get_backend_timeout(timeout), len(key) + len(blob), time.time()),
+            )
+            added = cursor.rowcount == 1
+            if added:
+                self._cull(connection)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as connection:
+            cursor = connection.execute(
+                'UPDATE cache_entries SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), key, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as connection:
+            row = self._row(connection, key)
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            connection.execute('UPDATE cache_entries SET value = ?, size = ? WHERE key = ?',
+                               (blob, len(key) + len(blob), key))
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as connection:
+            cursor = connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        return cursor.rowcount == 1
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._row(self._connection(), key) is not None
+
+    def clear(self):
+        with self._write() as connection:
+            connection.execute('DELETE FROM cache_entries')
+
+    def close(self, **kwargs):
+        """Keep the per-thread connection open across requests, like the in-memory backends."""
+
+    def _cull(self, connection):
+        """Evict entries until the stored bytes are back under ``CULL_TARGET`` of ``MAX_BYTES``."""
+        stored = connection.execute('SELECT bytes FROM cache_stats').fetchone()[0]
+        if stored <= self._max_bytes:
+            return
+        target = self._max_bytes * self._cull_target
+        evicted = connection.execute('DELETE FROM cache_entries WHERE expires <= ?', (time.time(),)).rowcount
+        stored = connection.execute('SELECT bytes FROM cache_stats').fetchone()[0]
+        # Entries without an expiry (generation counters) go last
+        for expiring in (True, False):
+            condition = 'expires IS NOT NULL ORDER BY expires' if expiring else 'expires IS NULL'
+            while stored > target:
+                deleted = connection.execute(
+                    f'DELETE FROM cache_entries WHERE key IN '
+                    f'(SELECT key FROM cache_entries WHERE {condition} LIMIT {_CULL_BATCH})'
+                ).rowcount
+                if not deleted:
+                    break
+                evicted += deleted
+                stored = connection.execute('SELECT bytes FROM cache_stats').fetchone()[0]
+        logger.info(f"Shared cache culled {evicted} entries, {stored} bytes left")
+        record_cache_event('shared', 'eviction', evicted)
+
+
+@contextmanager
+def temporary_cache():
+    """
+    Point the default cache at an empty SQLite file for the duration of a throwaway run.
+
+    Test and benchmark databases reuse the IDs of real users, so their entries must
+    never reach (or clear) the cache file shared by the live workers.
+    """
+    with tempfile.TemporaryDirectory(prefix='tasks-cache-') as directory:
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'tasks.cache_backends.SQLiteCache',
+            'LOCATION': os.path.join(directory, 'cache.sqlite3'),
+        }}):
+            yield
@@ -0,0 +1,106 @@
+from django.utils.cache import patch_vary_headers
+from tasks.config import AppConfig
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:  # Optional dependency; br is simply not offered
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional dependency; zstd is simply not offered
+    zstandard = None
+
+# Levels suited to compressing on the request path, not to archiving
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+# HTML (the browsable API) embeds CSRF tokens, so it stays uncompressed (BREACH)
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+
+_ACCEPT_ENCODING = re.compile(r'^\s*([A-Za-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def _gzip(body: bytes) -> bytes:
+    # mtime=0 keeps the output, and so any cached copy of it, deterministic
+    return gzip.compress(body, compresslevel=AppConfig().cache_compress_level, mtime=0)
+
+
+def _encoders():
+    """Available encoders in order of server preference."""
+    encoders = {}
+    if zstandard:
+        encoders['zstd'] = lambda body: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if brotli:
+        encoders['br'] = lambda body: brotli.compress(body, quality=BROTLI_QUALITY)
+    encoders['gzip'] = _gzip
+    return encoders
+
+
+ENCODERS = _encoders()
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    return ENCODERS[encoding](body)
+
+
+def is_compressible(content_type: str, size: int) -> bool:
+    """Whether a body is worth compressing: a compressible type, at least ``compress_min_bytes`` long."""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return media_type in COMPRESSIBLE_TYPES and size >= AppConfig().compress_min_bytes
+
+
+def negotiate(request, available=ENCODERS):
+    """
+    Pick the encoding to send from ``Accept-Encoding``, or None for the identity body.
+
+    Among the ``available`` encodings the client accepts, the highest q-value wins,
+    ties going to the server's preference order.
+    """
+    header = request.META.get('HTTP_ACCEPT_ENCODING')
+    if not header:
+        return None
+    accepted = {}
+    for item in header.split(','):
+        match = _ACCEPT_ENCODING.match(item)
+        if not match:
+            continue
+        try:
+            accepted[match.group(1).lower()] = float(match.group(2) or 1)
+        except ValueError:
+            continue
+    best, best_q = None, 0
+    for encoding in ENCODERS:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, accepted.get('*', 0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """The ETag of one encoding of a representation: ``"tag"`` becomes ``"tag-gzip"``."""
+    if not etag or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def strip_etag_encodings(header: str) -> str:
+    """Map the encoded ETags in an ``If-Match``/``If-None-Match`` header back to the views' own tags."""
+    for encoding in ENCODERS:
+        header = header.replace(f'-{encoding}"', '"')
+    return header
+
+
+def set_content_encoding(response, body: bytes, encoding: str):
+    """Make ``response`` carry ``body`` as its ``encoding`` variant, with a matching ETag."""
+    response.content = body
+    response['Content-Encoding'] = encoding
+    response['Content-Length'] = str(len(body))
+    if response.has_header('ETag'):
+        response['ETag'] = encoded_etag(response['ETag'], encoding)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from hashlib import md5
+from tasks.compression import negotiate
+import re
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+_TASK_ETAG = re.compile(r'^"(\d+)-([0-9a-f]+)"$')
+
+
+def is_conditional(request) -> bool:
+    """Return whether the request carries cache validators worth checking."""
+    return any(header in request.META for header in CONDITIONAL_HEADERS)
+
+
+def task_etag(task_id: int, updated_at) -> str:
+    """Strong ETag for a single task, derived from its ID and ``updated_at``."""
+    # Integer arithmetic, so the version can be recovered exactly by parse_task_etag
+    micros = (updated_at - _EPOCH) // _MICROSECOND
+    return f'"{task_id}-{micros:x}"'
+
+
+def parse_task_etag(etag: str):
+    """Return ``(task_id, updated_at)`` from a strong task ETag, or None for any other tag."""
+    match = _TASK_ETAG.match(etag)
+    if not match:
+        return None
+    return int(match.group(1)), _EPOCH + int(match.group(2), 16) * _MICROSECOND
+
+
+def if_match_versions(request, task_id: int):
+    """
+    Return the ``updated_at`` values a write to ``task_id`` must match, from ``If-Match``.
+
+    None means the write is unconditional (no header, or ``*``). An empty list means
+    no listed ETag can match this task, so the precondition has already failed.
+    Weak ETags never match, as If-Match uses strong comparison.
+    """
+    header = request.META.get('HTTP_IF_MATCH')
+    if header is None:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    versions = []
+    for etag in etags:
+        parsed = parse_task_etag(etag)
+        if parsed and parsed[0] == task_id:
+            versions.append(parsed[1])
+    return versions
+
+
+def task_list_etag(signature: str, last_updated, count: int) -> str:
+    """Strong ETag for a filtered task list page: its query signature plus max(updated_at) and count."""
+    stamp = last_updated.isoformat() if last_updated else ''
+    return '"{}"'.format(md5(f"{signature}:{stamp}:{count}".encode('utf-8')).hexdigest())
+
+
+def content_etag(content: bytes) -> str:
+    """Strong ETag for a response body, for pages without a cheaper version to derive one from."""
+    return '"{}"'.format(md5(content).hexdigest())
+
+
+def last_modified_timestamp(updated_at):
+    """Convert ``updated_at`` to the whole-second timestamp used by ``Last-Modified``."""
+    return int(updated_at.timestamp()) if updated_at else None
+
+
+def set_validators(response, etag: str, last_modified):
+    """Attach ``ETag``/``Last-Modified`` to a response and return it."""
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def conditional_response(request, etag: str, last_modified, response=None):
+    """
+    Evaluate the request preconditions against the given validators.
+
+    Returns a 304 (or 412) response when they apply, otherwise ``response``.
+    """
+    result = get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+    if response is None and result is not None and result.status_code == 304:
+        set_validators(result, etag, last_modified)
+    return result
+
+
+def cached_response(request, cached):
+    """
+    Answer from a ``CachedResponse``: 304 (or 412) from its validators alone, else the
+    replayed response in the best cached encoding the client accepts.
+    """
+    not_modified = conditional_response(request, cached.etag, cached.last_modified)
+    if not_modified is not None:
+        return not_modified
+    return cached.unpack(negotiate(request, cached.bodies))
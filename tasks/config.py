@@ -15,6 +15,31 @@ class AppConfig:
         self.jwt_access_token_lifetime_minutes = 30
         self.jwt_refresh_token_lifetime_days = 1
         self.default_task_priority = 'medium'
+        self.bulk_max_items = 1000
+        self.bulk_batch_size = 500
+        self.count_estimate_cap = 1000  # Rows ?count=estimate counts before reporting a lower bound
+        self.export_chunk_size = 2000  # Rows fetched per round trip by the streaming export
+        self.list_cache_timeout = 60 * 5  # Seconds a cached list is served as fresh
+        self.list_cache_stale_timeout = 60  # Extra seconds it may be served while one request refreshes it
+        self.cache_ttl_jitter = 0.1  # Fractional jitter so entries written together don't expire together
+        self.local_cache_max_entries = 10000  # Entries of the in-process tier in front of the shared cache
+        self.local_cache_max_bytes = 32 * 1024 * 1024  # Bytes of cached responses that tier may hold per process
+        self.cache_compress_level = 6  # gzip level of compressed responses, cached or not
+        self.compress_min_bytes = 1024  # Smaller response bodies are sent uncompressed
+        self.cache_lock_timeout = 10  # Seconds before an abandoned recompute lock expires
+        self.cache_wait_timeout = 5  # Seconds a request waits for another one's recompute
+        self.sync_batch_size = 500  # Default (and maximum) changes and deletions per /api/tasks/changes/ response
+        self.sync_safety_lag = 5  # Seconds of recent writes held back from delta sync; must exceed how long a write can wait for the database lock
+        self.sync_tombstone_retention_days = 30  # Tombstones kept before compaction; older sync tokens get 410 Gone
+        self.log_repr_max_length = 200  # Characters of an argument/result repr kept in service call logs
+        self.log_call_sample_rate = 1.0  # Fraction of service calls whose arguments and results are logged
+        self.query_budget_max_repeats = 3  # Times one statement shape may run per request before it is flagged as N+1
+        self.query_budget_action = 'warn'  # QueryBudgetMiddleware: 'warn' logs violations, 'raise' fails the request
+        self.auth_user_cache_size = 1024  # Users kept in each process's CachedJWTAuthentication LRU
+        self.auth_user_cache_ttl = 60  # Seconds a cached user is trusted; bounds staleness of changes made by other processes
+        self.auth_user_cache_shared = False  # Also keep users in the shared cache backend, so other workers skip the DB
+        self.auth_trust_token_claims = False  # Build request.user from the token alone (no is_active check until it expires)
+        self.metrics_token = None  # When set, /api/metrics/ requires "Authorization: Bearer <token>"
 
     def update_config(self, key: str, value):
         """Update a configuration dynamically."""
@@ -1,29 +1,144 @@
 import logging
+import random
+import reprlib
 from functools import wraps
+from inspect import iscoroutinefunction
+from django.db.models import Model, QuerySet
+from tasks.config import AppConfig
+from tasks.metrics import observe_latency
+import time
 
 logger = logging.getLogger(__name__)
 
+class _SafeRepr(reprlib.Repr):
+    """Size-limited repr that describes querysets and partly loaded instances without querying."""
+
+    def repr1(self, x, level):
+        if isinstance(x, QuerySet):
+            if x._result_cache is None:
+                return f"<unevaluated QuerySet of {x.model.__name__}>"
+            return f"<QuerySet of {len(x._result_cache)} {x.model.__name__}>"
+        # __str__ of an .only() instance could load a deferred field, from the log thread
+        if isinstance(x, Model) and x.get_deferred_fields():
+            return f"<{type(x).__name__} pk={x.pk}>"
+        return super().repr1(x, level)
+
+class LazyRepr:
+    """
+    Log argument deferring the repr of ``value`` until a handler formats the record.
+
+    The repr never evaluates querysets and is cut to ``log_repr_max_length`` characters.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        max_length = AppConfig().log_repr_max_length
+        repr_ = _SafeRepr()
+        repr_.maxstring = repr_.maxother = max_length
+        text = repr_.repr(self.value)
+        return text if len(text) <= max_length else text[:max_length - 3] + '...'
+
+def _sampled():
+    """Decide whether this call's INFO records are logged, per ``log_call_sample_rate``."""
+    if not logger.isEnabledFor(logging.INFO):
+        return False
+    rate = AppConfig().log_call_sample_rate
+    return rate >= 1 or random.random() < rate
+
 def log_method_call(func):
-    """Decorator to log method calls, arguments, and results."""
+    """
+    Decorator to log method calls, arguments, and results.
+
+    Calls are sampled and their arguments and results formatted lazily; errors are always logged.
+    """
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            sampled = _sampled()
+            if sampled:
+                logger.info("Calling %s with args: %s, kwargs: %s", func.__name__, LazyRepr(args), LazyRepr(kwargs))
+            try:
+                result = await func(*args, **kwargs)
+                if sampled:
+                    logger.info("%s returned: %s", func.__name__, LazyRepr(result))
+                return result
+            except Exception as e:
+                logger.error("Error in %s: %s", func.__name__, e)
+                raise
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        logger.info(f"Calling {func.__name__} with args: {args}, kwargs: {kwargs}")
+        sampled = _sampled()
+        if sampled:
+            logger.info("Calling %s with args: %s, kwargs: %s", func.__name__, LazyRepr(args), LazyRepr(kwargs))
         try:
             result = func(*args, **kwargs)
-            logger.info(f"{func.__name__} returned: {result}")
+            if sampled:
+                logger.info("%s returned: %s", func.__name__, LazyRepr(result))
             return result
         except Exception as e:
-            logger.error(f"Error in {func.__name__}: {e}")
+            logger.error("Error in %s: %s", func.__name__, e)
             raise
     return wrapper
 
 def handle_exceptions(func):
     """Decorator to handle exceptions and log them."""
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                logger.error("Exception occurred in %s: %s", func.__name__, e)
+                raise
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except Exception as e:
-            logger.error(f"Exception occurred in {func.__name__}: {e}")
+            logger.error("Exception occurred in %s: %s", func.__name__, e)
             raise
     return wrapper
+
+def timed(layer):
+    """Decorator recording each call's latency in the ``layer`` histogram, labelled with the function name."""
+    def decorator(func):
+        operation = func.__name__
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    observe_latency(layer, operation, time.perf_counter() - started)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                observe_latency(layer, operation, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+def time_layer(layer):
+    """
+    Class decorator applying ``timed(layer)`` to the public static methods of a service or repository.
+
+    Private helpers run inside the public calls, so timing them would count their time twice.
+    """
+    def decorator(cls):
+        for name, attribute in list(vars(cls).items()):
+            if isinstance(attribute, staticmethod) and not name.startswith('_'):
+                setattr(cls, name, staticmethod(timed(layer)(attribute.__func__)))
+        return cls
+    return decorator
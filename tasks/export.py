@@ -0,0 +1,63 @@
+from tasks.serializers import task_row_converters
+import csv
+import json
+
+EXPORT_FIELDS = ['id', 'title', 'description', 'due_date', 'completed', 'priority', 'created_at', 'updated_at']
+
+# Number of rows joined into each chunk handed to the WSGI server
+ROWS_PER_WRITE = 500
+
+
+class _LineBuffer:
+    """File-like sink letting csv.writer return each formatted line instead of writing it."""
+
+    def write(self, value):
+        return value
+
+
+def _converted_rows(rows, fields):
+    converters = task_row_converters(fields)
+    pairs = [(index, convert) for index, convert in enumerate(converters) if convert]
+    for row in rows:
+        row = list(row)
+        for index, convert in pairs:
+            row[index] = convert(row[index])
+        yield row
+
+
+def _chunked(lines):
+    """Join lines into larger chunks so the server writes a few KB at a time."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= ROWS_PER_WRITE:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+def ndjson_lines(rows, fields=EXPORT_FIELDS):
+    """Yield one JSON object per task, matching TaskSerializer's output, newline-delimited."""
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    return _chunked(
+        encode(dict(zip(fields, row))) + '\n'
+        for row in _converted_rows(rows, fields)
+    )
+
+
+def csv_lines(rows, fields=EXPORT_FIELDS):
+    """Yield a CSV header followed by one line per task."""
+    writer = csv.writer(_LineBuffer())
+
+    def lines():
+        yield writer.writerow(fields)
+        for row in _converted_rows(rows, fields):
+            yield writer.writerow(['' if value is None else value for value in row])
+    return _chunked(lines())
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', ndjson_lines),
+    'csv': ('text/csv', csv_lines),
+}
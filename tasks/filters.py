@@ -1,15 +1,47 @@
 import django_filters
+from rest_framework.filters import OrderingFilter
 from tasks.models import Task
+from tasks.search import search_tasks
+
+# API ordering fields backed by a different, indexed column
+ORDERING_COLUMNS = {'priority': 'priority_rank'}
+
+
+def ordering_column(field: str) -> str:
+    """Return the column that sorts an API ordering field."""
+    return ORDERING_COLUMNS.get(field, field)
+
+
+class TaskOrderingFilter(OrderingFilter):
+    """OrderingFilter sorting ``priority`` by rank (low < medium < high) rather than alphabetically."""
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if ordering:
+            return queryset.order_by(*[
+                f"-{ordering_column(term[1:])}" if term.startswith('-') else ordering_column(term)
+                for term in ordering
+            ])
+        return queryset
 
 
 class TaskFilter(django_filters.FilterSet):
     """FilterSet for filtering tasks."""
+    q = django_filters.CharFilter(method='filter_search')  # Ranked full-text search over title and description
     title = django_filters.CharFilter(lookup_expr='icontains')  # Search by title (case-insensitive)
     description = django_filters.CharFilter(lookup_expr='icontains')  # Search by description
     due_date = django_filters.DateFromToRangeFilter()  # Filter by due_date range
     completed = django_filters.BooleanFilter()  # Filter by completed status
-    priority = django_filters.ChoiceFilter(choices=Task.PRIORITY_CHOICES)  # Filter by priority
+    priority = django_filters.ChoiceFilter(choices=Task.PRIORITY_CHOICES, method='filter_priority')  # Filter by priority
 
     class Meta:
         model = Task
-        fields = ['title', 'description', 'due_date', 'completed', 'priority']
+        fields = ['q', 'title', 'description', 'due_date', 'completed', 'priority']
+
+    def filter_priority(self, queryset, name, value):
+        """Filter on the indexed rank, so the (priority_rank, ...) indexes serve filter and sort."""
+        return queryset.filter(priority_rank=Task.PRIORITY_RANKS[value])
+
+    def filter_search(self, queryset, name, value):
+        """Apply the full-text search, ordered by relevance unless an ordering is requested."""
+        return search_tasks(queryset, value)
@@ -0,0 +1,37 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Hand log records to a background thread that writes them to ``handlers``.
+
+    The logging thread only enqueues the record: merging its arguments (such as
+    ``LazyRepr`` values), formatting and console/file I/O all run in a
+    ``QueueListener`` thread. Configured from LOGGING
+    with ``'handlers': ['cfg://handlers.console', ...]``, so its name must sort
+    after the handlers it wraps (dictConfig sets handlers up alphabetically).
+    """
+
+    def __init__(self, handlers, maxsize=0):
+        # Index access makes dictConfig's ConvertingList resolve the cfg:// references
+        handlers = [handlers[index] for index in range(len(handlers))]
+        for handler in handlers:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(f"{handler!r} is not a configured handler; reference handlers configured earlier.")
+        super().__init__(queue.Queue(maxsize))
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def prepare(self, record):
+        """Enqueue records as they are; the listener thread formats them."""
+        return record
+
+    def close(self):
+        """Flush queued records and stop the listener thread."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
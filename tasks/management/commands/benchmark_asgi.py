@@ -0,0 +1,116 @@
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from statistics import median, quantiles
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.cache_backends import temporary_cache
+from tasks.models import Task
+
+SYNC_LIST_PATH = '/api/tasks/'
+ASYNC_LIST_PATH = '/api/async/tasks/'
+
+
+class Command(BaseCommand):
+    help = "Compare task list throughput of the sync (WSGI) views and the native async (ASGI) views."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000, help="Number of tasks to seed.")
+        parser.add_argument('--requests', type=int, default=500, help="Requests sent per mode.")
+        parser.add_argument('--concurrency', type=int, default=20, help="Requests in flight at once.")
+        parser.add_argument('--pages', type=int, default=10, help="Distinct list pages requested, to mix cache hits and misses.")
+        parser.add_argument('--keep-cache', action='store_true', help="Do not clear the cache before each mode.")
+
+    def handle(self, *args, **options):
+        # Run against a throwaway test database so the benchmark never touches real tasks
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with temporary_cache():  # Nor the shared cache file, whose keys the seeded IDs would collide with
+                self._benchmark(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+    def _benchmark(self, options):
+        """Seed the tasks, then time the same requests against both modes."""
+        token = self._seed(options['count'])
+        headers = {'Authorization': f'Bearer {token}'}
+        params = [{'page': page % options['pages'] + 1} for page in range(options['requests'])]
+
+        if not options['keep_cache']:
+            cache.clear()
+        self._report('sync (WSGI)', *self._run_sync(headers, params, options['concurrency']))
+
+        if not options['keep_cache']:
+            cache.clear()
+        self._report('async (ASGI)', *asyncio.run(self._run_async(headers, params, options['concurrency'])))
+
+    def _seed(self, count):
+        """Create a benchmark user plus ``count`` tasks and return an access token."""
+        user = get_user_model().objects.create_user(username='benchmark', password='benchmark')
+        start = now()
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        Task.objects.bulk_create(
+            (
+                Task(
+                    owner=user,
+                    title=f"Benchmark task {i}",
+                    due_date=start + timedelta(days=random.randint(1, 365)),
+                    completed=random.random() < 0.3,
+                    priority=random.choice(priorities),
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+        self.stdout.write(f"Seeded {count} tasks.")
+        return str(RefreshToken.for_user(user).access_token)
+
+    @staticmethod
+    def _run_sync(headers, params, concurrency):
+        """Send the requests through the WSGI handler from a pool of threads."""
+        def send(query):
+            started = time.perf_counter()
+            response = Client().get(SYNC_LIST_PATH, query, headers=headers)
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(send, params))
+        return time.perf_counter() - started, results
+
+    @staticmethod
+    async def _run_async(headers, params, concurrency):
+        """Send the requests through the ASGI handler as concurrent coroutines."""
+        semaphore = asyncio.Semaphore(concurrency)
+        client = AsyncClient()
+
+        async def send(query):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(ASYNC_LIST_PATH, query, headers=headers)
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(send(query) for query in params))
+        return time.perf_counter() - started, results
+
+    def _report(self, label, elapsed, results):
+        latencies = sorted(latency for latency, _ in results)
+        errors = sum(1 for _, status_code in results if status_code != 200)
+        p95 = quantiles(latencies, n=20)[-1] if len(latencies) > 1 else latencies[0]
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(
+            f"{label:<13} {len(results) / elapsed:8.1f} req/s  "
+            f"p50 {median(latencies) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms  errors {errors}"
+        ))
@@ -0,0 +1,83 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.renderers import TaskJSONRenderer, orjson
+from tasks.serializers import TaskRowSerializer, TaskSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare rows/sec of TaskSerializer + JSONRenderer against the TaskRowSerializer fast path used by task lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=5000, help="Number of tasks to seed and serialize per run.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per path; the best run is reported.")
+        parser.add_argument('--min-speedup', type=float, default=0, help="Exit with an error below this speedup.")
+
+    def handle(self, *args, **options):
+        # Seed a throwaway test database so the benchmark never touches real tasks
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self._seed(options['count'])
+            self._run(options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def _run(self, options):
+        tasks = Task.objects.order_by('id')
+        count = options['count']
+
+        def serializer_path():
+            return JSONRenderer().render(TaskSerializer(list(tasks), many=True).data)
+
+        def fast_path():
+            serializer = TaskRowSerializer()
+            return TaskJSONRenderer().render(serializer.to_representation(serializer.rows(tasks)))
+
+        if serializer_path() != fast_path():
+            raise CommandError("The fast path output differs from TaskSerializer + JSONRenderer.")
+
+        baseline = self._best(serializer_path, options['repeat'])
+        fast = self._best(fast_path, options['repeat'])
+        speedup = baseline / fast
+
+        encoder = 'orjson' if orjson else 'json'
+        self.stdout.write(f"TaskSerializer + JSONRenderer        {count / baseline:10.0f} rows/s")
+        self.stdout.write(f"TaskRowSerializer + TaskJSONRenderer {count / fast:10.0f} rows/s  ({encoder})")
+        style = self.style.ERROR if speedup < options['min_speedup'] else self.style.SUCCESS
+        self.stdout.write(style(f"Speedup: {speedup:.1f}x, identical output"))
+        if speedup < options['min_speedup']:
+            raise CommandError(f"Speedup {speedup:.1f}x is below {options['min_speedup']}x.")
+
+    def _seed(self, count):
+        start = now()
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        Task.objects.bulk_create(
+            (
+                Task(
+                    title=f"Benchmark task {i}",
+                    description=f"Seeded by benchmark_serializers ({i})" if i % 2 else None,
+                    due_date=start + timedelta(days=random.randint(1, 365), seconds=random.randint(0, 86399)),
+                    completed=random.random() < 0.3,
+                    priority=random.choice(priorities),
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+
+    @staticmethod
+    def _best(path, repeat):
+        """Return the fastest wall-clock time of ``repeat`` runs of ``path``."""
+        samples = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            path()
+            samples.append(time.perf_counter() - started)
+        return min(samples)
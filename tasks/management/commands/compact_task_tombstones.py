@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.config import AppConfig
+from tasks.sync import compact_tombstones, tombstones_available
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the tombstones behind /api/tasks/changes/ that are older than the retention window. "
+        "Meant to run periodically, e.g. daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=AppConfig().sync_tombstone_retention_days,
+                            help="Keep tombstones of this many days; match sync_tombstone_retention_days.")
+        parser.add_argument('--database', default='default', help="Database alias to compact.")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not tombstones_available(using):
+            self.stdout.write("Task tombstones are not recorded on this database.")
+            return
+
+        removed = compact_tombstones(timezone.now() - timedelta(days=options['days']), using)
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} tombstones older than {options['days']} days."))
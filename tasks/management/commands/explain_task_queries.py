@@ -0,0 +1,154 @@
+import random
+import re
+import time
+from datetime import timedelta
+from statistics import median
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from tasks.filters import TaskFilter, ordering_column
+from tasks.models import Task
+
+# Filter combinations mirroring the TaskFilter query strings clients send
+FILTER_COMBINATIONS = {
+    'none': {},
+    'completed=false': {'completed': 'false'},
+    'completed=true': {'completed': 'true'},
+    'priority=high': {'priority': 'high'},
+    'due_date range': None,  # Filled in at runtime relative to now()
+    'completed=false&priority=high': {'completed': 'false', 'priority': 'high'},
+}
+
+ORDERINGS = [None, 'due_date', '-due_date', 'priority', '-priority', 'created_at', '-created_at']
+
+
+class _Rollback(Exception):
+    """Raised to discard the seeded rows at the end of a run."""
+
+
+class Command(BaseCommand):
+    help = "Seed tasks, EXPLAIN every TaskListView filter/ordering combination of one owner and report plan and latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help="Number of tasks to seed.")
+        parser.add_argument('--owners', type=int, default=10, help="Users the seeded tasks are spread across.")
+        parser.add_argument('--page-size', type=int, default=10, help="LIMIT applied to each list query.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed executions per query.")
+        parser.add_argument('--analyze', action='store_true', help="Run ANALYZE after seeding.")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded tasks instead of rolling back.")
+        parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if any query scans the table.")
+        parser.add_argument('--baseline-text-priority', action='store_true',
+                            help="Also sort by the raw priority text column, for comparison with priority_rank.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                scans = self._run(options)
+                if not options['keep']:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        if scans and options['fail_on_scan']:
+            raise CommandError(f"{len(scans)} list queries fell back to a table scan: {', '.join(scans)}")
+
+    def _run(self, options):
+        if options['owners'] < 1:
+            raise CommandError("--owners must be at least 1.")
+        owner = self._seed(options['count'], options['owners'])
+        if options['analyze']:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        today = now()
+        combinations = dict(FILTER_COMBINATIONS)
+        combinations['due_date range'] = {
+            'due_date_after': (today + timedelta(days=10)).date().isoformat(),
+            'due_date_before': (today + timedelta(days=20)).date().isoformat(),
+        }
+
+        # Sorts exactly as TaskOrderingFilter applies them, plus the optional text-column baseline
+        orderings = [(ordering, self._column(ordering)) for ordering in ORDERINGS]
+        if options['baseline_text_priority']:
+            orderings += [('priority (text column)', 'priority'), ('-priority (text column)', '-priority')]
+
+        scans = []
+        for label, params in combinations.items():
+            for ordering, column in orderings:
+                if not params and not ordering:
+                    continue  # Unfiltered, unordered pages read the first rows in storage order
+                # Scoped to one owner, as every list request is
+                queryset = TaskFilter(params, queryset=Task.objects.filter(owner=owner)).qs
+                if column:
+                    queryset = queryset.order_by(column)
+                queryset = queryset[:options['page_size']]
+
+                plan = queryset.explain()
+                access = self._classify(plan)
+                latency = self._time(queryset, options['repeat'])
+                name = f"{label} / ordering={ordering or '-'}"
+                if access == 'scan' and '(text column)' not in name:
+                    scans.append(name)
+
+                style = self.style.ERROR if access == 'scan' else self.style.SUCCESS
+                self.stdout.write(style(f"[{access:>5}] {latency * 1000:8.3f} ms  {name}"))
+                for line in plan.splitlines():
+                    self.stdout.write(f"            {line}")
+        return scans
+
+    def _seed(self, count, owners):
+        """
+        Insert ``count`` tasks with a spread of owners, priorities, statuses and due dates.
+
+        Returns the owner whose tasks are queried.
+        """
+        start = now()
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f"explain-task-queries-{i}") for i in range(owners)
+        )
+        tasks = (
+            Task(
+                owner=users[i % owners],
+                title=f"Benchmark task {i}",
+                description=f"Seeded by explain_task_queries ({i})",
+                due_date=start + timedelta(days=random.randint(1, 365), seconds=random.randint(0, 86399)),
+                completed=random.random() < 0.3,
+                priority=random.choice(priorities),
+            )
+            for i in range(count)
+        )
+        Task.objects.bulk_create(tasks, batch_size=1000)
+        self.stdout.write(f"Seeded {count} tasks across {owners} owners.")
+        return users[0]
+
+    @staticmethod
+    def _column(ordering):
+        """Map an API ordering term to the column it sorts by."""
+        if not ordering:
+            return None
+        descending = ordering.startswith('-')
+        return f"{'-' if descending else ''}{ordering_column(ordering.lstrip('-'))}"
+
+    @staticmethod
+    def _classify(plan):
+        """Label a plan as an index access, an index access plus sort, or a table scan."""
+        table = re.escape(Task._meta.db_table)
+        if re.search(rf'\bSCAN {table}\b(?! USING)', plan) or 'Seq Scan' in plan or 'type: ALL' in plan:
+            return 'scan'
+        if 'TEMP B-TREE' in plan or re.search(r'\bSort\b', plan) or 'filesort' in plan:
+            return 'sort'
+        return 'index'
+
+    @staticmethod
+    def _time(queryset, repeat):
+        """Return the median wall-clock time to evaluate ``queryset``."""
+        samples = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            list(queryset.all())
+            samples.append(time.perf_counter() - started)
+        return median(samples)
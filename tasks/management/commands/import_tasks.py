@@ -0,0 +1,107 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from tasks.config import AppConfig
+from tasks.repository import TaskRepository
+from tasks.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    help = "Stream tasks from an NDJSON or CSV file into the database in batched transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON or CSV file to import.")
+        parser.add_argument('--owner', required=True, help="Username that will own the imported tasks.")
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            help="Input format (default: guessed from the file extension).")
+        parser.add_argument('--batch-size', type=int, default=AppConfig().bulk_batch_size,
+                            help="Rows inserted per bulk_create transaction.")
+        parser.add_argument('--rejects', help="Where to write rejected rows (default: <path>.rejects.ndjson).")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f"File not found: {path}")
+        input_format = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'ndjson')
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        rejects_path = Path(options['rejects'] or f"{path}.rejects.ndjson")
+        try:
+            owner = get_user_model().objects.get_by_natural_key(options['owner'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User not found: {options['owner']}")
+
+        # A single serializer instance validates every row, so fields are built only once
+        validator = TaskSerializer()
+        imported = rejected = 0
+        batch = []
+        started = time.perf_counter()
+
+        with path.open(newline='', encoding='utf-8') as source, rejects_path.open('w', encoding='utf-8') as rejects:
+            rows = self._csv_rows(source) if input_format == 'csv' else self._ndjson_rows(source)
+            for line_number, row, error in rows:
+                if error is None:
+                    try:
+                        batch.append(validator.run_validation(row))
+                    except ValidationError as exc:
+                        error = exc.detail
+                if error is not None:
+                    rejected += 1
+                    rejects.write(json.dumps({'line': line_number, 'row': row, 'errors': error}, default=str) + '\n')
+
+                if len(batch) >= batch_size:
+                    imported += self._flush(owner, batch)
+                    batch = []
+                    self._report(imported, rejected, started)
+
+            if batch:
+                imported += self._flush(owner, batch)
+
+        self._report(imported, rejected, started, final=True)
+        if rejected:
+            self.stdout.write(self.style.WARNING(f"Rejected rows written to {rejects_path}"))
+        else:
+            rejects_path.unlink()
+
+    @staticmethod
+    def _flush(owner, batch):
+        """Insert one batch of validated rows in its own transaction."""
+        with transaction.atomic():
+            return len(TaskRepository.bulk_create_tasks(owner, batch))
+
+    @staticmethod
+    def _ndjson_rows(source):
+        """Yield ``(line_number, row, error)`` for each non-blank NDJSON line."""
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, line.rstrip('\n'), {'non_field_errors': [f"Invalid JSON: {exc}"]}
+                continue
+            if not isinstance(row, dict):
+                yield line_number, row, {'non_field_errors': ["Expected a JSON object."]}
+                continue
+            yield line_number, row, None
+
+    @staticmethod
+    def _csv_rows(source):
+        """Yield ``(line_number, row, error)`` for each CSV record; empty cells count as absent."""
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if key and value != ''}, None
+
+    def _report(self, imported, rejected, started, final=False):
+        elapsed = time.perf_counter() - started
+        rate = (imported + rejected) / elapsed if elapsed else 0.0
+        message = f"{imported} imported, {rejected} rejected in {elapsed:.1f}s ({rate:,.0f} rows/sec)"
+        self.stdout.write(self.style.SUCCESS(message) if final else message)
@@ -0,0 +1,382 @@
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from statistics import mean
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from django.utils.timezone import now
+
+from tasks.cache import bump_generation, clear_local_cache, task_list_namespace
+from tasks.cache_backends import temporary_cache
+from tasks.models import Task
+
+USERNAME = 'loadtest'
+PASSWORD = 'loadtest-password'
+WORDS = ['report', 'invoice', 'deploy', 'review', 'meeting', 'backup', 'release', 'budget', 'design', 'refactor']
+
+# Default weights of the request mix; override with --mix name=weight,...
+DEFAULT_MIX = {
+    'list': 20,
+    'list_filtered': 15,
+    'list_ordered': 10,
+    'list_deep_page': 5,
+    'list_cursor': 10,
+    'list_search': 5,
+    'detail': 20,
+    'create': 6,
+    'update': 6,
+    'delete': 2,
+    'token': 1,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and drive the real API routes in-process at a configurable "
+        "concurrency, reporting throughput and latency percentiles per scenario."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help="Number of tasks to seed (10k-1M).")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests to send (ignored with --duration).")
+        parser.add_argument('--duration', type=float, help="Send requests for this many seconds instead.")
+        parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight at once.")
+        parser.add_argument('--interface', choices=['wsgi', 'asgi'], default='wsgi',
+                            help="Drive the WSGI handler from threads, or the ASGI handler from coroutines.")
+        parser.add_argument('--mix', help="Scenario weights, e.g. 'list=5,detail=5,create=1'.")
+        parser.add_argument('--page-depth', type=int, default=100, help="Deepest page requested by list_deep_page.")
+        parser.add_argument('--no-cache', action='store_true', help="Invalidate cached task lists before every list request.")
+        parser.add_argument('--warmup', type=int, default=50, help="Untimed requests sent before measuring.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the dataset and request mix.")
+        parser.add_argument('--log-level', default='WARNING', help="Level of the tasks/django loggers during the run.")
+        parser.add_argument('--json', dest='json_path', help="Write the report as JSON to this path ('-' for stdout).")
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.mix = self._parse_mix(options['mix'])
+        random.seed(options['seed'])
+        for name in ('tasks', 'django'):
+            logging.getLogger(name).setLevel(options['log_level'].upper())
+
+        # A file-backed throwaway database, so concurrent writers wait on SQLite's busy
+        # timeout instead of failing on shared-cache table locks
+        handle, path = tempfile.mkstemp(prefix='loadtest-', suffix='.sqlite3')
+        os.close(handle)
+        os.remove(path)
+        test_settings = connections['default'].settings_dict.setdefault('TEST', {})
+        original_name, test_settings['NAME'] = test_settings.get('NAME'), path
+
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            # Seeded IDs repeat the real database's, so cached lists and generations go to a
+            # temporary file instead of the shared cache
+            with temporary_cache():
+                clear_local_cache()
+                self._seed(options['tasks'])
+                report = self._run()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+            test_settings['NAME'] = original_name
+
+        self._print(report)
+        if options['json_path']:
+            payload = json.dumps(report, indent=2)
+            if options['json_path'] == '-':
+                self.stdout.write(payload)
+            else:
+                with open(options['json_path'], 'w') as output:
+                    output.write(payload + '\n')
+                self.stdout.write(f"Report written to {options['json_path']}")
+
+    def _parse_mix(self, value):
+        if not value:
+            return dict(DEFAULT_MIX)
+        mix = {}
+        for item in value.split(','):
+            name, _, weight = item.partition('=')
+            name = name.strip()
+            if name not in DEFAULT_MIX:
+                raise CommandError(f"Unknown scenario '{name}'. Choose from: {', '.join(DEFAULT_MIX)}.")
+            try:
+                mix[name] = float(weight) if weight else 1.0
+            except ValueError:
+                raise CommandError(f"Invalid weight for '{name}': {weight}")
+        return mix
+
+    def _seed(self, count):
+        """Create the load test user and ``count`` tasks it owns, in batches."""
+        self.user = get_user_model().objects.create_user(username=USERNAME, password=PASSWORD)
+        start = now()
+        priorities = [choice for choice, _ in Task.PRIORITY_CHOICES]
+        batch_size = 5000
+        started = time.perf_counter()
+        for offset in range(0, count, batch_size):
+            Task.objects.bulk_create(
+                Task(
+                    owner=self.user,
+                    title=f"{random.choice(WORDS)} {random.choice(WORDS)} {i}",
+                    description=f"Seeded by loadtest: {' '.join(random.sample(WORDS, 3))}" if i % 2 else None,
+                    due_date=start + timedelta(days=random.randint(1, 365), seconds=random.randint(0, 86399)),
+                    completed=random.random() < 0.3,
+                    priority=random.choice(priorities),
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        self.max_seeded_id = Task.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.min_seeded_id = Task.objects.order_by('id').values_list('id', flat=True).first() or 0
+        self.stdout.write(f"Seeded {count} tasks in {time.perf_counter() - started:.1f}s.")
+
+    # Scenarios return (method, path, params) for a worker's ``state``
+
+    def _scenario(self, name, state):
+        list_path = '/api/tasks/'
+        if name == 'list':
+            return 'GET', list_path, {}
+        if name == 'list_filtered':
+            return 'GET', list_path, random.choice([
+                {'completed': 'false'},
+                {'priority': random.choice(['low', 'medium', 'high'])},
+                {'completed': 'false', 'priority': 'high'},
+                {'due_date_after': now().date().isoformat(),
+                 'due_date_before': (now() + timedelta(days=30)).date().isoformat()},
+            ])
+        if name == 'list_ordered':
+            return 'GET', list_path, {'ordering': random.choice(['due_date', '-due_date', 'priority', '-created_at'])}
+        if name == 'list_deep_page':
+            return 'GET', list_path, {'page': random.randint(2, self.options['page_depth'])}
+        if name == 'list_cursor':
+            # Each worker walks forward through the cursor pages, restarting at the end
+            return 'GET', list_path, {'cursor': state.get('cursor') or '', 'ordering': '-due_date'}
+        if name == 'list_search':
+            return 'GET', list_path, {'q': random.choice(WORDS)}
+        if name == 'detail':
+            return 'GET', f'/api/tasks/{self._random_id()}/', None
+        if name == 'create':
+            return 'POST', list_path, {
+                'title': f"Load test {random.choice(WORDS)}",
+                'due_date': (now() + timedelta(days=random.randint(1, 90))).isoformat(),
+                'priority': random.choice(['low', 'medium']),
+            }
+        if name == 'update':
+            return 'PUT', f'/api/tasks/{self._random_id()}/', {'completed': random.random() < 0.5}
+        if name == 'delete':
+            # Only tasks this worker created, so reads keep hitting seeded rows
+            if not state['created']:
+                return self._scenario('create', state)
+            return 'DELETE', f"/api/tasks/{state['created'].pop()}/", None
+        if name == 'token':
+            return 'POST', '/api/token/', {'username': USERNAME, 'password': PASSWORD}
+        raise CommandError(f"Unknown scenario '{name}'.")
+
+    def _random_id(self):
+        return random.randint(self.min_seeded_id, self.max_seeded_id)
+
+    @staticmethod
+    def _after(name, method, state, response):
+        """Carry cursors and created IDs over to the worker's next requests."""
+        if response.status_code >= 400:
+            return
+        if name == 'list_cursor':
+            state['cursor'] = response.json()['pagination']['next_cursor']
+        elif method == 'POST' and name in ('create', 'delete'):
+            state['created'].append(response.json()['id'])
+
+    def _pick(self):
+        names = list(self.mix)
+        return random.choices(names, weights=[self.mix[name] for name in names])[0]
+
+    def _before_request(self, method):
+        if self.options['no_cache'] and method == 'GET':
+            bump_generation(task_list_namespace(self.user.id))
+
+    def _token(self):
+        response = Client().post('/api/token/', {'username': USERNAME, 'password': PASSWORD},
+                                 content_type='application/json')
+        if response.status_code != 200:
+            raise CommandError(f"Could not obtain a token: {response.status_code} {response.content[:200]}")
+        return response.json()['access']
+
+    def _run(self):
+        options = self.options
+        headers = {'Authorization': f'Bearer {self._token()}'}
+        samples = []  # (scenario, seconds, status)
+        samples_lock = threading.Lock()
+
+        if options['interface'] == 'wsgi':
+            elapsed = self._run_wsgi(headers, samples, samples_lock)
+        else:
+            elapsed = asyncio.run(self._run_asgi(headers, samples))
+        return self._report(samples, elapsed)
+
+    def _budget(self):
+        """Return a function telling workers whether to send another (timed) request."""
+        options = self.options
+        lock = threading.Lock()
+        sent = {'count': -options['warmup']}
+        deadline = {}
+
+        def next_request():
+            with lock:
+                sent['count'] += 1
+                if sent['count'] == 1:
+                    deadline['at'] = time.perf_counter() + (options['duration'] or 0)
+                if sent['count'] <= 0:
+                    return 'warmup'
+                if options['duration']:
+                    return 'timed' if time.perf_counter() < deadline['at'] else None
+                return 'timed' if sent['count'] <= options['requests'] else None
+        return next_request
+
+    def _run_wsgi(self, headers, samples, samples_lock):
+        next_request = self._budget()
+        started = {}
+
+        def worker():
+            try:
+                work()
+            finally:
+                connections.close_all()  # Per-thread connections, closed before teardown
+
+        def work():
+            client = Client()
+            state = {'created': []}
+            while True:
+                phase = next_request()
+                if phase is None:
+                    return
+                if phase == 'timed':
+                    started.setdefault('at', time.perf_counter())
+                name = self._pick()
+                method, path, data = self._scenario(name, state)
+                self._before_request(method)
+                request_started = time.perf_counter()
+                if method == 'GET':
+                    response = client.get(path, data, headers=headers)
+                else:
+                    response = getattr(client, method.lower())(path, data, content_type='application/json', headers=headers)
+                seconds = time.perf_counter() - request_started
+                self._after(name, method, state, response)
+                if phase == 'timed':
+                    with samples_lock:
+                        samples.append((name, seconds, response.status_code))
+
+        with ThreadPoolExecutor(max_workers=self.options['concurrency']) as executor:
+            futures = [executor.submit(worker) for _ in range(self.options['concurrency'])]
+            for future in futures:
+                future.result()
+        return time.perf_counter() - started.get('at', time.perf_counter())
+
+    async def _run_asgi(self, headers, samples):
+        next_request = self._budget()
+        started = {}
+
+        async def worker():
+            client = AsyncClient()
+            state = {'created': []}
+            while True:
+                phase = next_request()
+                if phase is None:
+                    return
+                if phase == 'timed':
+                    started.setdefault('at', time.perf_counter())
+                name = self._pick()
+                method, path, data = self._scenario(name, state)
+                self._before_request(method)
+                request_started = time.perf_counter()
+                if method == 'GET':
+                    response = await client.get(path, data, headers=headers)
+                else:
+                    send = getattr(client, method.lower())
+                    response = await send(path, data, content_type='application/json', headers=headers)
+                seconds = time.perf_counter() - request_started
+                self._after(name, method, state, response)
+                if phase == 'timed':
+                    samples.append((name, seconds, response.status_code))
+
+        await asyncio.gather(*(worker() for _ in range(self.options['concurrency'])))
+        return time.perf_counter() - started.get('at', time.perf_counter())
+
+    def _report(self, samples, elapsed):
+        by_scenario = {}
+        for name, seconds, status_code in samples:
+            by_scenario.setdefault(name, []).append((seconds, status_code))
+
+        def summarize(entries):
+            latencies = sorted(seconds for seconds, _ in entries)
+            errors = sum(1 for _, status_code in entries if status_code >= 400)
+            return {
+                'requests': len(entries),
+                'errors': errors,
+                'throughput_rps': round(len(entries) / elapsed, 2) if elapsed else None,
+                'mean_ms': round(mean(latencies) * 1000, 3),
+                'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+                'p90_ms': round(_percentile(latencies, 90) * 1000, 3),
+                'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+                'max_ms': round(latencies[-1] * 1000, 3),
+            }
+
+        if not samples:
+            raise CommandError("No requests were measured.")
+        options = self.options
+        return {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'options': {key: options[key] for key in (
+                    'tasks', 'requests', 'duration', 'concurrency', 'interface', 'page_depth',
+                    'no_cache', 'warmup', 'seed',
+                )},
+                'mix': self.mix,
+            },
+            'elapsed_s': round(elapsed, 3),
+            'overall': summarize([(seconds, status_code) for _, seconds, status_code in samples]),
+            'scenarios': {name: summarize(entries) for name, entries in sorted(by_scenario.items())},
+        }
+
+    def _print(self, report):
+        header = f"{'scenario':<16}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        rows = list(report['scenarios'].items()) + [('overall', report['overall'])]
+        for name, stats in rows:
+            style = self.style.ERROR if stats['errors'] else (lambda text: text)
+            self.stdout.write(style(
+                f"{name:<16}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>10.1f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p99_ms']:>10.2f}"
+            ))
+
+
+def _percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
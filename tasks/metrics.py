@@ -0,0 +1,230 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+# Upper bounds (seconds) of the latency histogram buckets, roughly x2.5 apart
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Per-request DB totals, shared with sync_to_async threads through the context
+_request_stats = ContextVar('tasks_request_stats', default=None)
+
+
+class Histogram:
+    """Thread-safe cumulative-bucket histogram with bucket-interpolated quantiles."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def quantile(self, q, counts=None, count=None):
+        """Estimate the ``q`` quantile by linear interpolation inside its bucket."""
+        if counts is None:
+            counts, count, _ = self.snapshot()
+        if not count:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]  # Beyond the last bound: report the bound
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+
+class MetricFamily:
+    """A named metric with one Histogram or counter value per label set."""
+
+    def __init__(self, name, kind, help_text, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.buckets = buckets
+        self.children = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, labels):
+        child = self.children.get(labels)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(labels, Histogram(self.buckets))
+        return child
+
+    def increment(self, labels, amount=1):
+        with self._lock:
+            self.children[labels] = self.children.get(labels, 0) + amount
+
+
+LAYER_DURATION = MetricFamily(
+    'tasks_layer_duration_seconds', 'histogram',
+    "Time spent per layer and operation (inclusive of the layers below it).", LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = MetricFamily(
+    'tasks_request_db_queries', 'histogram', "Database queries executed per request.", QUERY_COUNT_BUCKETS,
+)
+REQUEST_DB_DURATION = MetricFamily(
+    'tasks_request_db_duration_seconds', 'histogram', "Database time per request.", LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = MetricFamily(
+    'tasks_cache_requests_total', 'counter', "get_or_compute lookups by outcome.",
+)
+
+AUTH_USER_LOOKUPS = MetricFamily(
+    'tasks_auth_user_lookups_total', 'counter', "Authenticated-user resolutions by source.",
+)
+
+CACHE_EVENTS = MetricFamily(
+    'tasks_cache_events_total', 'counter', "Hits, misses and evictions per cache tier.",
+)
+
+FAMILIES = [LAYER_DURATION, REQUEST_QUERIES, REQUEST_DB_DURATION, CACHE_REQUESTS, AUTH_USER_LOOKUPS, CACHE_EVENTS]
+
+# Cache outcomes answered without running the computation
+CACHE_HIT_RESULTS = {'hit', 'stale', 'coalesced'}
+
+
+def observe_latency(layer, operation, seconds):
+    LAYER_DURATION.histogram((('layer', layer), ('operation', operation))).observe(seconds)
+
+
+def record_cache(result):
+    """Count one get_or_compute outcome: hit, stale, coalesced, refresh or miss."""
+    CACHE_REQUESTS.increment((('result', result),))
+
+
+def record_cache_event(cache, event, amount=1):
+    """Count ``amount`` hit, miss or eviction events of a cache tier (an in-process LRU or ``shared``)."""
+    CACHE_EVENTS.increment((('cache', cache), ('event', event)), amount)
+
+
+def record_auth_lookup(source):
+    """Count one authenticated-user resolution: local, shared, database or claims."""
+    AUTH_USER_LOOKUPS.increment((('source', source),))
+
+
+@contextmanager
+def timer(layer, operation):
+    """Time the enclosed block as ``operation`` of ``layer``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_latency(layer, operation, time.perf_counter() - started)
+
+
+class RequestStats:
+    """Mutable DB totals of the current request."""
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+def start_request():
+    """Begin collecting DB totals for the current request; returns ``(stats, reset_token)``."""
+    stats = RequestStats()
+    return stats, _request_stats.set(stats)
+
+
+def finish_request(view_name, stats, token, seconds):
+    """Record the request's latency and DB totals under ``view_name``."""
+    _request_stats.reset(token)
+    labels = (('view', view_name),)
+    observe_latency('view', view_name, seconds)
+    REQUEST_QUERIES.histogram(labels).observe(stats.queries)
+    REQUEST_DB_DURATION.histogram(labels).observe(stats.db_time)
+
+
+def query_timer(execute, sql, params, many, context):
+    """Database execute wrapper timing every query and adding it to the request's totals."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        observe_latency('db', 'executemany' if many else 'execute', elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``query_timer`` to each new DB connection."""
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
+
+
+def _format_labels(labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}' if labels else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """Render every metric in the Prometheus text exposition format (0.0.4)."""
+    lines = []
+    for family in FAMILIES:
+        lines.append(f"# HELP {family.name} {family.help_text}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        for labels, child in sorted(family.children.items()):
+            if family.kind == 'counter':
+                lines.append(f"{family.name}{_format_labels(labels)} {child}")
+                continue
+            counts, count, total = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(family.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(f"{family.name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{family.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{family.name}_count{_format_labels(labels)} {count}")
+
+    # In-process quantile estimates, so p50/p95/p99 are readable without PromQL
+    name = f"{LAYER_DURATION.name}_quantile"
+    lines.append(f"# HELP {name} Bucket-interpolated latency quantiles per layer and operation.")
+    lines.append(f"# TYPE {name} gauge")
+    for labels, histogram in sorted(LAYER_DURATION.children.items()):
+        counts, count, _ = histogram.snapshot()
+        for q in QUANTILES:
+            value = histogram.quantile(q, counts, count)
+            lines.append(f"{name}{_format_labels(labels + (('quantile', str(q)),))} {_format_value(value)}")
+
+    outcomes = dict(CACHE_REQUESTS.children)
+    total = sum(outcomes.values())
+    hits = sum(count for labels, count in outcomes.items() if dict(labels)['result'] in CACHE_HIT_RESULTS)
+    lines.append("# HELP tasks_cache_hit_ratio Share of get_or_compute lookups served without recomputing.")
+    lines.append("# TYPE tasks_cache_hit_ratio gauge")
+    lines.append(f"tasks_cache_hit_ratio {_format_value(hits / total if total else 0.0)}")
+    return '\n'.join(lines) + '\n'
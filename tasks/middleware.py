@@ -0,0 +1,170 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.cache import patch_vary_headers
+from tasks.compression import (
+    ENCODERS,
+    compress,
+    encoded_etag,
+    is_compressible,
+    negotiate,
+    set_content_encoding,
+    strip_etag_encodings,
+)
+from tasks.config import AppConfig
+from tasks.metrics import finish_request, start_request
+from tasks.query_budget import QueryBudgetExceeded, QueryRecorder, budget_for
+import logging
+import time
+
+logger = logging.getLogger('tasks')
+
+
+class MetricsMiddleware:
+    """
+    Record each request's latency, DB query count and DB time per view.
+
+    Queries are counted by the ``query_timer`` execute wrapper installed on every
+    connection, including those used by async views through ``sync_to_async``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token = start_request()
+        started = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            finish_request(self._view_name(request), stats, token, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        stats, token = start_request()
+        started = time.perf_counter()
+        try:
+            return await self.get_response(request)
+        finally:
+            finish_request(self._view_name(request), stats, token, time.perf_counter() - started)
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+
+class QueryBudgetMiddleware:
+    """
+    Development aid flagging requests that exceed their endpoint's query budget
+    (``ENDPOINT_QUERY_BUDGETS``) or repeat a statement shape (a likely N+1).
+
+    Violations are logged, or raised when ``query_budget_action`` is ``'raise'``.
+    Every response carries the statement count in ``X-Query-Count``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self._check(request, response, recorder)
+
+    async def __acall__(self, request):
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self._check(request, response, recorder)
+
+    @staticmethod
+    def _check(request, response, recorder):
+        response['X-Query-Count'] = str(recorder.count)
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return response
+        config = AppConfig()
+        try:
+            recorder.check(
+                budget_for(match.url_name, request.method),
+                config.query_budget_max_repeats,
+                label=f"{request.method} {match.url_name}",
+            )
+        except QueryBudgetExceeded as e:
+            if config.query_budget_action == 'raise':
+                raise
+            logger.warning(str(e))
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compress responses in the encoding negotiated from ``Accept-Encoding``.
+
+    Only compressible types of at least ``compress_min_bytes`` are compressed, and
+    streaming responses are passed through. Responses a view already encoded (cached
+    task lists keep precompressed variants) are left as they are. Each encoding gets
+    its own ETag (``"tag-gzip"``); the suffix is stripped from incoming
+    ``If-None-Match``/``If-Match`` headers, so views only see their own tags.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        sent = self._strip_etags(request)
+        return self._compress(request, self.get_response(request), sent)
+
+    async def __acall__(self, request):
+        sent = self._strip_etags(request)
+        return self._compress(request, await self.get_response(request), sent)
+
+    @staticmethod
+    def _strip_etags(request):
+        """Strip encoding suffixes from the request's ETags, returning the ``If-None-Match`` as sent."""
+        sent = request.META.get('HTTP_IF_NONE_MATCH')
+        for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH'):
+            if header in request.META:
+                request.META[header] = strip_etag_encodings(request.META[header])
+        return sent
+
+    @staticmethod
+    def _compress(request, response, sent):
+        if response.status_code == 304:
+            # Confirm the tag of whichever encoding the client holds
+            etag = response.get('ETag')
+            if sent and etag:
+                for encoding in ENCODERS:
+                    if encoded_etag(etag, encoding) in sent:
+                        response['ETag'] = encoded_etag(etag, encoding)
+                        break
+            return response
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if not is_compressible(response.get('Content-Type'), len(response.content)):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request)
+        if encoding is None:
+            return response
+        body = compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+        return set_content_encoding(response, body, encoding)
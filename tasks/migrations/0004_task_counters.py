@@ -0,0 +1,84 @@
+from django.db import migrations, models
+
+
+# The counter triggers as of this migration. Later migrations replace them (0006
+# prefixes every key with the owner), so they are frozen here rather than read from
+# tasks.stats, whose current triggers reference columns that do not exist yet.
+_PRIORITY_KEY = "'priority:' || {row}priority || ':' || {row}completed"
+_OPEN_DUE_KEY = "'open_due:' || substr({row}due_date, 1, 10)"
+
+
+def _add(key_sql, delta, condition='1'):
+    return (
+        f'INSERT INTO tasks_taskcounter("key", "count") SELECT {key_sql}, {delta} WHERE {condition} '
+        f'ON CONFLICT("key") DO UPDATE SET "count" = "count" + excluded."count";'
+    )
+
+
+def _count_row(row, delta):
+    prefix = f'{row}.'
+    return (
+        _add(_PRIORITY_KEY.format(row=prefix), delta)
+        + _add(_OPEN_DUE_KEY.format(row=prefix), delta, condition=f'NOT {prefix}completed')
+    )
+
+
+CREATE_STATEMENTS = [
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_ai AFTER INSERT ON tasks_task BEGIN
+        {_count_row('new', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_ad AFTER DELETE ON tasks_task BEGIN
+        {_count_row('old', -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_au AFTER UPDATE OF priority, completed, due_date ON tasks_task
+    WHEN old.priority IS NOT new.priority OR old.completed IS NOT new.completed
+        OR substr(old.due_date, 1, 10) IS NOT substr(new.due_date, 1, 10)
+    BEGIN
+        {_count_row('old', -1)}
+        {_count_row('new', 1)}
+    END""",
+    "DELETE FROM tasks_taskcounter",
+    f"""INSERT INTO tasks_taskcounter("key", "count")
+        SELECT {_PRIORITY_KEY.format(row='')}, COUNT(*) FROM tasks_task GROUP BY priority, completed""",
+    f"""INSERT INTO tasks_taskcounter("key", "count")
+        SELECT {_OPEN_DUE_KEY.format(row='')}, COUNT(*) FROM tasks_task
+        WHERE NOT completed GROUP BY substr(due_date, 1, 10)""",
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_au",
+]
+
+
+def install_counters(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def uninstall_counters(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(install_counters, uninstall_counters),
+    ]
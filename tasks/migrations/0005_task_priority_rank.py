@@ -0,0 +1,42 @@
+# Generated by Django 5.1.5 on 2026-10-17 07:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_counters'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_priority_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_priority_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_priority_due_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.GeneratedField(db_persist=False, expression=models.Case(models.When(priority='low', then=models.Value(1)), models.When(priority='medium', then=models.Value(2)), models.When(priority='high', then=models.Value(3)), default=models.Value(0)), null=True, output_field=models.PositiveSmallIntegerField()),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority_rank', 'due_date'], name='task_prank_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['priority_rank', 'created_at'], name='task_prank_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['priority_rank', 'due_date'], name='task_open_prank_due_idx'),
+        ),
+    ]
@@ -0,0 +1,199 @@
+# Generated by Django 5.1.5 on 2026-10-17 07:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def assign_unowned_tasks(apps, schema_editor):
+    """Give existing tasks to the first superuser (or else the first user), in batches of rows."""
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Task = apps.get_model('tasks', 'Task')
+    db = schema_editor.connection.alias
+    users = User.objects.using(db).order_by('pk')
+    owner_id = users.filter(is_superuser=True).values_list('pk', flat=True).first() or \
+        users.values_list('pk', flat=True).first()
+    if owner_id is None:
+        return  # No users yet; the tasks stay unowned
+    unowned = Task.objects.using(db).filter(owner__isnull=True)
+    while True:
+        ids = list(unowned.order_by('pk').values_list('pk', flat=True)[:BACKFILL_BATCH_SIZE])
+        if not ids:
+            break
+        Task.objects.using(db).filter(pk__in=ids).update(owner_id=owner_id)
+
+
+# The FTS triggers and counter triggers as of this migration, frozen rather than read
+# from tasks.search and tasks.stats so later changes there cannot alter it.
+FTS_CREATE_STATEMENTS = [
+    """CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_task_fts_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_task_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+# Unowned tasks are counted under owner 0
+_OWNER = "coalesce({row}owner_id, 0)"
+_PRIORITY_KEY = _OWNER + " || ':priority:' || {row}priority || ':' || {row}completed"
+_OPEN_DUE_KEY = _OWNER + " || ':open_due:' || substr({row}due_date, 1, 10)"
+
+
+def _add(key_sql, delta, condition='1'):
+    return (
+        f'INSERT INTO tasks_taskcounter("key", "count") SELECT {key_sql}, {delta} WHERE {condition} '
+        f'ON CONFLICT("key") DO UPDATE SET "count" = "count" + excluded."count";'
+    )
+
+
+def _count_row(row, delta):
+    prefix = f'{row}.'
+    return (
+        _add(_PRIORITY_KEY.format(row=prefix), delta)
+        + _add(_OPEN_DUE_KEY.format(row=prefix), delta, condition=f'NOT {prefix}completed')
+    )
+
+
+COUNTER_CREATE_STATEMENTS = [
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_ai AFTER INSERT ON tasks_task BEGIN
+        {_count_row('new', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_ad AFTER DELETE ON tasks_task BEGIN
+        {_count_row('old', -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_au
+    AFTER UPDATE OF owner_id, priority, completed, due_date ON tasks_task
+    WHEN old.owner_id IS NOT new.owner_id OR old.priority IS NOT new.priority
+        OR old.completed IS NOT new.completed OR substr(old.due_date, 1, 10) IS NOT substr(new.due_date, 1, 10)
+    BEGIN
+        {_count_row('old', -1)}
+        {_count_row('new', 1)}
+    END""",
+    "DELETE FROM tasks_taskcounter",
+    f"""INSERT INTO tasks_taskcounter("key", "count")
+        SELECT {_PRIORITY_KEY.format(row='')}, COUNT(*) FROM tasks_task GROUP BY owner_id, priority, completed""",
+    f"""INSERT INTO tasks_taskcounter("key", "count")
+        SELECT {_OPEN_DUE_KEY.format(row='')}, COUNT(*) FROM tasks_task
+        WHERE NOT completed GROUP BY owner_id, substr(due_date, 1, 10)""",
+]
+
+COUNTER_DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_au",
+]
+
+
+def _fts_installed(schema_editor):
+    return 'tasks_task_fts' in schema_editor.connection.introspection.table_names(include_views=False)
+
+
+def reinstall_fts(apps, schema_editor):
+    # Removing owner_id on SQLite rebuilds tasks_task, which drops the FTS triggers
+    if schema_editor.connection.vendor != 'sqlite' or not _fts_installed(schema_editor):
+        return
+    for statement in FTS_CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def reinstall_counters(apps, schema_editor):
+    # The counter keys now start with the owner, so the old triggers are replaced and all counts rebuilt
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in COUNTER_DROP_STATEMENTS + COUNTER_CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def uninstall_counters(apps, schema_editor):
+    # The triggers read owner_id, so they go before the column does. Task stats are
+    # stale until this migration is applied again, which recounts them.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in COUNTER_DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_priority_rank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_fts),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_due_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_created_at_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_done_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_prank_due_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_prank_created_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_open_prank_due_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        # Backfill before the owner indexes exist, so the updates do not maintain them
+        migrations.RunPython(assign_unowned_tasks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'due_date'], name='task_owner_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'created_at'], name='task_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'priority_rank', 'due_date'], name='task_owner_prank_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'priority_rank', 'created_at'], name='task_owner_prank_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['owner', 'due_date'], name='task_owner_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['owner', 'priority_rank', 'due_date'], name='task_owner_open_prank_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['owner', 'due_date'], name='task_owner_done_due_idx'),
+        ),
+        migrations.RunPython(reinstall_counters, uninstall_counters),
+    ]
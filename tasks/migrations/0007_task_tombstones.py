@@ -0,0 +1,66 @@
+# Generated by Django 5.1.5 on 2026-10-17 08:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# The tombstone trigger as of this migration, frozen rather than read from tasks.sync
+CREATE_STATEMENTS = [
+    """CREATE TRIGGER IF NOT EXISTS tasks_tasktombstone_ad AFTER DELETE ON tasks_task
+    WHEN old.owner_id IS NOT NULL
+    BEGIN
+        INSERT INTO tasks_tasktombstone (task_id, owner_id, deleted_at)
+        VALUES (old.id, old.owner_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS tasks_tasktombstone_ad",
+]
+
+
+def install_tombstones(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def uninstall_tombstones(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_owner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'updated_at', 'id'], name='task_owner_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='tasktombstone',
+            name='owner',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['owner', 'id'], name='tombstone_owner_idx'),
+        ),
+        migrations.RunPython(install_tombstones, uninstall_tombstones),
+    ]
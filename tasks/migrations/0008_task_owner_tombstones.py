@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# The owner-change tombstone trigger as of this migration, frozen rather than read from tasks.sync
+CREATE_STATEMENTS = [
+    """CREATE TRIGGER IF NOT EXISTS tasks_tasktombstone_au AFTER UPDATE OF owner_id ON tasks_task
+    WHEN old.owner_id IS NOT NULL AND old.owner_id IS NOT new.owner_id
+    BEGIN
+        INSERT INTO tasks_tasktombstone (task_id, owner_id, deleted_at)
+        VALUES (old.id, old.owner_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+]
+
+DROP_STATEMENTS = [
+    "DROP TRIGGER IF EXISTS tasks_tasktombstone_au",
+]
+
+
+def install_tombstones(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+def uninstall_tombstones(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_STATEMENTS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_task_tombstones'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_tombstones, uninstall_tombstones),
+    ]
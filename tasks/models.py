@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Case, Value, When
 from django.core.exceptions import ValidationError
 from django.utils.timezone import now
 
@@ -9,7 +11,19 @@ class Task(models.Model):
         ('medium', 'Medium'),
         ('high', 'High'),
     ]
+    # Sort rank of each priority: low < medium < high
+    PRIORITY_RANKS = {value: rank for rank, (value, _) in enumerate(PRIORITY_CHOICES, 1)}
 
+    # Null only for tasks left unowned by the ownership migration; the API never returns them.
+    # Not indexed on its own: every index below leads with owner.
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tasks',
+        null=True,
+        blank=True,
+        db_index=False,
+    )
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     due_date = models.DateTimeField()
@@ -19,9 +33,52 @@ class Task(models.Model):
         choices=PRIORITY_CHOICES,
         default='medium',
     )
+    # Integer rank of ``priority`` for sorting and filtering; a virtual column
+    # computed by the database, so no write path has to keep it in sync.
+    priority_rank = models.GeneratedField(
+        expression=Case(
+            *[When(priority=value, then=Value(rank)) for value, rank in PRIORITY_RANKS.items()],
+            default=Value(0),
+        ),
+        output_field=models.PositiveSmallIntegerField(),
+        db_persist=False,
+        null=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Indexes follow the TaskListView query shapes: every query is scoped to the
+        # requesting owner, then TaskFilter lookups on completed/priority/due_date
+        # combine with OrderingFilter sorts. Priority filters and sorts run on
+        # priority_rank (see TaskOrderingFilter).
+        indexes = [
+            models.Index(fields=['owner', 'due_date'], name='task_owner_due_idx'),
+            models.Index(fields=['owner', 'created_at'], name='task_owner_created_idx'),
+            models.Index(fields=['owner', 'priority_rank', 'due_date'], name='task_owner_prank_due_idx'),
+            models.Index(fields=['owner', 'priority_rank', 'created_at'], name='task_owner_prank_created_idx'),
+            # Partial indexes per completion state: a plain index on a boolean
+            # column is not used for `WHERE completed` / `WHERE NOT completed`.
+            # Backends without partial index support skip these.
+            models.Index(
+                fields=['owner', 'due_date'],
+                condition=models.Q(completed=False),
+                name='task_owner_open_due_idx',
+            ),
+            models.Index(
+                fields=['owner', 'priority_rank', 'due_date'],
+                condition=models.Q(completed=False),
+                name='task_owner_open_prank_due_idx',
+            ),
+            models.Index(
+                fields=['owner', 'due_date'],
+                condition=models.Q(completed=True),
+                name='task_owner_done_due_idx',
+            ),
+            # Delta sync (/api/tasks/changes/) seeks by (updated_at, id)
+            models.Index(fields=['owner', 'updated_at', 'id'], name='task_owner_updated_idx'),
+        ]
+
     def clean(self):
         """Model-level validation for Task."""
         # Ensure the due_date is not in the past
@@ -34,8 +91,50 @@ class Task(models.Model):
 
     def save(self, *args, **kwargs):
         """Override save to include validation."""
-        self.full_clean()  # Call clean() before saving
+        # Call clean() before saving; the owner foreign key is left to the database
+        # rather than checked with an extra SELECT on every save
+        self.full_clean(exclude=['owner'])
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
+
+
+class TaskCounter(models.Model):
+    """
+    Incrementally maintained per-owner task counts, keyed ``<owner>:priority:<priority>:<0|1>``
+    and ``<owner>:open_due:<YYYY-MM-DD>`` (open tasks per UTC due day); unowned tasks count
+    under owner 0. Kept in sync by the triggers installed in ``tasks.stats``.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}={self.count}"
+
+
+class TaskTombstone(models.Model):
+    """
+    A deleted task, reported to delta-sync clients until compacted.
+
+    Written by the trigger installed in ``tasks.sync`` on every delete path. IDs grow
+    in commit order (SQLite has a single writer), so they double as sync positions.
+    The owner is not a constraint: tombstones outlive the users whose deletion cascaded.
+    """
+    task_id = models.BigIntegerField()
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+    )
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'id'], name='tombstone_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"task {self.task_id} deleted at {self.deleted_at}"
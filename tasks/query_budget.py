@@ -0,0 +1,109 @@
+from collections import Counter
+from contextvars import ContextVar
+import re
+
+# Declared SQL statement budgets per (URL name, method), including the JWT user lookup
+# of a cold authentication cache (warm requests resolve the user without a query).
+# They must not depend on the number of rows involved; tests/dev middleware enforce them.
+ENDPOINT_QUERY_BUDGETS = {
+    ('token_obtain_pair', 'POST'): 1,
+    ('token_refresh', 'POST'): 1,
+    ('task_list', 'GET'): 3,  # user, version aggregate (also the count; cached per filter set) or estimate, page
+    ('task_list', 'POST'): 2,
+    ('task_bulk', 'POST'): 2,  # user, one INSERT per batch
+    ('task_bulk', 'PATCH'): 3,  # user, in_bulk fetch, one UPDATE per batch
+    ('task_bulk', 'DELETE'): 4,  # user, existing ids, collector fetch, delete
+    ('task_export', 'GET'): 2,
+    ('task_stats', 'GET'): 4,  # user, status counters, past-day overdue counters, today's overdue
+    ('task_changes', 'GET'): 3,  # user, changed tasks, tombstones (latest tombstone ID on a first sync)
+    ('task_detail', 'GET'): 2,
+    ('task_detail', 'PUT'): 3,  # user, UPDATE ... RETURNING (+ existence check when If-Match fails)
+    ('task_detail', 'DELETE'): 3,  # user, DELETE (+ existence check when If-Match fails)
+    ('async_task_list', 'GET'): 3,
+    ('async_task_list', 'POST'): 2,
+    ('async_task_detail', 'GET'): 2,
+    ('async_task_detail', 'PUT'): 3,
+    ('async_task_detail', 'DELETE'): 3,
+    ('metrics', 'GET'): 0,
+}
+
+_recorder = ContextVar('tasks_query_recorder', default=None)
+
+# Transaction control differs between autocommit (BEGIN) and test transactions
+# (SAVEPOINT/RELEASE), so it is not counted against budgets
+_TRANSACTION_CONTROL = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Reduce a statement to its shape, normalizing literals and IN lists."""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql.replace('%s', '?'))
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request runs more statements than its budget, or repeats one shape too often."""
+
+
+class QueryRecorder:
+    """
+    Context manager recording the SQL run by the current context, in any thread it spawns.
+
+    Statements are captured by ``record_query``, installed on every connection, so
+    queries run by async views through ``sync_to_async`` are included.
+    """
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        self._token = _recorder.set(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _recorder.reset(self._token)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, max_repeats):
+        """Return ``{fingerprint: count}`` for statement shapes run more than ``max_repeats`` times."""
+        shapes = Counter(fingerprint(sql) for sql in self.statements)
+        return {shape: count for shape, count in shapes.items() if count > max_repeats}
+
+    def check(self, budget, max_repeats, label='request'):
+        """Raise QueryBudgetExceeded if the recorded statements break ``budget`` or ``max_repeats``."""
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{label} ran {self.count} queries, budget is {budget}")
+        for shape, count in self.repeated(max_repeats).items():
+            problems.append(f"{label} repeated a statement {count} times (N+1?): {shape}")
+        if problems:
+            listing = '\n'.join(f"  {index}. {sql}" for index, sql in enumerate(self.statements, 1))
+            raise QueryBudgetExceeded('\n'.join(problems) + f"\nQueries:\n{listing}")
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding the statement to the active QueryRecorder, if any."""
+    recorder = _recorder.get()
+    if recorder is not None and not sql.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+        recorder.statements.append(sql)
+    return execute(sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver adding ``record_query`` to each new DB connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def budget_for(view_name, method):
+    """Return the declared budget of an endpoint, or None when it has none."""
+    return ENDPOINT_QUERY_BUDGETS.get((view_name, method))
@@ -0,0 +1,36 @@
+from rest_framework.renderers import JSONRenderer
+import json
+
+try:
+    import orjson
+except ImportError:  # Optional dependency; the stdlib encoder is used instead
+    orjson = None
+
+# Hand datetimes and dataclasses back as unsupported, so they fall back to DRF's formatting
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), allow_nan=False).encode
+
+
+class TaskJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer for already-primitive payloads such as task list pages, using orjson when installed.
+
+    Produces the same bytes as DRF's compact, UTF-8 JSONRenderer output. Anything the
+    fast encoders cannot handle verbatim, and indented responses, fall back to DRF.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or self.ensure_ascii or not self.compact or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, option=ORJSON_OPTIONS) if orjson else _encode(data).encode()
+        except (TypeError, ValueError):
+            # Lazy translations, Decimals, datetimes and the like
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escape U+2028/U+2029 like JSONRenderer, so the output stays a strict JavaScript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
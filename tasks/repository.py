@@ -1,43 +1,312 @@
-from .models import Task
-from django.db.models import QuerySet
-from typing import Optional
+from .models import Task, TaskCounter, TaskTombstone
+from .config import AppConfig
+from .cache import invalidate_task_lists, invalidation_batch, task_list_namespace
+from .decorators import time_layer
+from .stats import counters_available, open_due_prefix, priority_prefix
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.db.models import Count, Exists, Max, OuterRef, Q, QuerySet, Sum
+from django.db.models.sql import UpdateQuery
+from django.utils.timezone import now
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence, Tuple
 
+# Backends whose UPDATE accepts a RETURNING clause (SQLite from 3.35)
+UPDATE_RETURNING_VENDORS = {'sqlite', 'postgresql'}
 
+
+def supports_update_returning(using: str) -> bool:
+    """Return whether the ``using`` database can return rows from an UPDATE."""
+    connection = connections[using]
+    return connection.vendor in UPDATE_RETURNING_VENDORS and connection.features.can_return_columns_from_insert
+
+
+def update_returning(tasks: QuerySet, values: dict) -> Optional[Task]:
+    """Apply ``tasks.update(**values)`` as one ``UPDATE ... RETURNING``; return the first updated task, if any."""
+    query = tasks.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    compiler = query.get_compiler(tasks.db)
+    compiler.pre_sql_setup()
+    sql, params = compiler.as_sql()
+    fields = Task._meta.concrete_fields
+    columns = ', '.join(compiler.connection.ops.quote_name(field.column) for field in fields)
+    with compiler.connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {columns}", params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    converters = compiler.get_converters([field.get_col(Task._meta.db_table) for field in fields])
+    if converters:
+        row = next(compiler.apply_converters([row], converters))
+    return Task.from_db(tasks.db, [field.attname for field in fields], row)
+
+
+@time_layer('repository')
 class TaskRepository:
-    """Repository for interacting with the Task model."""
+    """Repository for interacting with the Task model, scoped to the tasks of one owner."""
+
+    @staticmethod
+    def _owned(owner) -> QuerySet:
+        """All tasks of ``owner``; every owner-scoped query starts here."""
+        # By primary key, so token-backed users (auth_trust_token_claims) work as owners too
+        return Task.objects.filter(owner_id=owner.pk)
+
+    @staticmethod
+    def _only(tasks: QuerySet, fields: Optional[Sequence[str]]) -> QuerySet:
+        """Defer every column but ``fields`` and ``updated_at`` (the ETag); all of them if None."""
+        return tasks if fields is None else tasks.only(*fields, 'updated_at')
 
     @staticmethod
-    def create_task(**kwargs) -> Task:
-        """Create a new Task instance."""
-        return Task.objects.create(**kwargs)
+    def _invalidate(owner) -> None:
+        """Invalidate the owner's cached task lists, for writes that send no model signals."""
+        invalidate_task_lists(task_list_namespace(owner.pk))
 
     @staticmethod
-    def get_all_tasks() -> QuerySet:
-        """Retrieve all tasks."""
-        return Task.objects.all()
+    def create_task(owner, **kwargs) -> Task:
+        """Create a new Task instance owned by ``owner``."""
+        return Task.objects.create(owner_id=owner.pk, **kwargs)
 
     @staticmethod
-    def get_task_by_id(task_id: int) -> Optional[Task]:
-        """Retrieve a task by its ID."""
+    def get_all_tasks(owner) -> QuerySet:
+        """Retrieve all tasks of ``owner``."""
+        return TaskRepository._owned(owner)
+
+    @staticmethod
+    def get_task_by_id(owner, task_id: int, fields: Sequence[str] = None) -> Optional[Task]:
+        """Retrieve one of the owner's tasks by its ID, loading only ``fields`` (plus its version) if given."""
         try:
-            return Task.objects.get(id=task_id)
+            return TaskRepository._only(TaskRepository._owned(owner), fields).get(id=task_id)
         except Task.DoesNotExist:
             return None
 
     @staticmethod
-    def get_filtered_tasks(**filters) -> QuerySet:
-        """Retrieve tasks based on filters."""
-        return Task.objects.filter(**filters)
+    def get_task_version(owner, task_id: int) -> Optional[datetime]:
+        """Retrieve only a task's ``updated_at``, or None if the owner has no such task."""
+        return TaskRepository._owned(owner).filter(id=task_id).values_list('updated_at', flat=True).first()
+
+    @staticmethod
+    def get_tasks_version(tasks: QuerySet) -> Tuple[Optional[datetime], int]:
+        """Return ``(max(updated_at), count)`` for a queryset in one aggregate query."""
+        version = tasks.order_by().aggregate(last_updated=Max('updated_at'), count=Count('id'))
+        return version['last_updated'], version['count']
+
+    @staticmethod
+    def count_tasks(tasks: QuerySet, limit: int = None) -> int:
+        """Count the tasks in a queryset, stopping at ``limit`` rows when given."""
+        tasks = tasks.order_by()
+        return (tasks[:limit] if limit is not None else tasks).count()
+
+    @staticmethod
+    def get_filtered_tasks(owner, **filters) -> QuerySet:
+        """Retrieve the owner's tasks based on filters."""
+        return TaskRepository._owned(owner).filter(**filters)
 
     @staticmethod
-    def update_task(task: Task, **kwargs) -> Task:
-        """Update an existing task."""
-        for field, value in kwargs.items():
-            setattr(task, field, value)
-        task.save()
+    def task_exists(owner, task_id: int) -> bool:
+        """Return whether the owner has a task with this ID, without loading it."""
+        return TaskRepository._owned(owner).filter(id=task_id).exists()
+
+    @staticmethod
+    def _matching(owner, task_id: int, versions: Optional[Sequence[datetime]]) -> QuerySet:
+        """The owner's task, restricted to the given ``updated_at`` values when ``versions`` is not None."""
+        tasks = TaskRepository._owned(owner).filter(id=task_id)
+        if versions is not None:
+            tasks = tasks.filter(updated_at__in=versions)
+        return tasks
+
+    @staticmethod
+    def update_task(owner, task_id: int, data: dict, versions: Optional[Sequence[datetime]] = None) -> Optional[Task]:
+        """
+        Write only the fields in ``data`` and return the updated task, or None if no row matched.
+
+        With ``versions``, the row is only written while its ``updated_at`` is one of them.
+        One ``UPDATE ... RETURNING`` where supported; ``save()`` and its full_clean() are
+        bypassed, so callers validate ``data`` first.
+        """
+        tasks = TaskRepository._matching(owner, task_id, versions)
+        values = {**data, 'updated_at': now()}
+        if supports_update_returning(tasks.db):
+            task = update_returning(tasks, values)
+        else:
+            with transaction.atomic(using=tasks.db):
+                task = TaskRepository._owned(owner).get(id=task_id) if tasks.update(**values) else None
+        if task is not None:
+            # Queryset updates send no post_save signal
+            TaskRepository._invalidate(owner)
         return task
 
     @staticmethod
-    def delete_task(task: Task) -> None:
-        """Delete an existing task."""
-        task.delete()
+    def delete_task(owner, task_id: int, versions: Optional[Sequence[datetime]] = None) -> int:
+        """Delete a task (only while its ``updated_at`` is in ``versions``, if given); return the rows deleted."""
+        tasks = TaskRepository._matching(owner, task_id, versions)
+        if Task._meta.related_objects:
+            # Something references tasks: let the collector cascade
+            deleted, _ = tasks.delete()
+            return deleted
+        # Nothing to cascade, so skip the collector's SELECT and delete in one statement
+        deleted = tasks._raw_delete(tasks.db)
+        if deleted:
+            # Raw deletes send no post_delete signal
+            TaskRepository._invalidate(owner)
+        return deleted
+
+    @staticmethod
+    def get_tasks_changed_since(owner, position: Optional[Tuple[datetime, int]], until: datetime) -> QuerySet:
+        """
+        The owner's tasks written after ``position`` (``(updated_at, id)``; all of them if
+        None) and no later than ``until``, in write order.
+        """
+        tasks = TaskRepository._owned(owner).filter(updated_at__lte=until)
+        if position is not None:
+            updated_at, task_id = position
+            tasks = tasks.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=task_id))
+        return tasks.order_by('updated_at', 'id')
+
+    @staticmethod
+    def get_tombstones_since(owner, tombstone_id: int, limit: int) -> list:
+        """
+        Up to ``limit`` ``(tombstone_id, task_id)`` pairs of the owner's deletes after ``tombstone_id``.
+
+        Tasks moved away and back again are the owner's, so their tombstones are skipped.
+        """
+        tombstones = TaskTombstone.objects.filter(owner_id=owner.pk, id__gt=tombstone_id).exclude(
+            Exists(Task.objects.filter(id=OuterRef('task_id'), owner_id=owner.pk))
+        ).order_by('id')
+        return list(tombstones.values_list('id', 'task_id')[:limit])
+
+    @staticmethod
+    def get_last_tombstone_id() -> int:
+        """The newest tombstone ID of any owner, or 0."""
+        return TaskTombstone.objects.aggregate(last=Max('id'))['last'] or 0
+
+    @staticmethod
+    def get_status_counts(owner) -> dict:
+        """Return the owner's ``{(priority, completed): count}`` from the maintained counters, or GROUP BY without them."""
+        if not counters_available():
+            rows = TaskRepository._owned(owner).order_by().values_list('priority', 'completed').annotate(count=Count('id'))
+            return {(priority, completed): count for priority, completed, count in rows}
+        prefix = priority_prefix(owner.pk)
+        # A key range rather than startswith, whose LIKE cannot use the primary key index
+        keys = TaskCounter.objects.filter(key__gte=prefix, key__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        counts = {}
+        for key, count in keys.values_list('key', 'count'):
+            priority, completed = key[len(prefix):].rsplit(':', 1)
+            counts[(priority, completed == '1')] = count
+        return counts
+
+    @staticmethod
+    def get_overdue_count(owner, at: datetime) -> int:
+        """
+        Count the owner's open tasks due before ``at``.
+
+        Past UTC days are summed from their per-day counters; only today's open tasks
+        are counted row by row, through the partial open-tasks index.
+        """
+        tasks = TaskRepository._owned(owner).filter(completed=False)
+        if not counters_available():
+            return tasks.filter(due_date__lt=at).count()
+        day_start = at.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        prefix = open_due_prefix(owner.pk)
+        past_days = TaskCounter.objects.filter(
+            key__gte=prefix, key__lt=f"{prefix}{day_start.date().isoformat()}"
+        ).aggregate(total=Sum('count'))['total'] or 0
+        today = tasks.filter(due_date__gte=day_start, due_date__lt=at).count()
+        return past_days + today
+
+    @staticmethod
+    def bulk_create_tasks(owner, tasks_data: Iterable[dict]) -> list:
+        """Create several tasks owned by ``owner`` with batched INSERTs."""
+        tasks = [Task(owner_id=owner.pk, **data) for data in tasks_data]
+        tasks = Task.objects.bulk_create(tasks, batch_size=AppConfig().bulk_batch_size)
+        # bulk_create() sends no post_save signals
+        TaskRepository._invalidate(owner)
+        return tasks
+
+    @staticmethod
+    def get_tasks_by_ids(owner, task_ids: Iterable[int]) -> dict:
+        """Retrieve several of the owner's tasks in one query, keyed by ID."""
+        return TaskRepository._owned(owner).in_bulk(task_ids)
+
+    @staticmethod
+    def get_existing_task_ids(owner, task_ids: Iterable[int]) -> set:
+        """Return which of the given IDs are tasks of ``owner``, without loading the rows."""
+        return set(TaskRepository._owned(owner).filter(id__in=task_ids).values_list('id', flat=True))
+
+    @staticmethod
+    def bulk_update_tasks(owner, tasks: list, fields: Iterable[str]) -> int:
+        """Write the given fields of several of the owner's tasks with batched UPDATEs."""
+        # bulk_update() bypasses save(), so auto_now has to be applied by hand
+        timestamp = now()
+        for task in tasks:
+            task.updated_at = timestamp
+        fields = sorted(set(fields) | {'updated_at'})
+        updated = Task.objects.bulk_update(tasks, fields, batch_size=AppConfig().bulk_batch_size)
+        # bulk_update() sends no post_save signals
+        TaskRepository._invalidate(owner)
+        return updated
+
+    @staticmethod
+    def delete_tasks(owner, task_ids: Iterable[int]) -> int:
+        """Delete several of the owner's tasks by ID, returning how many were removed."""
+        # Collapse the per-row post_delete invalidations into a single one
+        with invalidation_batch():
+            deleted, _ = TaskRepository._owned(owner).filter(id__in=task_ids).delete()
+        return deleted
+
+    # Async variants built on Django's async ORM, for the ASGI request path
+
+    @staticmethod
+    async def acreate_task(owner, **kwargs) -> Task:
+        """Create a new Task instance owned by ``owner``."""
+        return await Task.objects.acreate(owner_id=owner.pk, **kwargs)
+
+    @staticmethod
+    async def aget_task_by_id(owner, task_id: int, fields: Sequence[str] = None) -> Optional[Task]:
+        """Retrieve one of the owner's tasks by its ID, loading only ``fields`` (plus its version) if given."""
+        try:
+            return await TaskRepository._only(TaskRepository._owned(owner), fields).aget(id=task_id)
+        except Task.DoesNotExist:
+            return None
+
+    @staticmethod
+    async def aget_task_version(owner, task_id: int) -> Optional[datetime]:
+        """Retrieve only a task's ``updated_at``, or None if the owner has no such task."""
+        return await TaskRepository._owned(owner).filter(id=task_id).values_list('updated_at', flat=True).afirst()
+
+    @staticmethod
+    async def aget_tasks_version(tasks: QuerySet) -> Tuple[Optional[datetime], int]:
+        """Return ``(max(updated_at), count)`` for a queryset in one aggregate query."""
+        version = await tasks.order_by().aaggregate(last_updated=Max('updated_at'), count=Count('id'))
+        return version['last_updated'], version['count']
+
+    @staticmethod
+    async def acount_tasks(tasks: QuerySet, limit: int = None) -> int:
+        """Count the tasks in a queryset, stopping at ``limit`` rows when given."""
+        tasks = tasks.order_by()
+        return await (tasks[:limit] if limit is not None else tasks).acount()
+
+    @staticmethod
+    async def aget_status_counts(owner) -> dict:
+        """Async wrapper of ``get_status_counts``."""
+        return await sync_to_async(TaskRepository.get_status_counts)(owner)
+
+    @staticmethod
+    async def afetch_tasks(tasks: QuerySet) -> list:
+        """Evaluate a (sliced) queryset with async iteration."""
+        return [task async for task in tasks]
+
+    @staticmethod
+    async def atask_exists(owner, task_id: int) -> bool:
+        """Return whether the owner has a task with this ID, without loading it."""
+        return await TaskRepository._owned(owner).filter(id=task_id).aexists()
+
+    @staticmethod
+    async def aupdate_task(owner, task_id: int, data: dict,
+                           versions: Optional[Sequence[datetime]] = None) -> Optional[Task]:
+        """Async wrapper of ``update_task``; raw SQL has no async ORM counterpart."""
+        return await sync_to_async(TaskRepository.update_task)(owner, task_id, data, versions)
+
+    @staticmethod
+    async def adelete_task(owner, task_id: int, versions: Optional[Sequence[datetime]] = None) -> int:
+        """Async wrapper of ``delete_task``."""
+        return await sync_to_async(TaskRepository.delete_task)(owner, task_id, versions)
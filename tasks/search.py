@@ -0,0 +1,73 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from tasks.models import Task
+
+FTS_TABLE = 'tasks_task_fts'
+
+# External-content FTS5 index over tasks_task, kept in sync by triggers so every
+# write path (ORM saves, bulk operations, raw SQL) updates it in the same transaction.
+# Migrations install frozen copies of these; tests check the database matches them.
+FTS_CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tasks_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+_fts_available = {}
+
+
+def fts_available(using='default'):
+    """Return whether the FTS5 index exists on the given database (cached per alias)."""
+    if using not in _fts_available:
+        connection = connections[using]
+        _fts_available[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names(include_views=False)
+        )
+    return _fts_available[using]
+
+
+def build_match_expression(text: str) -> str:
+    """Turn free text into an FTS5 query: every term must match, the last one as a prefix."""
+    terms = ['"{}"'.format(term.replace('"', '""')) for term in text.split()]
+    if terms:
+        terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search_tasks(queryset, text: str):
+    """
+    Restrict ``queryset`` to tasks whose title or description match ``text``.
+
+    Uses the FTS5 inverted index with bm25 ranking (title hits weighted above
+    description hits) and falls back to ``icontains`` when the index is unavailable.
+    """
+    match = build_match_expression(text)
+    if not match:
+        return queryset
+    if not fts_available(queryset.db):
+        return queryset.filter(Q(title__icontains=text.strip()) | Q(description__icontains=text.strip()))
+
+    table = Task._meta.db_table
+    matches = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    rank = RawSQL(
+        f"SELECT bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+        f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+        (match,),
+    )
+    return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by('search_rank', 'id')
@@ -1,6 +1,13 @@
 from rest_framework import serializers
+from rest_framework.exceptions import ParseError
 from tasks.models import Task
-from django.utils.timezone import now
+from tasks.config import AppConfig
+from django.db import connections
+from django.db.models import TextField
+from django.db.models.functions import Cast
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now, get_current_timezone, is_naive, make_aware
+from datetime import timezone as dt_timezone
 
 
 class TaskSerializer(serializers.ModelSerializer):
@@ -9,6 +16,13 @@ class TaskSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'due_date', 'completed', 'priority', 'created_at', 'updated_at']
         read_only_fields = ['id', 'created_at', 'updated_at']
 
+    def __init__(self, *args, fields=None, **kwargs):
+        """Serialize only ``fields`` (see ``requested_fields``) when given."""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
     def validate_due_date(self, value):
         """Field-level validation for due_date."""
         if value < now():
@@ -27,3 +41,129 @@ class TaskSerializer(serializers.ModelSerializer):
         if data.get('priority') == 'high' and not data.get('description'):
             raise serializers.ValidationError("High priority tasks must have a description.")
         return data
+
+
+def requested_fields(query_params, param='fields'):
+    """
+    Validate a sparse fieldset such as ``?fields=id,title`` against TaskSerializer's fields.
+
+    Returns the named fields in serializer order, or None (every field) when the
+    parameter is absent. Unknown names raise a 400.
+    """
+    value = query_params.get(param)
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(TaskSerializer.Meta.fields)
+    if unknown or not names:
+        raise ParseError(
+            f"Unknown {param}: {', '.join(sorted(unknown)) or '(none given)'}. "
+            f"Choose from: {', '.join(TaskSerializer.Meta.fields)}."
+        )
+    return [name for name in TaskSerializer.Meta.fields if name in names]
+
+
+def datetime_converter(timezone=None):
+    """
+    Build a function rendering datetimes exactly like TaskSerializer's DateTimeFields.
+
+    The timezone is resolved once, so the converter can be applied to many rows cheaply.
+    """
+    timezone = timezone or get_current_timezone()
+
+    def convert(value):
+        if value is None:
+            return None
+        value = value.astimezone(timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def task_row_converters(fields, timezone=None):
+    """Return one converter per Task field name; non-datetime values pass through unchanged."""
+    to_datetime = datetime_converter(timezone)
+    datetime_fields = {'due_date', 'created_at', 'updated_at'}
+    return [to_datetime if field in datetime_fields else None for field in fields]
+
+
+class TaskRowSerializer:
+    """
+    Read-only fast path of ``TaskSerializer(many=True).data`` over ``values_list()`` rows.
+
+    Only ``fields`` are selected and serialized, when given. Converters are compiled
+    once per instance. On SQLite with a UTC output timezone, datetimes are selected
+    as their stored text and reformatted directly, skipping the datetime parse and
+    ``isoformat()`` round trip.
+    """
+    fields = TaskSerializer.Meta.fields
+    datetime_fields = {'due_date', 'created_at', 'updated_at'}
+
+    def __init__(self, timezone=None, using='default', fields=None):
+        if fields is not None:
+            self.fields = list(fields)
+        self.timezone = timezone or get_current_timezone()
+        self.raw_datetimes = connections[using].vendor == 'sqlite' and (
+            self.timezone is dt_timezone.utc or getattr(self.timezone, 'key', None) in ('UTC', 'Etc/UTC')
+        )
+        to_datetime = datetime_converter(self.timezone)
+        if self.raw_datetimes:
+            to_datetime = self._text_datetime_converter(to_datetime)
+        self.converters = [
+            (index, to_datetime) for index, field in enumerate(self.fields) if field in self.datetime_fields
+        ]
+
+    @property
+    def columns(self):
+        """``values_list()`` arguments producing one row per task in ``fields`` order."""
+        if not self.raw_datetimes:
+            return self.fields
+        return [Cast(field, TextField()) if field in self.datetime_fields else field for field in self.fields]
+
+    def rows(self, queryset):
+        """Return ``queryset`` as lazy rows for ``to_representation``."""
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, rows):
+        """Convert fetched rows to the dicts TaskSerializer would produce, in the same key order."""
+        fields = self.fields
+        converters = self.converters
+        data = []
+        for row in rows:
+            row = list(row)
+            for index, convert in converters:
+                row[index] = convert(row[index])
+            data.append(dict(zip(fields, row)))
+        return data
+
+    @staticmethod
+    def _text_datetime_converter(to_datetime):
+        """
+        Convert SQLite's stored UTC text (``YYYY-MM-DD HH:MM:SS[.ffffff]``) to DRF's ISO 8601 form.
+
+        Values in any other shape are parsed and converted the regular way.
+        """
+        def convert(value):
+            if value is None:
+                return None
+            if len(value) in (19, 26) and value[10] == ' ':
+                return f"{value[:10]}T{value[11:]}Z"
+            value = parse_datetime(value)
+            return to_datetime(make_aware(value, dt_timezone.utc) if is_naive(value) else value)
+        return convert
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    """Validates the ID list of a bulk delete request."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=AppConfig().bulk_max_items,
+    )
+
+    def validate_ids(self, value):
+        """Reject duplicate IDs so per-item errors stay unambiguous."""
+        if len(set(value)) != len(value):
+            raise serializers.ValidationError("Task IDs must be unique.")
+        return value
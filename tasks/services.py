@@ -1,8 +1,9 @@
 from .repository import TaskRepository
-from .decorators import log_method_call, handle_exceptions
+from .decorators import log_method_call, handle_exceptions, time_layer
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from .models import Task
-from typing import Optional
+from typing import Optional, Tuple
 from django.utils.timezone import now
 from tasks.config import AppConfig
 from django.utils.dateparse import parse_datetime
@@ -10,17 +11,21 @@ import logging
 
 logger = logging.getLogger('tasks')
 
+# TaskFilter filters whose matches the status counters can count
+STATUS_FILTERS = {'completed', 'priority'}
+
+
+class TaskConflict(Exception):
+    """Raised when a conditional write's expected versions no longer match the task."""
+
+
+@time_layer('service')
 class TaskService:
     """Service layer for handling business logic related to tasks."""
 
     @staticmethod
-    @log_method_call
-    @handle_exceptions
-    def create_task(data: dict) -> Task:
-        """Create a new task with business logic validation."""
-        logger.info(f"Creating task with data: {data}")
-        due_date = data.get('due_date')
-
+    def _validate_due_date(due_date):
+        """Parse an ISO-8601 due_date if needed and ensure it is not in the past."""
         # Check if due_date is already a datetime object
         if isinstance(due_date, str):
             due_date = parse_datetime(due_date)
@@ -29,104 +34,332 @@ class TaskService:
                 raise ValidationError("Invalid due_date format. Must be ISO-8601 compliant.")
 
         # Validate that due_date is not in the past
-        if due_date < now():
+        if due_date is None or due_date < now():
             logger.error("The due date cannot be in the past.")
             raise ValidationError("The due date cannot be in the past.")
+        return due_date
 
-        data['due_date'] = due_date  # Ensure the data contains a valid datetime object
-        task = TaskRepository.create_task(**data)
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def create_task(owner, data: dict) -> Task:
+        """Create a new task for ``owner`` with business logic validation."""
+        logger.info(f"Creating task with data: {data}")
+        data['due_date'] = TaskService._validate_due_date(data.get('due_date'))
+        task = TaskRepository.create_task(owner, **data)
         logger.info(f"Task created successfully: {task.title}")
         return task
 
     @staticmethod
     @log_method_call
     @handle_exceptions
-    def update_task(task_id: int, data: dict) -> Optional[Task]:
-        """Update an existing task with business logic validation."""
+    def update_task(owner, task_id: int, data: dict, versions=None) -> Optional[Task]:
+        """
+        Update one of the owner's tasks with business logic validation.
+
+        ``versions`` (from ``If-Match``) makes the write conditional on the task's
+        ``updated_at``; TaskConflict is raised when it has changed since.
+        """
         logger.info(f"Updating task {task_id} with data: {data}")
-        task = TaskRepository.get_task_by_id(task_id)
-        if not task:
+        # Parse and validate due_date when it is being changed
+        if 'due_date' in data:
+            data['due_date'] = TaskService._validate_due_date(data['due_date'])
+
+        # An empty version list can never match, so skip the write
+        updated_task = TaskRepository.update_task(owner, task_id, data, versions) if versions != [] else None
+        if not updated_task:
+            TaskService._check_conflict(owner, task_id, versions)
             logger.warning(f"Task {task_id} not found for update.")
             return None
+        logger.info(f"Task {task_id} updated successfully.")
+        return updated_task
 
-        # Parse and validate due_date
-        due_date = data.get('due_date')
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def delete_task(owner, task_id: int, versions=None) -> bool:
+        """Delete one of the owner's tasks, conditionally on its ``updated_at`` when ``versions`` is given."""
+        logger.info(f"Deleting task with ID {task_id}")
+        deleted = TaskRepository.delete_task(owner, task_id, versions) if versions != [] else 0
+        if not deleted:
+            TaskService._check_conflict(owner, task_id, versions)
+            logger.warning(f"Task {task_id} not found for deletion.")
+            return False
+        logger.info(f"Task {task_id} deleted successfully.")
+        return True
 
-        # Check if due_date is already a datetime object
-        if isinstance(due_date, str):
-            due_date = parse_datetime(due_date)
-            if not due_date:
-                logger.error("Invalid due_date format. Must be ISO-8601 compliant.")
-                raise ValidationError("Invalid due_date format. Must be ISO-8601 compliant.")
+    @staticmethod
+    def _check_conflict(owner, task_id, versions):
+        """After a conditional write matched nothing, raise TaskConflict if the task still exists."""
+        if versions is not None and TaskRepository.task_exists(owner, task_id):
+            logger.warning(f"Task {task_id} changed since versions {versions}; write rejected.")
+            raise TaskConflict(f"Task {task_id} was modified by another request.")
 
-        # Validate that due_date is not in the past
-        if due_date < now():
-            logger.error("The due date cannot be in the past.")
-            raise ValidationError("The due date cannot be in the past.")
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def get_task_by_id(owner, task_id: int, fields=None) -> Optional[Task]:
+        """Retrieve one of the owner's tasks by ID, optionally only some of its fields."""
+        logger.info(f"Fetching task with ID {task_id}")
+        task = TaskRepository.get_task_by_id(owner, task_id, fields)
+        if not task:
+            logger.warning(f"Task {task_id} not found.")
+        return task
+
+    @staticmethod
+    @handle_exceptions
+    def get_task_version(owner, task_id: int):
+        """Retrieve a task's ``updated_at`` without loading the row."""
+        return TaskRepository.get_task_version(owner, task_id)
+
+    @staticmethod
+    @handle_exceptions
+    def get_tasks_version(tasks):
+        """Retrieve ``(max(updated_at), count)`` for a filtered task queryset."""
+        return TaskRepository.get_tasks_version(tasks)
+
+    @staticmethod
+    @handle_exceptions
+    def estimate_task_count(owner, tasks, filters: dict) -> Tuple[int, bool]:
+        """
+        Return ``(count, exact)`` for a filtered task queryset without counting every row.
+
+        Filters on ``completed`` and ``priority`` alone are answered exactly from the
+        status counters. Anything else is counted up to ``count_estimate_cap`` rows,
+        which is then a lower bound.
+        """
+        if filters.keys() <= STATUS_FILTERS:
+            return TaskService._sum_status_counts(TaskRepository.get_status_counts(owner), filters), True
+        cap = AppConfig().count_estimate_cap
+        count = TaskRepository.count_tasks(tasks, limit=cap)
+        return count, count < cap
+
+    @staticmethod
+    def _sum_status_counts(counts: dict, filters: dict) -> int:
+        """Sum the ``{(priority, completed): count}`` entries matching the status filters."""
+        return sum(
+            count for (priority, completed), count in counts.items()
+            if filters.get('priority', priority) == priority and filters.get('completed', completed) == completed
+        )
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def get_all_tasks(owner) -> list:
+        """Retrieve all tasks of ``owner``."""
+        logger.info(f"Fetching all tasks of {owner}")
+        return TaskRepository.get_all_tasks(owner)
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def get_filtered_tasks(owner, filters: dict) -> list:
+        """Retrieve the owner's tasks based on filters."""
+        logger.info(f"Fetching tasks with filters: {filters}")
+        return TaskRepository.get_filtered_tasks(owner, **filters)
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def get_task_stats(owner) -> dict:
+        """The owner's task counts by priority and completion plus the overdue count, from maintained counters."""
+        logger.info(f"Fetching task stats of {owner}")
+        counts = TaskRepository.get_status_counts(owner)
+        by_priority = {}
+        for priority, _ in Task.PRIORITY_CHOICES:
+            completed, open_ = counts.get((priority, True), 0), counts.get((priority, False), 0)
+            by_priority[priority] = {'total': completed + open_, 'completed': completed, 'open': open_}
+        completed = sum(counts['completed'] for counts in by_priority.values())
+        open_ = sum(counts['open'] for counts in by_priority.values())
+        return {
+            'total': completed + open_,
+            'completed': completed,
+            'open': open_,
+            'overdue': TaskRepository.get_overdue_count(owner, now()),
+            'by_priority': by_priority,
+        }
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def get_task_changes(owner, position, tombstone_id, until, limit: int) -> dict:
+        """
+        One delta-sync batch: up to ``limit`` tasks written after ``position`` and up to
+        ``limit`` deletes after ``tombstone_id``.
+
+        Returns the ``changed`` tasks as a lazy queryset (one look-ahead row included),
+        the ``deleted`` ``(tombstone_id, task_id)`` pairs (also with a look-ahead) and the
+        ``tombstone_id`` to resume from. A first sync (``tombstone_id`` None) lists every
+        task and starts the deletes at the newest tombstone.
+        """
+        logger.info(f"Fetching task changes of {owner} since {position}, tombstone {tombstone_id}")
+        changed = TaskRepository.get_tasks_changed_since(owner, position, until)[:limit + 1]
+        if tombstone_id is None:
+            return {'changed': changed, 'deleted': [], 'tombstone_id': TaskRepository.get_last_tombstone_id()}
+        deleted = TaskRepository.get_tombstones_since(owner, tombstone_id, limit + 1)
+        return {'changed': changed, 'deleted': deleted, 'tombstone_id': tombstone_id}
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def bulk_create_tasks(owner, items: list) -> list:
+        """Create several validated tasks for ``owner`` in a single transaction."""
+        logger.info(f"Bulk creating {len(items)} tasks")
+        with transaction.atomic():
+            tasks = TaskRepository.bulk_create_tasks(owner, items)
+        logger.info(f"Bulk created {len(tasks)} tasks.")
+        return tasks
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def bulk_update_tasks(owner, updates: list) -> Tuple[list, list]:
+        """
+        Apply ``(task_id, data)`` updates to the owner's tasks in a single transaction.
+
+        Returns ``(updated_tasks, missing_ids)``; nothing is written if any task is missing
+        (tasks of other owners count as missing).
+        """
+        logger.info(f"Bulk updating {len(updates)} tasks")
+        with transaction.atomic():
+            tasks = TaskRepository.get_tasks_by_ids(owner, [task_id for task_id, _ in updates])
+            missing_ids = [task_id for task_id, _ in updates if task_id not in tasks]
+            if missing_ids:
+                logger.warning(f"Tasks {missing_ids} not found for bulk update.")
+                return [], missing_ids
 
-        # Update the parsed datetime in the data dictionary
-        data['due_date'] = due_date
+            fields = set()
+            for task_id, data in updates:
+                for field, value in data.items():
+                    setattr(tasks[task_id], field, value)
+                fields.update(data)
+            updated_tasks = [tasks[task_id] for task_id, _ in updates]
+            TaskRepository.bulk_update_tasks(owner, updated_tasks, fields)
+        logger.info(f"Bulk updated {len(updated_tasks)} tasks.")
+        return updated_tasks, []
 
-        # Delegate to the repository to update the task
-        updated_task = TaskRepository.update_task(task, **data)
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    def bulk_delete_tasks(owner, task_ids: list) -> Tuple[int, list]:
+        """
+        Delete several of the owner's tasks in a single transaction.
+
+        Returns ``(deleted_count, missing_ids)``; nothing is deleted if any task is missing.
+        """
+        logger.info(f"Bulk deleting tasks {task_ids}")
+        with transaction.atomic():
+            existing = TaskRepository.get_existing_task_ids(owner, task_ids)
+            missing_ids = [task_id for task_id in task_ids if task_id not in existing]
+            if missing_ids:
+                logger.warning(f"Tasks {missing_ids} not found for bulk deletion.")
+                return 0, missing_ids
+            deleted = TaskRepository.delete_tasks(owner, task_ids)
+        logger.info(f"Bulk deleted {deleted} tasks.")
+        return deleted, []
+
+    # Async variants for the ASGI request path
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    async def acreate_task(owner, data: dict) -> Task:
+        """Create a new task for ``owner`` with business logic validation."""
+        logger.info(f"Creating task with data: {data}")
+        data['due_date'] = TaskService._validate_due_date(data.get('due_date'))
+        task = await TaskRepository.acreate_task(owner, **data)
+        logger.info(f"Task created successfully: {task.title}")
+        return task
+
+    @staticmethod
+    @log_method_call
+    @handle_exceptions
+    async def aupdate_task(owner, task_id: int, data: dict, versions=None) -> Optional[Task]:
+        """Update one of the owner's tasks with business logic validation, conditionally on ``versions``."""
+        logger.info(f"Updating task {task_id} with data: {data}")
+        if 'due_date' in data:
+            data['due_date'] = TaskService._validate_due_date(data['due_date'])
+
+        updated_task = await TaskRepository.aupdate_task(owner, task_id, data, versions) if versions != [] else None
+        if not updated_task:
+            if versions is not None and await TaskRepository.atask_exists(owner, task_id):
+                logger.warning(f"Task {task_id} changed since versions {versions}; write rejected.")
+                raise TaskConflict(f"Task {task_id} was modified by another request.")
+            logger.warning(f"Task {task_id} not found for update.")
+            return None
         logger.info(f"Task {task_id} updated successfully.")
         return updated_task
 
     @staticmethod
     @log_method_call
     @handle_exceptions
-    def delete_task(task_id: int) -> bool:
-        """Delete a task."""
+    async def adelete_task(owner, task_id: int, versions=None) -> bool:
+        """Delete one of the owner's tasks, conditionally on its ``updated_at`` when ``versions`` is given."""
         logger.info(f"Deleting task with ID {task_id}")
-        task = TaskRepository.get_task_by_id(task_id)
-        if not task:
+        deleted = await TaskRepository.adelete_task(owner, task_id, versions) if versions != [] else 0
+        if not deleted:
+            if versions is not None and await TaskRepository.atask_exists(owner, task_id):
+                logger.warning(f"Task {task_id} changed since versions {versions}; write rejected.")
+                raise TaskConflict(f"Task {task_id} was modified by another request.")
             logger.warning(f"Task {task_id} not found for deletion.")
             return False
-
-        TaskRepository.delete_task(task)
         logger.info(f"Task {task_id} deleted successfully.")
         return True
 
     @staticmethod
     @log_method_call
     @handle_exceptions
-    def get_task_by_id(task_id: int) -> Optional[Task]:
-        """Retrieve a task by ID."""
+    async def aget_task_by_id(owner, task_id: int, fields=None) -> Optional[Task]:
+        """Retrieve one of the owner's tasks by ID, optionally only some of its fields."""
         logger.info(f"Fetching task with ID {task_id}")
-        task = TaskRepository.get_task_by_id(task_id)
+        task = await TaskRepository.aget_task_by_id(owner, task_id, fields)
         if not task:
             logger.warning(f"Task {task_id} not found.")
         return task
 
     @staticmethod
-    @log_method_call
     @handle_exceptions
-    def get_all_tasks() -> list:
-        """Retrieve all tasks."""
-        logger.info("Fetching all tasks")
-        tasks = TaskRepository.get_all_tasks()
-        logger.debug(f"Total tasks retrieved: {len(tasks)}")
-        return tasks
+    async def aget_task_version(owner, task_id: int):
+        """Retrieve a task's ``updated_at`` without loading the row."""
+        return await TaskRepository.aget_task_version(owner, task_id)
 
     @staticmethod
-    @log_method_call
     @handle_exceptions
-    def get_filtered_tasks(filters: dict) -> list:
-        """Retrieve tasks based on filters."""
-        logger.info(f"Fetching tasks with filters: {filters}")
-        tasks = TaskRepository.get_filtered_tasks(**filters)
-        logger.debug(f"Total tasks retrieved after filtering: {len(tasks)}")
-        return tasks
+    async def aget_tasks_version(tasks):
+        """Retrieve ``(max(updated_at), count)`` for a filtered task queryset."""
+        return await TaskRepository.aget_tasks_version(tasks)
+
+    @staticmethod
+    @handle_exceptions
+    async def acount_tasks(tasks) -> int:
+        """Count a filtered task queryset."""
+        return await TaskRepository.acount_tasks(tasks)
+
+    @staticmethod
+    @handle_exceptions
+    async def aestimate_task_count(owner, tasks, filters: dict) -> Tuple[int, bool]:
+        """Async variant of ``estimate_task_count``."""
+        if filters.keys() <= STATUS_FILTERS:
+            return TaskService._sum_status_counts(await TaskRepository.aget_status_counts(owner), filters), True
+        cap = AppConfig().count_estimate_cap
+        count = await TaskRepository.acount_tasks(tasks, limit=cap)
+        return count, count < cap
+
+    @staticmethod
+    @handle_exceptions
+    async def afetch_tasks(tasks) -> list:
+        """Load one page of a filtered, sorted task queryset."""
+        return await TaskRepository.afetch_tasks(tasks)
 
     @staticmethod
-    def get_paginated_tasks(page: int):
-        """Retrieve paginated tasks."""
+    def get_paginated_tasks(owner, page: int):
+        """Retrieve a page of the owner's tasks."""
         logger.info(f"Fetching paginated tasks for page {page}")
         config = AppConfig()
         page_size = config.default_pagination_size
 
         # Simulated pagination logic (for demonstration purposes)
-        tasks = TaskRepository.get_all_tasks()
+        tasks = TaskRepository.get_all_tasks(owner)
         start = (page - 1) * page_size
         end = start + page_size
         paginated_tasks = tasks[start:end]
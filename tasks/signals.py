@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+from tasks.authentication import forget_user
+from tasks.cache import invalidate_task_lists, task_list_namespace
+from tasks.metrics import install_query_timer
+from tasks.models import Task
+from tasks.query_budget import install_query_recorder
+
+# Time every query on every database connection for the metrics endpoint, and
+# let QueryRecorder (query budgets in tests and the dev middleware) see them
+connection_created.connect(install_query_timer)
+connection_created.connect(install_query_recorder)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_list_cache(sender, instance, **kwargs):
+    """Invalidate the owner's cached task lists whenever a task is saved or deleted, from any code path."""
+    invalidate_task_lists(task_list_namespace(instance.owner_id))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_cached_user(sender, instance, **kwargs):
+    """Evict a changed, deactivated or deleted user from the authentication caches."""
+    forget_user(getattr(instance, api_settings.USER_ID_FIELD))
@@ -0,0 +1,98 @@
+from django.db import connections, transaction
+from tasks.models import Task, TaskCounter
+
+COUNTER_TABLE = TaskCounter._meta.db_table
+TASK_TABLE = Task._meta.db_table
+
+# Unowned tasks are counted under this owner ID
+NO_OWNER = 0
+
+
+def priority_prefix(owner_id) -> str:
+    """Key prefix of an owner's ``<owner>:priority:<priority>:<0|1>`` counters."""
+    return f"{owner_id if owner_id is not None else NO_OWNER}:priority:"
+
+
+def open_due_prefix(owner_id) -> str:
+    """Key prefix of an owner's ``<owner>:open_due:<YYYY-MM-DD>`` counters."""
+    return f"{owner_id if owner_id is not None else NO_OWNER}:open_due:"
+
+
+# Counter keys of a row, as SQL over a trigger's old/new row or over tasks_task itself.
+# due_date is stored as UTC text, so its first 10 characters are the UTC due day.
+_OWNER = "coalesce({row}owner_id, " + str(NO_OWNER) + ")"
+_PRIORITY_KEY = _OWNER + " || ':priority:' || {row}priority || ':' || {row}completed"
+_OPEN_DUE_KEY = _OWNER + " || ':open_due:' || substr({row}due_date, 1, 10)"
+
+
+def _add(key_sql, delta, condition='1'):
+    """Upsert adding ``delta`` to the counter at ``key_sql`` when ``condition`` holds."""
+    return (
+        f'INSERT INTO {COUNTER_TABLE}("key", "count") SELECT {key_sql}, {delta} WHERE {condition} '
+        f'ON CONFLICT("key") DO UPDATE SET "count" = "count" + excluded."count";'
+    )
+
+
+def _count_row(row, delta):
+    """Statements counting (``delta`` = 1) or uncounting (-1) the trigger row ``row``."""
+    prefix = f'{row}.'
+    return (
+        _add(_PRIORITY_KEY.format(row=prefix), delta)
+        + _add(_OPEN_DUE_KEY.format(row=prefix), delta, condition=f'NOT {prefix}completed')
+    )
+
+
+# Triggers keep the counters in the writing transaction, so every write path
+# (ORM saves, queryset updates, raw deletes, bulk operations) is counted.
+# Migrations install frozen copies of these; tests check the database matches them.
+COUNTER_CREATE_STATEMENTS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {COUNTER_TABLE}_ai AFTER INSERT ON {TASK_TABLE} BEGIN
+        {_count_row('new', 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {COUNTER_TABLE}_ad AFTER DELETE ON {TASK_TABLE} BEGIN
+        {_count_row('old', -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {COUNTER_TABLE}_au
+    AFTER UPDATE OF owner_id, priority, completed, due_date ON {TASK_TABLE}
+    WHEN old.owner_id IS NOT new.owner_id OR old.priority IS NOT new.priority
+        OR old.completed IS NOT new.completed OR substr(old.due_date, 1, 10) IS NOT substr(new.due_date, 1, 10)
+    BEGIN
+        {_count_row('old', -1)}
+        {_count_row('new', 1)}
+    END""",
+]
+
+# Recount from scratch with the same key expressions the triggers use
+COUNTER_REBUILD_STATEMENTS = [
+    f"DELETE FROM {COUNTER_TABLE}",
+    f"""INSERT INTO {COUNTER_TABLE}("key", "count")
+        SELECT {_PRIORITY_KEY.format(row='')}, COUNT(*) FROM {TASK_TABLE} GROUP BY owner_id, priority, completed""",
+    f"""INSERT INTO {COUNTER_TABLE}("key", "count")
+        SELECT {_OPEN_DUE_KEY.format(row='')}, COUNT(*) FROM {TASK_TABLE}
+        WHERE NOT completed GROUP BY owner_id, substr(due_date, 1, 10)""",
+]
+
+
+def counters_available(using='default') -> bool:
+    """Return whether the trigger-maintained counters exist on the given database."""
+    return connections[using].vendor == 'sqlite'
+
+
+def rebuild_counters(using='default') -> dict:
+    """
+    Recount every counter from tasks_task and return the drift that was fixed, as ``{key: (was, now)}``.
+
+    The recount runs in one transaction, so writes committed meanwhile are not lost;
+    they may still show up in the drift report, which is read before the transaction.
+    """
+    before = dict(TaskCounter.objects.using(using).values_list('key', 'count'))
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            for statement in COUNTER_REBUILD_STATEMENTS:
+                cursor.execute(statement)
+    after = dict(TaskCounter.objects.using(using).values_list('key', 'count'))
+    return {
+        key: (before.get(key, 0), after.get(key, 0))
+        for key in before.keys() | after.keys()
+        if before.get(key, 0) != after.get(key, 0)
+    }
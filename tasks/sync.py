@@ -0,0 +1,37 @@
+from django.db import connections
+from tasks.models import Task, TaskTombstone
+
+TOMBSTONE_TABLE = TaskTombstone._meta.db_table
+TASK_TABLE = Task._meta.db_table
+
+# A trigger rather than code in the delete paths, so raw deletes, collector
+# cascades (including a user's deletion) and the admin all leave tombstones.
+# Unowned tasks are never synced, so they leave none. A task moved to another owner
+# (in the admin) is a delete for the previous one; the new owner gets it as a change,
+# since the save bumps updated_at. Migrations install frozen copies of these; tests
+# check the database matches them.
+TOMBSTONE_CREATE_STATEMENTS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {TOMBSTONE_TABLE}_ad AFTER DELETE ON {TASK_TABLE}
+    WHEN old.owner_id IS NOT NULL
+    BEGIN
+        INSERT INTO {TOMBSTONE_TABLE} (task_id, owner_id, deleted_at)
+        VALUES (old.id, old.owner_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {TOMBSTONE_TABLE}_au AFTER UPDATE OF owner_id ON {TASK_TABLE}
+    WHEN old.owner_id IS NOT NULL AND old.owner_id IS NOT new.owner_id
+    BEGIN
+        INSERT INTO {TOMBSTONE_TABLE} (task_id, owner_id, deleted_at)
+        VALUES (old.id, old.owner_id, strftime('%Y-%m-%d %H:%M:%f', 'now'));
+    END""",
+]
+
+
+def tombstones_available(using='default') -> bool:
+    """Return whether deletes are recorded as tombstones on the given database."""
+    return connections[using].vendor == 'sqlite'
+
+
+def compact_tombstones(before, using='default') -> int:
+    """Delete the tombstones of tasks deleted before ``before``; return how many were removed."""
+    deleted, _ = TaskTombstone.objects.using(using).filter(deleted_at__lt=before).delete()
+    return deleted
@@ -0,0 +1,16 @@
+from django.test.runner import DiscoverRunner
+
+from tasks.cache_backends import temporary_cache
+
+
+class TaskTestRunner(DiscoverRunner):
+    """The default runner, with the cache on a temporary file instead of the shared ``cache.sqlite3``."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cache = temporary_cache()
+        self._cache.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._cache.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,878 @@
-from django.test import TestCase
+from datetime import timedelta
+import gzip
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from tasks.authentication import clear_user_cache
+from tasks.cache import (
+    CachedResponse, LRUCache, clear_local_cache, get_generation, get_or_compute, peek, task_list_namespace,
+)
+from tasks.cache_backends import SQLiteCache
+from tasks.compression import ENCODERS, encoded_etag, negotiate
+from tasks.config import AppConfig
+from tasks.decorators import LazyRepr
+from tasks.models import Task, TaskCounter, TaskTombstone
+from tasks.query_budget import ENDPOINT_QUERY_BUDGETS, QueryBudgetExceeded, QueryRecorder, budget_for, fingerprint
+from tasks.repository import TaskRepository
+from tasks.search import FTS_CREATE_STATEMENTS, FTS_TABLE, fts_available, search_tasks
+from tasks.stats import COUNTER_CREATE_STATEMENTS, rebuild_counters
+from tasks.sync import TOMBSTONE_CREATE_STATEMENTS, compact_tombstones
+from tasks.views import task_list_cache_key
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Harness for API tests that must stay within their endpoint's declared query budget.
+
+    ``request`` fails the test when a request runs more statements than
+    ``ENDPOINT_QUERY_BUDGETS`` allows or repeats one statement shape more than
+    ``query_budget_max_repeats`` times (a likely N+1).
+    """
+    seed_count = 25
+
+    def setUp(self):
+        cache.clear()
+        clear_local_cache()
+        clear_user_cache()
+        fts_available()  # Cached per process; keep its one-off introspection out of request budgets
+        self.user = User.objects.create_user(username='budget', password='budget-password')
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.api = APIClient()
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.tasks = Task.objects.bulk_create(self.make_task(i) for i in range(self.seed_count))
+
+    def make_task(self, i, **fields):
+        return Task(**{
+            'owner': self.user,
+            'title': f"Task {i}",
+            'description': f"Description {i}",
+            'due_date': now() + timedelta(days=i % 30 + 1),
+            'completed': i % 3 == 0,
+            'priority': ['low', 'medium', 'high'][i % 3],
+            **fields,
+        })
+
+    def request(self, method, url_name, data=None, url_kwargs=None, client=None, **extra):
+        """Send a request and assert the endpoint's budget; returns ``(response, recorder)``."""
+        budget = budget_for(url_name, method)
+        self.assertIsNotNone(budget, f"No query budget declared for {method} {url_name}")
+        client = client or self.api
+        url = reverse(url_name, kwargs=url_kwargs)
+        with QueryRecorder() as recorder:
+            response = getattr(client, method.lower())(url, data, format='json', **extra)
+            if response.streaming:
+                response.getvalue()  # Streamed bodies run their queries while being consumed
+        try:
+            recorder.check(budget, AppConfig().query_budget_max_repeats, label=f"{method} {url_name}")
+        except QueryBudgetExceeded as e:
+            self.fail(str(e))
+        return response, recorder
+
+    async def arequest(self, method, url_name, data=None, url_kwargs=None, **extra):
+        """Async-client variant of ``request`` for the ASGI views."""
+        budget = budget_for(url_name, method)
+        self.assertIsNotNone(budget, f"No query budget declared for {method} {url_name}")
+        url = reverse(url_name, kwargs=url_kwargs)
+        headers = {'Authorization': f'Bearer {self.token}', **extra.pop('headers', {})}
+        with QueryRecorder() as recorder:
+            send = getattr(self.async_client, method.lower())
+            if data is None:
+                response = await send(url, headers=headers, **extra)
+            else:
+                response = await send(url, data, content_type='application/json', headers=headers, **extra)
+        try:
+            recorder.check(budget, AppConfig().query_budget_max_repeats, label=f"{method} {url_name}")
+        except QueryBudgetExceeded as e:
+            self.fail(str(e))
+        return response, recorder
+
+
+class TriggerSchemaTests(TestCase):
+    """The triggers the migrations install (from frozen SQL) match the definitions in the code."""
+
+    def assertInstalled(self, statements):
+        installed = {}
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, sql FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            for name, sql in cursor.fetchall():
+                installed[name] = ' '.join(sql.split())
+        for statement in statements:
+            statement = ' '.join(statement.replace('IF NOT EXISTS ', '').split())
+            name = re.match(r'CREATE (?:VIRTUAL TABLE|TRIGGER) (\w+)', statement).group(1)
+            self.assertEqual(installed.get(name), statement)
+
+    def test_counter_triggers(self):
+        self.assertInstalled(COUNTER_CREATE_STATEMENTS)
+
+    def test_tombstone_triggers(self):
+        self.assertInstalled(TOMBSTONE_CREATE_STATEMENTS)
+
+    def test_fts_index(self):
+        if not fts_available():
+            self.skipTest("SQLite was built without FTS5")
+        self.assertInstalled(FTS_CREATE_STATEMENTS)
+
+
+class QueryRecorderTests(TestCase):
+    def test_fingerprint_normalizes_literals_and_in_lists(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND x = 'a' LIMIT 21"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s) AND x = 'b'  LIMIT 10"),
+        )
+
+    def test_repeated_statement_shapes_are_reported(self):
+        with QueryRecorder() as recorder:
+            for task_id in range(1, 6):
+                list(Task.objects.filter(id=task_id))
+        self.assertEqual(recorder.count, 5)
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'N+1'):
+            recorder.check(budget=10, max_repeats=3)
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'budget is 4'):
+            recorder.check(budget=4, max_repeats=5)
+
+    def test_every_endpoint_has_a_budget(self):
+        from tasks.urls import urlpatterns
+        declared = {name for name, _ in ENDPOINT_QUERY_BUDGETS}
+        self.assertEqual({pattern.name for pattern in urlpatterns} - declared, set())
+
+
+class AuthQueryBudgetTests(QueryBudgetTestCase):
+    def test_token_obtain_and_refresh(self):
+        response, _ = self.request('POST', 'token_obtain_pair', {'username': 'budget', 'password': 'budget-password'})
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.request('POST', 'token_refresh', {'refresh': response.json()['refresh']}, client=APIClient())
+        self.assertEqual(response.status_code, 200)
+
+
+class CacheTierTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shared = SQLiteCache(os.path.join(directory.name, 'cache.sqlite3'), {'OPTIONS': {'MAX_BYTES': 20000}})
+
+    def test_sqlite_backend_operations(self):
+        self.assertTrue(self.shared.add('lock', 'a', timeout=60))
+        self.assertFalse(self.shared.add('lock', 'b', timeout=60))
+        self.shared.set('expired', 'a', timeout=0)
+        self.assertTrue(self.shared.add('expired', 'b', timeout=60))
+        self.assertEqual(self.shared.get('expired'), 'b')
+        self.shared.set('generation', 41, timeout=None)
+        self.assertEqual(self.shared.incr('generation'), 42)
+        with self.assertRaises(ValueError):
+            self.shared.incr('missing')
+        self.assertTrue(self.shared.delete('lock'))
+        self.assertIsNone(self.shared.get('lock'))
+
+    def test_sqlite_backend_culls_by_size(self):
+        self.shared.set('generation', 1, timeout=None)
+        for i in range(30):
+            self.shared.set(f'page:{i}', os.urandom(1000), timeout=60 + i)
+        self.assertEqual(self.shared.get('generation'), 1)  # Entries without expiry are culled last
+        self.assertIsNone(self.shared.get('page:0'))  # Closest to expiring
+        self.assertIsNotNone(self.shared.get('page:29'))
+
+    def test_tests_never_use_the_shared_cache_file(self):
+        self.assertNotEqual(settings.CACHES['default']['LOCATION'], os.path.join(settings.BASE_DIR, 'cache.sqlite3'))
+
+    def test_lru_evicts_by_bytes(self):
+        lru = LRUCache(max_size=100, ttl=60, max_bytes=100, weigh=len)
+        lru.set('a', b'x' * 60)
+        lru.set('b', b'x' * 30)
+        lru.get('a')
+        lru.set('c', b'x' * 30)
+        self.assertEqual((lru.get('a'), lru.get('b')), (b'x' * 60, None))
+        lru.set('d', b'x' * 101)
+        self.assertIsNone(lru.get('d'))
+        self.assertEqual(lru.size_bytes, 90)
+
+
+class GetOrComputeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_local_cache()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value, started=None, release=None):
+        """A ``compute`` counting its calls, optionally signalling ``started`` and blocking until ``release``."""
+        def run():
+            with self.calls_lock:
+                self.calls += 1
+            if started:
+                started.set()
+            if release:
+                release.wait(5)
+            else:
+                time.sleep(0.1)
+            return value
+        return run
+
+    def test_concurrent_misses_compute_once(self):
+        barrier = threading.Barrier(8)
+
+        def request():
+            barrier.wait()
+            return get_or_compute('coalesced', self.compute('value'), timeout=60, stale_timeout=60)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: request(), range(8)))
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_waits_for_another_workers_recompute(self):
+        cache.add('shared:lock', 'other-worker', timeout=60)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            waiting = executor.submit(get_or_compute, 'shared', self.compute('mine'), 60, 60)
+            time.sleep(0.2)
+            cache.set('shared', ('theirs', time.time() + 60, time.time() + 120))
+            self.assertEqual(waiting.result(), 'theirs')
+        self.assertEqual(self.calls, 0)
+
+    def test_stale_value_is_served_while_one_request_refreshes(self):
+        cache.set('stale', ('old', time.time() - 1, time.time() + 60))
+        started, release = threading.Event(), threading.Event()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            refreshing = executor.submit(get_or_compute, 'stale', self.compute('new', started, release), 60, 60)
+            self.assertTrue(started.wait(5))
+            self.assertEqual(get_or_compute('stale', self.compute('other'), timeout=60, stale_timeout=60), 'old')
+            release.set()
+            self.assertEqual(refreshing.result(), 'new')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(get_or_compute('stale', self.compute('other'), timeout=60, stale_timeout=60), 'new')
+        self.assertEqual(self.calls, 1)
+
+    def test_fresh_lifetimes_are_jittered(self):
+        jitter = AppConfig().cache_ttl_jitter
+        lifetimes = []
+        for i in range(20):
+            started = time.time()
+            get_or_compute(f'jitter:{i}', lambda: i, timeout=100, stale_timeout=10)
+            value, fresh_until, expires_at = cache.get(f'jitter:{i}')
+            lifetimes.append(fresh_until - started)
+            self.assertAlmostEqual(expires_at - fresh_until, 10)
+        self.assertTrue(all(100 * (1 - jitter) - 1 <= lifetime <= 100 * (1 + jitter) for lifetime in lifetimes))
+        self.assertGreater(len({round(lifetime, 3) for lifetime in lifetimes}), 1)
+
+
+class CachedAuthenticationTests(QueryBudgetTestCase):
+    def test_user_is_loaded_once(self):
+        _, cold = self.request('GET', 'task_stats')
+        _, warm = self.request('GET', 'task_stats')
+        self.assertEqual(cold.count - warm.count, 1)
+        self.assertFalse(any('auth_user' in sql for sql in warm.statements))
+
+    def test_changes_evict_the_cached_user(self):
+        self.request('GET', 'task_stats')
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.request('GET', 'task_stats')
+        self.assertEqual(response.status_code, 401)
+
+    def test_token_claims_skip_the_user_lookup(self):
+        config = AppConfig()
+        config.update_config('auth_trust_token_claims', True)
+        self.addCleanup(config.update_config, 'auth_trust_token_claims', False)
+        response, recorder = self.request('GET', 'task_list')
+        self.assertEqual(len(response.json()['results']), AppConfig().default_pagination_size)
+        self.assertFalse(any('auth_user' in sql for sql in recorder.statements))
+        response, _ = self.request('POST', 'task_list', {'title': 'New', 'due_date': (now() + timedelta(days=1)).isoformat()})
+        self.assertEqual(Task.objects.get(id=response.json()['id']).owner, self.user)
+
+
+class TaskListQueryBudgetTests(QueryBudgetTestCase):
+    def test_list_pages(self):
+        for params in ({}, {'page': 2}, {'page_size': 25, 'ordering': '-due_date'},
+                       {'completed': 'false', 'priority': 'high'}, {'q': 'Description'}):
+            response, _ = self.request('GET', 'task_list', params)
+            self.assertEqual(response.status_code, 200, params)
+
+    def test_cursor_pages(self):
+        response, _ = self.request('GET', 'task_list', {'cursor': '', 'ordering': 'priority'})
+        next_cursor = response.json()['pagination']['next_cursor']
+        response, _ = self.request('GET', 'task_list', {'cursor': next_cursor, 'ordering': 'priority'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_priority_sorts_and_filters_by_rank(self):
+        ranks = Task.PRIORITY_RANKS
+        for ordering, reverse in (('priority', False), ('-priority', True)):
+            response, _ = self.request('GET', 'task_list', {'ordering': ordering, 'page_size': 100})
+            priorities = [task['priority'] for task in response.json()['results']]
+            self.assertEqual(priorities, sorted(priorities, key=ranks.get, reverse=reverse))
+            self.assertEqual(priorities[0], 'high' if reverse else 'low')
+
+        response, _ = self.request('GET', 'task_list', {'priority': 'medium', 'page_size': 100})
+        self.assertEqual({task['priority'] for task in response.json()['results']}, {'medium'})
+        self.assertEqual(len(response.json()['results']), Task.objects.filter(priority='medium').count())
+
+    def test_cursor_walk_by_priority_visits_every_task_once(self):
+        seen, cursor = [], ''
+        while cursor is not None:
+            response, _ = self.request('GET', 'task_list', {'cursor': cursor, 'ordering': '-priority', 'page_size': 7})
+            seen += [(task['priority'], task['id']) for task in response.json()['results']]
+            cursor = response.json()['pagination']['next_cursor']
+        self.assertEqual(len(seen), self.seed_count)
+        self.assertEqual(seen, sorted(seen, key=lambda item: (-Task.PRIORITY_RANKS[item[0]], -item[1])))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, small = self.request('GET', 'task_list', {'page_size': 5})
+        Task.objects.bulk_create(self.make_task(i) for i in range(100))
+        cache.clear()
+        clear_user_cache()
+        _, large = self.request('GET', 'task_list', {'page_size': 100})
+        self.assertEqual(small.count, large.count)
+
+    def test_cached_and_conditional_requests(self):
+        response, _ = self.request('GET', 'task_list')
+        _, cached = self.request('GET', 'task_list')
+        self.assertEqual(cached.count, 0)  # The user comes from the authentication cache too
+        response, conditional = self.request('GET', 'task_list', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(conditional.count, 0)
+
+    def test_lists_are_cached_as_compressed_bytes_in_the_shared_tier(self):
+        response, _ = self.request('GET', 'task_list')
+        cached = peek(task_list_cache_key(response.wsgi_request, get_generation(task_list_namespace(self.user.id))))
+        self.assertIsInstance(cached, CachedResponse)
+        self.assertEqual(gzip.decompress(cached.bodies['gzip']), response.content)
+        self.assertEqual(cached.bodies['identity'], response.content)  # Identity hits skip the gunzip
+        clear_local_cache()  # As seen by another worker
+        replayed, recorder = self.request('GET', 'task_list')
+        self.assertEqual(recorder.count, 0)
+        self.assertEqual((replayed.content, replayed['ETag']), (response.content, response['ETag']))
+
+    def test_create(self):
+        response, _ = self.request('POST', 'task_list', {'title': 'New', 'due_date': (now() + timedelta(days=1)).isoformat()})
+        self.assertEqual(response.status_code, 201)
+
+    def test_export(self):
+        for export_format in ('ndjson', 'csv'):
+            response, _ = self.request('GET', 'task_export', {'export_format': export_format})
+            self.assertEqual(response.status_code, 200)
+
+
+class TaskDetailQueryBudgetTests(QueryBudgetTestCase):
+    def test_retrieve_update_delete(self):
+        task_id = self.tasks[1].id
+        response, _ = self.request('GET', 'task_detail', url_kwargs={'task_id': task_id})
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.request('GET', 'task_detail', url_kwargs={'task_id': task_id}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response, _ = self.request('PUT', 'task_detail', {'completed': True}, url_kwargs={'task_id': task_id})
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.request('DELETE', 'task_detail', url_kwargs={'task_id': task_id})
+        self.assertEqual(response.status_code, 204)
+
+    def test_update_returns_the_stored_row(self):
+        task_id = self.tasks[2].id
+        response, recorder = self.request('PUT', 'task_detail', {'title': 'Renamed'}, url_kwargs={'task_id': task_id})
+        self.assertEqual(recorder.count, 2)  # Cold authentication cache: user, UPDATE ... RETURNING
+        stored, _ = self.request('GET', 'task_detail', url_kwargs={'task_id': task_id})
+        self.assertEqual(response.json(), stored.json())
+        self.assertEqual(response['ETag'], stored['ETag'])
+
+    def test_if_match_guards_update_and_delete(self):
+        task_id = self.tasks[1].id
+        url_kwargs = {'task_id': task_id}
+        etag = self.request('GET', 'task_detail', url_kwargs=url_kwargs)[0]['ETag']
+        response, _ = self.request('PUT', 'task_detail', {'completed': True}, url_kwargs=url_kwargs, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        # The first write changed updated_at, so the old ETag is now stale
+        response, _ = self.request('PUT', 'task_detail', {'completed': False}, url_kwargs=url_kwargs, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        response, _ = self.request('DELETE', 'task_detail', url_kwargs=url_kwargs, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(Task.objects.get(id=task_id).completed)
+
+        current = self.request('GET', 'task_detail', url_kwargs=url_kwargs)[0]['ETag']
+        response, recorder = self.request('DELETE', 'task_detail', url_kwargs=url_kwargs, HTTP_IF_MATCH=f'{etag}, {current}')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(recorder.count, 1)
+        response, _ = self.request('PUT', 'task_detail', {'completed': True}, url_kwargs=url_kwargs, HTTP_IF_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class CompressionTests(QueryBudgetTestCase):
+    def test_negotiation_honours_q_values(self):
+        factory = RequestFactory()
+        for header, expected in (('gzip, deflate', 'gzip'), ('gzip;q=0', None), ('*', 'gzip'),
+                                 ('identity', None), ('', None), ('br;q=1, gzip;q=0.5', 'br' if 'br' in ENCODERS else 'gzip')):
+            self.assertEqual(negotiate(factory.get('/', HTTP_ACCEPT_ENCODING=header)), expected, header)
+
+    def test_cached_list_is_served_precompressed(self):
+        identity, _ = self.request('GET', 'task_list', {'page_size': 100})
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertIn('Accept-Encoding', identity['Vary'])
+
+        response, recorder = self.request('GET', 'task_list', {'page_size': 100}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(recorder.count, 0)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        self.assertEqual(response['ETag'], encoded_etag(identity['ETag'], 'gzip'))
+
+        for etag in (response['ETag'], identity['ETag']):
+            not_modified, _ = self.request('GET', 'task_list', {'page_size': 100},
+                                           HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual((not_modified.status_code, not_modified['ETag']), (304, etag))
+
+    def test_small_bodies_stay_uncompressed_and_encoded_etags_match_writes(self):
+        task = self.tasks[1]
+        response, _ = self.request('GET', 'task_detail', url_kwargs={'task_id': task.id}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+        Task.objects.filter(id=task.id).update(description='x' * AppConfig().compress_min_bytes)
+        response, _ = self.request('GET', 'task_detail', url_kwargs={'task_id': task.id}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response, _ = self.request('PUT', 'task_detail', {'completed': True}, url_kwargs={'task_id': task.id},
+                                   HTTP_IF_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+
+class TaskSearchTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        if not fts_available():
+            self.skipTest("SQLite was built without FTS5")
+        self.title_hit, self.description_hit, self.accented = Task.objects.bulk_create([
+            self.make_task(100, title="Quarterly report"),
+            self.make_task(101, title="Call the bank", description="Ask about the report fees"),
+            self.make_task(102, title="Café order", description=None),
+        ])
+
+    def search(self, text):
+        response, _ = self.request('GET', 'task_list', {'q': text, 'page_size': 100})
+        return [task['id'] for task in response.json()['results']]
+
+    def test_ranks_title_matches_above_description_matches(self):
+        self.assertEqual(self.search('report'), [self.title_hit.id, self.description_hit.id])
+        self.assertEqual(self.search('repo'), [self.title_hit.id, self.description_hit.id])  # Last term is a prefix
+        self.assertEqual(self.search('report fees'), [self.description_hit.id])  # Every term must match
+        self.assertEqual(self.search('cafe'), [self.accented.id])
+        self.assertEqual(self.search('"report OR'), [])  # Escaped: a literal "or" term, not FTS syntax
+
+    def test_index_follows_updates_and_deletes(self):
+        tasks = Task.objects.filter(owner=self.user)
+        Task.objects.filter(id=self.title_hit.id).update(title="Annual summary")
+        self.assertEqual(list(search_tasks(tasks, 'summary').values_list('id', flat=True)), [self.title_hit.id])
+        self.assertEqual(list(search_tasks(tasks, 'quarterly')), [])
+        Task.objects.filter(id=self.description_hit.id).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH 'fees'")
+            self.assertEqual(cursor.fetchall(), [])
+
+    def test_falls_back_to_icontains_without_the_index(self):
+        with mock.patch.dict('tasks.search._fts_available', {'default': False}):
+            results = search_tasks(Task.objects.filter(owner=self.user), 'REPORT')
+            self.assertNotIn(FTS_TABLE, str(results.query))
+            self.assertEqual(set(results.values_list('id', flat=True)), {self.title_hit.id, self.description_hit.id})
+
+
+class SparseFieldsetTests(QueryBudgetTestCase):
+    def test_list_selects_and_returns_only_requested_fields(self):
+        response, recorder = self.request('GET', 'task_list', {'fields': 'title,id', 'page_size': 100})
+        results = response.json()['results']
+        self.assertEqual(len(results), self.seed_count)
+        self.assertEqual([list(task) for task in results[:1]], [['id', 'title']])  # Serializer order
+        self.assertFalse(any('"description"' in sql for sql in recorder.statements))
+
+        full, _ = self.request('GET', 'task_list', {'page_size': 100})
+        self.assertIn('description', full.json()['results'][0])  # Cached apart from the sparse page
+        self.assertNotEqual(full['ETag'], response['ETag'])
+
+    def test_cursor_pages_keep_working_without_the_sort_keys(self):
+        seen, cursor = [], ''
+        while cursor is not None:
+            response, _ = self.request('GET', 'task_list', {'cursor': cursor, 'ordering': '-priority', 'fields': 'title',
+                                                            'page_size': 7})
+            seen += response.json()['results']
+            cursor = response.json()['pagination']['next_cursor']
+        self.assertEqual(len(seen), self.seed_count)
+        self.assertEqual({tuple(task) for task in seen}, {('title',)})
+
+    def test_detail_defers_unrequested_columns(self):
+        task_id = self.tasks[1].id
+        response, recorder = self.request('GET', 'task_detail', {'fields': 'completed'}, url_kwargs={'task_id': task_id})
+        self.assertEqual(response.json(), {'completed': self.tasks[1].completed})
+        self.assertEqual(response['ETag'], self.request('GET', 'task_detail', url_kwargs={'task_id': task_id})[0]['ETag'])
+        self.assertFalse(any('"description"' in sql for sql in recorder.statements))
+
+    def test_logged_results_do_not_load_deferred_fields(self):
+        task = Task.objects.only('id').get(id=self.tasks[1].id)
+        with self.assertNumQueries(0):
+            self.assertEqual(str(LazyRepr(task)), f"<Task pk={task.pk}>")
+
+    def test_unknown_fields_are_rejected(self):
+        for url_name, url_kwargs in (('task_list', None), ('task_detail', {'task_id': self.tasks[0].id})):
+            response, _ = self.request('GET', url_name, {'fields': 'title,secret'}, url_kwargs=url_kwargs)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('secret', response.json()['error']['message'])
+
+
+class TaskCountModeTests(QueryBudgetTestCase):
+    def test_exact_count_is_cached_per_filter_set_until_a_write(self):
+        first, _ = self.request('GET', 'task_list', {'completed': 'false'})
+        total = Task.objects.filter(completed=False).count()
+        self.assertEqual(first.json()['pagination']['total_items'], total)
+
+        # Other pages, orderings and fieldsets of the same filters only run their page query
+        response, recorder = self.request('GET', 'task_list', {'completed': 'false', 'page': 2, 'page_size': 10,
+                                                               'ordering': 'due_date'})
+        self.assertEqual(recorder.count, 1)
+        self.assertEqual(response.json()['pagination']['total_items'], total)
+
+        with self.captureOnCommitCallbacks(execute=True):  # The invalidation runs once the write commits
+            self.request('POST', 'task_list', {'title': 'New', 'due_date': (now() + timedelta(days=1)).isoformat()})
+        response, _ = self.request('GET', 'task_list', {'completed': 'false', 'page': 2, 'page_size': 10})
+        self.assertEqual(response.json()['pagination']['total_items'], total + 1)
+
+    def test_count_none_pages_without_counting(self):
+        response, recorder = self.request('GET', 'task_list', {'count': 'none', 'page': 2, 'page_size': 10})
+        self.assertEqual(response.json()['pagination'],
+                         {'current_page': 2, 'page_size': 10, 'has_next': True, 'has_previous': True})
+        self.assertFalse(any('COUNT(' in sql for sql in recorder.statements))
+        last, _ = self.request('GET', 'task_list', {'count': 'none', 'page': 3, 'page_size': 10})
+        self.assertEqual((len(last.json()['results']), last.json()['pagination']['has_next']), (5, False))
+        missing, _ = self.request('GET', 'task_list', {'count': 'none', 'page': 4, 'page_size': 10})
+        self.assertEqual(missing.status_code, 404)
+
+        not_modified, _ = self.request('GET', 'task_list', {'count': 'none', 'page': 2, 'page_size': 10},
+                                       HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_count_estimate(self):
+        response, _ = self.request('GET', 'task_list', {'count': 'estimate', 'priority': 'high', 'completed': 'false'})
+        pagination = response.json()['pagination']
+        self.assertEqual(pagination['total_items'], Task.objects.filter(priority='high', completed=False).count())
+        self.assertTrue(pagination['total_items_exact'])  # From the status counters
+
+        config = AppConfig()
+        config.update_config('count_estimate_cap', 5)
+        self.addCleanup(config.update_config, 'count_estimate_cap', 1000)
+        response, _ = self.request('GET', 'task_list', {'count': 'estimate', 'title': 'Task', 'page_size': 10})
+        pagination = response.json()['pagination']
+        self.assertEqual((pagination['total_items'], pagination['total_items_exact']), (5, False))
+        self.assertEqual((pagination['total_pages'], pagination['has_next']), (2, True))
+
+        response, _ = self.request('GET', 'task_list', {'count': 'all'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_async_count_modes(self):
+        response, _ = await self.arequest('GET', 'async_task_list', {'count': 'estimate', 'completed': 'true'})
+        pagination = response.json()['pagination']
+        self.assertEqual((pagination['total_items'], pagination['total_items_exact']), (9, True))
+        response, _ = await self.arequest('GET', 'async_task_list', {'count': 'none', 'page_size': 25})
+        self.assertEqual(response.json()['pagination']['has_next'], False)
+
+
+class TaskOwnershipTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username='other')
+        self.other_tasks = Task.objects.bulk_create(self.make_task(i, owner=self.other) for i in range(5))
+
+    def test_lists_only_own_tasks(self):
+        response, _ = self.request('GET', 'task_list', {'page_size': 100})
+        self.assertEqual({task['id'] for task in response.json()['results']}, {task.id for task in self.tasks})
+        response = self.api.get(reverse('task_export'))
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), self.seed_count)
+
+    def test_other_users_tasks_are_not_found(self):
+        url_kwargs = {'task_id': self.other_tasks[0].id}
+        for method, data in (('GET', None), ('PUT', {'title': 'Taken'}), ('DELETE', None)):
+            response, _ = self.request(method, 'task_detail', data, url_kwargs=url_kwargs)
+            self.assertEqual(response.status_code, 404, method)
+        response, _ = self.request('PUT', 'task_detail', {'title': 'Taken'}, url_kwargs=url_kwargs, HTTP_IF_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+        response, _ = self.request('DELETE', 'task_bulk', {'ids': [self.tasks[0].id, self.other_tasks[1].id]})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Task.objects.filter(owner=self.other).count(), 5)
+        self.assertEqual(Task.objects.get(id=self.other_tasks[0].id).title, self.other_tasks[0].title)
+
+    def test_writes_keep_other_users_lists_cached(self):
+        self.request('GET', 'task_list')
+        other_api = APIClient()
+        other_api.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.other).access_token}')
+        response, _ = self.request('POST', 'task_list', {'title': 'Theirs', 'due_date': (now() + timedelta(days=1)).isoformat()},
+                                   client=other_api)
+        self.assertEqual(response.status_code, 201)
+        _, cached = self.request('GET', 'task_list')
+        self.assertEqual(cached.count, 0)
+
+
+class TaskBulkQueryBudgetTests(QueryBudgetTestCase):
+    def test_bulk_create_update_delete(self):
+        due_date = (now() + timedelta(days=3)).isoformat()
+        response, _ = self.request('POST', 'task_bulk', [{'title': f'Bulk {i}', 'due_date': due_date} for i in range(20)])
+        self.assertEqual(response.status_code, 201)
+        ids = [task['id'] for task in response.json()]
+        response, _ = self.request('PATCH', 'task_bulk', [{'id': task_id, 'completed': True} for task_id in ids])
+        self.assertEqual(response.status_code, 200)
+        response, _ = self.request('DELETE', 'task_bulk', {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+
+
+class AsyncTaskQueryBudgetTests(QueryBudgetTestCase):
+    async def test_list_and_create(self):
+        response, _ = await self.arequest('GET', 'async_task_list', {'page': 2})
+        self.assertEqual(response.status_code, 200)
+        response, _ = await self.arequest('GET', 'async_task_list', {'cursor': ''})
+        self.assertEqual(response.status_code, 200)
+        response, _ = await self.arequest(
+            'POST', 'async_task_list', {'title': 'New', 'due_date': (now() + timedelta(days=1)).isoformat()}
+        )
+        self.assertEqual(response.status_code, 201)
+
+    async def test_retrieve_update_delete(self):
+        task_id = self.tasks[1].id
+        response, _ = await self.arequest('GET', 'async_task_detail', url_kwargs={'task_id': task_id})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        response, _ = await self.arequest('PUT', 'async_task_detail', {'completed': True}, url_kwargs={'task_id': task_id},
+                                          headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        current = response['ETag']
+        response, _ = await self.arequest('DELETE', 'async_task_detail', url_kwargs={'task_id': task_id},
+                                          headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        response, _ = await self.arequest('DELETE', 'async_task_detail', url_kwargs={'task_id': task_id},
+                                          headers={'If-Match': current})
+        self.assertEqual(response.status_code, 204)
+
+
+class TaskStatsQueryBudgetTests(QueryBudgetTestCase):
+    def expected_stats(self):
+        """The stats recomputed with GROUP BY, for comparison with the maintained counters."""
+        tasks = Task.objects.filter(owner=self.user)
+        by_priority = {priority: {'total': 0, 'completed': 0, 'open': 0} for priority, _ in Task.PRIORITY_CHOICES}
+        for priority, completed, count in tasks.values_list('priority', 'completed').annotate(n=Count('id')):
+            by_priority[priority]['total'] += count
+            by_priority[priority]['completed' if completed else 'open'] += count
+        return {
+            'total': tasks.count(),
+            'completed': tasks.filter(completed=True).count(),
+            'open': tasks.filter(completed=False).count(),
+            'overdue': tasks.filter(completed=False, due_date__lt=now()).count(),
+            'by_priority': by_priority,
+        }
+
+    def test_counters_follow_every_write_path(self):
+        response, _ = self.request('GET', 'task_stats')
+        self.assertEqual(response.json(), self.expected_stats())
+
+        # Overdue tasks on a past day and earlier today; saves bypass the due date validation
+        Task.objects.bulk_create([self.make_task(100, due_date=now() - timedelta(days=2)),
+                                  self.make_task(101, due_date=now() - timedelta(seconds=1))])
+        # Another user's tasks are counted separately
+        other = User.objects.create_user(username='other')
+        Task.objects.bulk_create(self.make_task(i, owner=other, due_date=now() - timedelta(days=1)) for i in range(5))
+        due_date = (now() + timedelta(days=2)).isoformat()
+        self.request('POST', 'task_list', {'title': 'New', 'due_date': due_date, 'priority': 'low'})
+        self.request('PUT', 'task_detail', {'completed': True, 'priority': 'low'}, url_kwargs={'task_id': self.tasks[1].id})
+        self.request('DELETE', 'task_detail', url_kwargs={'task_id': self.tasks[2].id})
+        self.request('PATCH', 'task_bulk', [{'id': task.id, 'completed': False} for task in self.tasks[3:9]])
+        self.request('DELETE', 'task_bulk', {'ids': [task.id for task in self.tasks[10:15]]})
+        response, _ = self.request('GET', 'task_stats')
+        self.assertEqual(response.json(), self.expected_stats())
+        self.assertEqual(response.json()['overdue'], 2)
+        self.assertEqual(rebuild_counters(), {})
+
+    def test_query_count_does_not_grow_with_rows(self):
+        _, small = self.request('GET', 'task_stats')
+        Task.objects.bulk_create(self.make_task(i, due_date=now() + timedelta(days=i)) for i in range(200))
+        clear_user_cache()
+        _, large = self.request('GET', 'task_stats')
+        self.assertEqual(small.count, large.count)
+
+    def test_status_counters_are_read_by_key_range(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sum(TaskRepository.get_status_counts(self.user).values()), self.seed_count)
+        sql = queries.captured_queries[-1]['sql']
+        self.assertNotIn('LIKE', sql)
+        with connection.cursor() as cursor:
+            plan = ' '.join(str(row) for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall())
+        self.assertNotIn('SCAN', plan)
+
+    def test_rebuild_fixes_drift(self):
+        key = f'{self.user.id}:priority:high:0'
+        TaskCounter.objects.filter(key=key).update(count=999)
+        drift = rebuild_counters()
+        self.assertEqual(drift[key][0], 999)
+        response, _ = self.request('GET', 'task_stats')
+        self.assertEqual(response.json(), self.expected_stats())
+
+
+class TaskChangesTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        config = AppConfig()
+        config.update_config('sync_safety_lag', 0)  # The seeded tasks were just written
+        self.addCleanup(config.update_config, 'sync_safety_lag', 5)
+
+    def sync(self, token=None, **params):
+        response, _ = self.request('GET', 'task_changes', {**({'since': token} if token else {}), **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_initial_sync_pages_through_every_task(self):
+        other = User.objects.create_user(username='other')
+        Task.objects.bulk_create(self.make_task(i, owner=other) for i in range(3))
+        seen, token = [], None
+        for _ in range(3):
+            batch = self.sync(token, limit=10)
+            seen += [task['id'] for task in batch['changes']]
+            token = batch['next_token']
+            if not batch['has_more']:
+                break
+        self.assertFalse(batch['has_more'])
+        self.assertEqual(sorted(seen), sorted(task.id for task in self.tasks))
+        self.assertEqual(self.sync(token)['changes'], [])
+
+    def test_incremental_sync_reports_updates_and_deletes(self):
+        Task.objects.filter(id=self.tasks[5].id).delete()  # Deleted before the first sync: not reported
+        token = self.sync()['next_token']
+        self.request('PUT', 'task_detail', {'completed': True}, url_kwargs={'task_id': self.tasks[1].id})
+        self.request('DELETE', 'task_detail', url_kwargs={'task_id': self.tasks[2].id})
+        self.request('DELETE', 'task_bulk', {'ids': [self.tasks[3].id, self.tasks[4].id]})
+
+        batch = self.sync(token)
+        self.assertEqual([task['id'] for task in batch['changes']], [self.tasks[1].id])
+        self.assertTrue(batch['changes'][0]['completed'])
+        self.assertEqual(sorted(batch['deleted']), [task.id for task in self.tasks[2:5]])
+        caught_up = self.sync(batch['next_token'])
+        self.assertEqual((caught_up['changes'], caught_up['deleted']), ([], []))
+
+    def test_moving_a_task_is_a_delete_for_the_previous_owner(self):
+        other = User.objects.create_user(username='other')
+        other_api = APIClient()
+        other_api.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(other).access_token}')
+        token = self.sync()['next_token']
+        other_token = self.request('GET', 'task_changes', client=other_api)[0].json()['next_token']
+
+        task = self.tasks[1]
+        task.owner = other
+        task.save()  # As the admin does
+        self.assertEqual(self.sync(token)['deleted'], [task.id])
+        moved = self.request('GET', 'task_changes', {'since': other_token}, client=other_api)[0].json()
+        self.assertEqual([change['id'] for change in moved['changes']], [task.id])
+
+        task.owner = self.user
+        task.save()  # Back again: a change, and the earlier tombstone no longer applies
+        batch = self.sync(token)
+        self.assertEqual(([change['id'] for change in batch['changes']], batch['deleted']), ([task.id], []))
+
+    def test_invalid_and_expired_tokens(self):
+        response, _ = self.request('GET', 'task_changes', {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, 400)
+        token = self.sync()['next_token']
+        config = AppConfig()
+        config.update_config('sync_tombstone_retention_days', -1)
+        self.addCleanup(config.update_config, 'sync_tombstone_retention_days', 30)
+        response, _ = self.request('GET', 'task_changes', {'since': token})
+        self.assertEqual(response.status_code, 410)
+
+    def test_compaction_removes_old_tombstones(self):
+        Task.objects.filter(id__in=[task.id for task in self.tasks[:3]]).delete()
+        TaskTombstone.objects.filter(task_id=self.tasks[0].id).update(deleted_at=now() - timedelta(days=40))
+        self.assertEqual(compact_tombstones(now() - timedelta(days=30)), 1)
+        self.assertEqual(sorted(TaskTombstone.objects.values_list('task_id', flat=True)),
+                         [self.tasks[1].id, self.tasks[2].id])
+
+
+class ImportTasksCommandTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.user = User.objects.create_user(username='importer')
+        self.due = (now() + timedelta(days=3)).isoformat()
+
+    def write(self, name, text):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(text)
+        return path
+
+    def run_import(self, path, *args):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_tasks', path, *args, stdout=StringIO())
+        return sum(1 for query in queries.captured_queries if query['sql'].startswith('INSERT INTO "tasks_task"'))
+
+    def rejects(self, path):
+        with open(f"{path}.rejects.ndjson", encoding='utf-8') as rejects:
+            return [json.loads(line) for line in rejects]
+
+    def test_csv_rows_are_inserted_in_batches(self):
+        path = self.write('tasks.csv', (
+            "title,description,due_date,priority,completed\n"
+            f"First,,{self.due},low,false\n"
+            f"Second,Details,{self.due},high,true\n"
+            f"Urgent,,{self.due},high,false\n"  # High priority without a description
+            f"Third,,{self.due},,\n"  # Empty cells take the defaults
+        ))
+        self.assertEqual(self.run_import(path, '--owner', 'importer', '--batch-size', '2'), 2)
+        tasks = Task.objects.filter(owner=self.user).order_by('id')
+        self.assertEqual([(task.title, task.priority, task.completed) for task in tasks],
+                         [('First', 'low', False), ('Second', 'high', True), ('Third', 'medium', False)])
+        rejects = self.rejects(path)
+        self.assertEqual([(reject['line'], reject['row']['title']) for reject in rejects], [(4, 'Urgent')])
+
+    def test_ndjson_rows_and_rejects(self):
+        path = self.write('tasks.ndjson', "\n".join([
+            json.dumps({'title': 'One', 'due_date': self.due}),
+            '{"title": "Broken"',
+            '',
+            '["not", "an", "object"]',
+            json.dumps({'title': 'Past', 'due_date': (now() - timedelta(days=1)).isoformat()}),
+            json.dumps({'title': 'Two', 'due_date': self.due, 'completed': True}),
+        ]) + "\n")
+        self.assertEqual(self.run_import(path, '--owner', 'importer'), 1)
+        self.assertEqual(list(Task.objects.filter(owner=self.user).values_list('title', flat=True)), ['One', 'Two'])
+        rejects = self.rejects(path)
+        self.assertEqual([reject['line'] for reject in rejects], [2, 4, 5])
+        self.assertIn('due_date', rejects[2]['errors'])
+
+    def test_clean_import_leaves_no_rejects_file(self):
+        path = self.write('tasks.ndjson', json.dumps({'title': 'One', 'due_date': self.due}) + "\n")
+        self.run_import(path, '--owner', 'importer')
+        self.assertFalse(os.path.exists(f"{path}.rejects.ndjson"))
+
+    def test_owner_is_required_and_must_exist(self):
+        path = self.write('tasks.ndjson', json.dumps({'title': 'One', 'due_date': self.due}) + "\n")
+        with self.assertRaisesMessage(CommandError, '--owner'):
+            call_command('import_tasks', path)
+        with self.assertRaisesMessage(CommandError, 'User not found: nobody'):
+            call_command('import_tasks', path, '--owner', 'nobody')
+        self.assertFalse(Task.objects.exists())
+
+
+class MetricsQueryBudgetTests(QueryBudgetTestCase):
+    def test_metrics(self):
+        response, _ = self.request('GET', 'metrics', client=APIClient())
+        self.assertEqual(response.status_code, 200)
+
+    def test_only_public_layer_methods_are_timed(self):
+        self.request('GET', 'task_detail', url_kwargs={'task_id': self.tasks[0].id})
+        self.request('GET', 'task_stats')
+        body = self.request('GET', 'metrics', client=APIClient())[0].content.decode()
+        self.assertIn('operation="get_task_by_id"', body)
+        self.assertNotRegex(body, r'operation="_')
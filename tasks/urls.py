@@ -3,7 +3,8 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from tasks.views import TaskListView, TaskDetailView
+from tasks.async_views import AsyncTaskListView, AsyncTaskDetailView
+from tasks.views import TaskListView, TaskDetailView, TaskBulkView, TaskExportView, TaskStatsView, TaskChangesView, MetricsView
 
 urlpatterns = [
     # JWT Authentication Endpoints
@@ -11,6 +12,15 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # CRUD Endpoints for Tasks
     path('tasks/', TaskListView.as_view(), name='task_list'),  # List & Create
+    path('tasks/bulk/', TaskBulkView.as_view(), name='task_bulk'),  # Bulk Create, Update, Delete
+    path('tasks/export/', TaskExportView.as_view(), name='task_export'),  # Streaming NDJSON/CSV export
+    path('tasks/stats/', TaskStatsView.as_view(), name='task_stats'),  # Counts by priority, status and overdue
+    path('tasks/changes/', TaskChangesView.as_view(), name='task_changes'),  # Delta sync with tombstones
     path('tasks/<int:task_id>/', TaskDetailView.as_view(), name='task_detail'),  # Retrieve, Update, Delete
+    # Native async variants for ASGI deployments
+    path('async/tasks/', AsyncTaskListView.as_view(), name='async_task_list'),
+    path('async/tasks/<int:task_id>/', AsyncTaskDetailView.as_view(), name='async_task_detail'),
+    # Prometheus scrape endpoint
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 
 ]
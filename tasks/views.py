@@ -1,23 +1,121 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
-from tasks.services import TaskService
-from tasks.filters import TaskFilter
-from tasks.serializers import TaskSerializer
+from tasks.services import TaskConflict, TaskService
+from tasks.filters import TaskFilter, TaskOrderingFilter, ordering_column
+from tasks.serializers import TaskSerializer, TaskBulkDeleteSerializer, TaskRowSerializer, requested_fields
+from tasks.models import Task
 from tasks.config import AppConfig  # For default pagination size
 from django.core.exceptions import ValidationError
-from rest_framework.exceptions import NotFound
-from tasks.serializers import TaskSerializer
-from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_filters.constants import EMPTY_VALUES
+from django.db.models import Q
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException, NotFound, ParseError, PermissionDenied
+from rest_framework.renderers import BrowsableAPIRenderer
+from tasks.renderers import TaskJSONRenderer
+from tasks.cache import CachedResponse, get_generation, get_or_compute, peek, task_list_namespace
+from tasks.export import EXPORT_FIELDS, EXPORT_FORMATS
+from tasks.metrics import render_prometheus, timer
+from tasks.conditional import (
+    cached_response,
+    conditional_response,
+    content_etag,
+    if_match_versions,
+    is_conditional,
+    last_modified_timestamp,
+    set_validators,
+    task_etag,
+    task_list_etag,
+)
 from hashlib import md5
+from datetime import timedelta
+from math import ceil
+import hmac
+import base64
+import json
 import logging
+import time
 
 logger = logging.getLogger('tasks')
 
+# Query parameters that cut or shape a list page without changing which tasks match
+PAGE_PARAMS = {'page', 'page_size', 'cursor', 'ordering', 'fields', 'count', 'format'}
+
+COUNT_MODES = ('exact', 'estimate', 'none')
+
+
+def task_list_signature(request):
+    """Identify the requesting user and their query parameters."""
+    query_params = sorted(request.GET.items())  # Sort query params to ensure consistent keys
+    query_string = md5(str(query_params).encode('utf-8')).hexdigest()
+    return f"{request.user.id}:{query_string}"
+
+
+def task_list_cache_key(request, generation):
+    """Build the cache key of a task list page for the given generation of the user's lists."""
+    return f"{task_list_namespace(request.user.id)}:{generation}:{task_list_signature(request)}"
+
+
+def task_filter_signature(request):
+    """Identify the requesting user and their filter parameters, ignoring how the page is cut or shaped."""
+    query_params = sorted((name, value) for name, value in request.GET.items() if name not in PAGE_PARAMS)
+    return f"{request.user.id}:{md5(str(query_params).encode('utf-8')).hexdigest()}"
+
+
+def task_list_version_key(request, generation):
+    """Cache key of the filtered set's ``(max(updated_at), count)``, shared by all of its pages."""
+    return f"{task_list_namespace(request.user.id)}:{generation}:version:{task_filter_signature(request)}"
+
+
+def count_mode(request):
+    """Validate ``?count=``: ``exact`` (the default), ``estimate`` or ``none``."""
+    mode = request.query_params.get('count', 'exact')
+    if mode not in COUNT_MODES:
+        raise ParseError(f"Unknown count: {mode}. Choose from: {', '.join(COUNT_MODES)}.")
+    return mode
+
+
+def active_filters(request, view):
+    """The TaskFilter values a request actually filters on, by filter name."""
+    filterset = view.filterset_class(request.query_params, request=request)
+    filterset.is_valid()  # Already enforced by DjangoFilterBackend
+    return {name: value for name, value in filterset.form.cleaned_data.items() if value not in EMPTY_VALUES}
+
+
+def sparse_page_fields(fields, paginator):
+    """``fields`` plus whatever the keyset cursor is built from, in serializer order."""
+    if fields is None:
+        return None
+    needed = set(fields) | set(paginator.cursor_fields())
+    return [name for name in TaskSerializer.Meta.fields if name in needed]
+
+
+def trim_fields(rows, fields, selected):
+    """Drop the cursor-only keys ``sparse_page_fields`` added to ``fields`` from serialized rows."""
+    if fields is None or len(selected) == len(fields):
+        return rows
+    return [{name: row[name] for name in fields} for row in rows]
+
+
+class PreconditionFailed(APIException):
+    """412 for a write whose ``If-Match`` ETags no longer match the task."""
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The task was modified by another request. Fetch it again and retry."
+    default_code = 'precondition_failed'
+
+
+class SyncTokenExpired(APIException):
+    """410 for a delta-sync token older than the tombstones kept, which may have missed deletes."""
+    status_code = status.HTTP_410_GONE
+    default_detail = "The sync token has expired. Discard local tasks and sync again without a token."
+    default_code = 'sync_token_expired'
+
 
 class CustomPagination(PageNumberPagination):
     """Custom pagination class to include additional metadata."""
@@ -25,6 +123,16 @@ class CustomPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+    def __init__(self, count=None):
+        self.count = count
+
+    def django_paginator_class(self, object_list, per_page):
+        """Django's Paginator, without its COUNT(*) when the total is already known."""
+        paginator = Paginator(object_list, per_page)
+        if self.count is not None:
+            paginator.count = self.count  # Takes the place of the cached_property
+        return paginator
+
     def get_paginated_response(self, data):
         """Customize the paginated response structure."""
         return Response({
@@ -38,41 +146,263 @@ class CustomPagination(PageNumberPagination):
         })
 
 
+class UncountedPagination(CustomPagination):
+    """
+    Page-number pagination without a COUNT(*), for ``?count=estimate`` and ``?count=none``.
+
+    One look-ahead row tells whether a next page exists. Totals are reported only
+    when an ``estimate`` of ``(count, exact)`` is given.
+    """
+
+    def __init__(self, estimate=None):
+        super().__init__()
+        self.estimate = estimate
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return the rows of the requested page."""
+        return self.paginate_rows(list(self.get_page_queryset(queryset, request)))
+
+    def get_page_queryset(self, queryset, request):
+        """Return the lazy slice of the requested page, including one look-ahead row."""
+        self.page_size = self.get_page_size(request)
+        try:
+            self.number = int(request.query_params.get(self.page_query_param) or 1)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message)
+        start = (self.number - 1) * self.page_size
+        return queryset[start:start + self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        """Drop the look-ahead row of a fetched page; only the first page may be empty."""
+        if not rows and self.number > 1:
+            raise NotFound(self.invalid_page_message)
+        self.has_next = len(rows) > self.page_size
+        return rows[:self.page_size]
+
+    def get_paginated_response(self, data):
+        pagination = {
+            'current_page': self.number,
+            'page_size': self.page_size,
+            'has_next': self.has_next,
+            'has_previous': self.number > 1,
+        }
+        if self.estimate is not None:
+            count, exact = self.estimate
+            pagination.update({
+                'total_items': count,
+                'total_pages': max(ceil(count / self.page_size), self.number + self.has_next),
+                'total_items_exact': exact,
+            })
+        return Response({'pagination': pagination, 'results': data})
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination that seeks by the active ordering plus ``id``.
+
+    Pages are fetched with ``WHERE (key, id) > (last_key, last_id) LIMIT n`` instead
+    of OFFSET, and no COUNT is issued, so deep pages cost the same as the first one.
+    """
+    cursor_query_param = 'cursor'
+    page_size = AppConfig().default_pagination_size
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, ordering=None):
+        self.ordering = list(ordering or [])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of results positioned after the requested cursor."""
+        return self.paginate_rows(list(self.get_page_queryset(queryset, request)))
+
+    def get_page_queryset(self, queryset, request):
+        """Return the lazy seek query for the requested page, including one look-ahead row."""
+        self.page_size = self.get_page_size(request)
+        self.keys = self.get_sort_keys()
+
+        position = self.decode_cursor(request, self.keys)
+        if position is not None:
+            queryset = queryset.filter(self._seek_condition(self.keys, position))
+        queryset = queryset.order_by(*[f"-{name}" if descending else name for name, descending in self.keys])
+        return queryset[:self.page_size + 1]
+
+    def paginate_rows(self, results):
+        """Drop the look-ahead row of a fetched page and derive the next cursor from it."""
+        has_next = len(results) > self.page_size
+        results = results[:self.page_size]
+        self.next_cursor = self.encode_cursor(results[-1], self.keys) if has_next else None
+        return results
+
+    def get_paginated_response(self, data):
+        """Mirror the ``CustomPagination`` envelope, without the COUNT-based totals."""
+        return Response({
+            'pagination': {
+                'next_cursor': self.next_cursor,
+                'page_size': self.page_size,
+            },
+            'results': data
+        })
+
+    def get_page_size(self, request):
+        """Read ``page_size`` from the query string, capped at ``max_page_size``."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def cursor_fields(self):
+        """Row fields ``encode_cursor`` reads, which a sparse page must select too."""
+        return ['priority' if name == 'priority_rank' else name for name, _ in self.get_sort_keys()]
+
+    def get_sort_keys(self):
+        """Return ``(field, descending)`` pairs for the ordering, with ``id`` as tie-breaker."""
+        keys = [(ordering_column(term.lstrip('-')), term.startswith('-')) for term in self.ordering]
+        keys = [(name, descending) for name, descending in keys if name != 'id']
+        keys.append(('id', keys[-1][1] if keys else False))
+        return keys
+
+    def encode_cursor(self, instance, keys):
+        """Encode the sort key values of the last row on the page as an opaque token."""
+        values = []
+        for name, _ in keys:
+            value = self._sort_value(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        payload = json.dumps({'o': self.ordering, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _sort_value(instance, name):
+        """Read a sort key from a row dict or task; pages carry the priority name, not its rank."""
+        if name == 'priority_rank':
+            return Task.PRIORITY_RANKS[instance['priority'] if isinstance(instance, dict) else instance.priority]
+        return instance[name] if isinstance(instance, dict) else getattr(instance, name)
+
+    def decode_cursor(self, request, keys):
+        """Decode the ``cursor`` parameter, returning ``None`` for the first page."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            if payload['o'] != self.ordering or len(payload['v']) != len(keys):
+                raise ValueError("Cursor does not match the requested ordering.")
+            fields = [Task._meta.get_field(name) for name, _ in keys]
+            return [
+                (field.output_field if field.generated else field).to_python(value)
+                for field, value in zip(fields, payload['v'])
+            ]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(detail=self.invalid_cursor_message)
+
+    @staticmethod
+    def _seek_condition(keys, position):
+        """Build the lexicographic "comes after" condition for a mixed-direction sort."""
+        condition = Q()
+        equal_prefix = Q()
+        for (name, descending), value in zip(keys, position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+            equal_prefix &= Q(**{name: value})
+        return condition
+
+
 class TaskListView(APIView):
     """Handle listing all tasks and creating a new task."""
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, TaskOrderingFilter]
     filterset_class = TaskFilter
     serializer_class = TaskSerializer
+    renderer_classes = [TaskJSONRenderer, BrowsableAPIRenderer]
     ordering_fields = ['due_date', 'priority', 'created_at']
 
     def get(self, request):
         """List all tasks with caching, filtering, sorting, and pagination."""
         logger.info(f"TaskListView GET request by user {request.user}")
 
-        # Generate a unique cache key based on filters, sorting, and user
+        # Generate a unique cache key based on filters, sorting, fields, and user
+        fields = requested_fields(request.query_params)
+        mode = count_mode(request)
         cache_key = self._generate_cache_key(request)
-        cached_response = cache.get(cache_key)
-        if cached_response:
-            logger.info(f"Cache hit for key: {cache_key}")
-            return cached_response
 
-        # Fetch and process tasks if not in cache
-        tasks = TaskService.get_all_tasks()
+        if is_conditional(request):
+            # A cached page carries its validators, so a 304 needs no database access
+            cached = peek(cache_key)
+            if cached is not None:
+                return cached_response(request, cached)
 
-        # Apply filtering
+            # Otherwise decide from max(updated_at) and count, without loading any rows.
+            # Pages without an exact count are validated by their body, so they are built.
+            if mode == 'exact':
+                version = self._list_version(request, self._filter_queryset(request))
+                etag, last_modified = self._list_validators(request, version)
+                not_modified = conditional_response(request, etag, last_modified)
+                if not_modified is not None:
+                    return not_modified
+
+        # Concurrent misses on the same key are coalesced into a single recompute
+        cached = get_or_compute(cache_key, lambda: CachedResponse.pack(self._build_response(request, fields, mode)))
+        return cached_response(request, cached)
+
+    def _filter_queryset(self, request):
+        """Return the user's tasks matching the request's TaskFilter parameters."""
+        tasks = TaskService.get_all_tasks(request.user)
         filter_backend = DjangoFilterBackend()
-        tasks = filter_backend.filter_queryset(request, tasks, self)
+        return filter_backend.filter_queryset(request, tasks, self)
+
+    def _list_version(self, request, tasks):
+        """
+        The filtered set's ``(max(updated_at), count)``, computed once per filter signature.
+
+        Every page, ordering and fieldset of the same filters shares it until the next
+        write to the user's tasks moves their lists to a new generation.
+        """
+        key = task_list_version_key(request, get_generation(task_list_namespace(request.user.id)))
+        return get_or_compute(key, lambda: TaskService.get_tasks_version(tasks))
+
+    def _list_validators(self, request, version):
+        """Derive the list ETag and Last-Modified from the filtered set's max(updated_at) and count."""
+        last_updated, count = version
+        etag = task_list_etag(task_list_signature(request), last_updated, count)
+        return etag, last_modified_timestamp(last_updated)
+
+    def _build_response(self, request, fields=None, mode='exact'):
+        """Filter, sort, paginate, serialize, and render a task list page of ``fields``."""
+        # Apply filtering
+        tasks = self._filter_queryset(request)
+        version = self._list_version(request, tasks) if mode == 'exact' else None
 
         # Apply sorting
-        ordering_backend = OrderingFilter()
+        ordering_backend = TaskOrderingFilter()
         tasks = ordering_backend.filter_queryset(request, tasks, self)
 
-        # Apply pagination
-        paginator = CustomPagination()
-        paginated_tasks = paginator.paginate_queryset(tasks, request)
-        serialized_tasks = TaskSerializer(paginated_tasks, many=True).data
-        response = paginator.get_paginated_response(serialized_tasks)
+        # Apply pagination, seeking by cursor when the client opts in. The page is read
+        # as plain rows instead of model instances with per-row serializer fields.
+        if KeysetPagination.cursor_query_param in request.query_params:
+            paginator = KeysetPagination(ordering_backend.get_ordering(request, tasks, self))
+            serializer = TaskRowSerializer(fields=sparse_page_fields(fields, paginator))
+            page = list(paginator.get_page_queryset(serializer.rows(tasks), request))
+            with timer('serializer', 'task_list'):
+                page = paginator.paginate_rows(serializer.to_representation(page))
+                page = trim_fields(page, fields, serializer.fields)
+        else:
+            serializer = TaskRowSerializer(fields=fields)
+            if mode == 'exact':
+                paginator = CustomPagination(count=version[1])
+            else:
+                estimate = None
+                if mode == 'estimate':
+                    estimate = TaskService.estimate_task_count(request.user, tasks, active_filters(request, self))
+                paginator = UncountedPagination(estimate)
+            page = paginator.paginate_queryset(serializer.rows(tasks), request)
+            with timer('serializer', 'task_list'):
+                page = serializer.to_representation(page)
+        response = paginator.get_paginated_response(page)
 
         # Set renderer context and render response
         response.accepted_renderer = self.renderer_classes[0]()
@@ -81,36 +411,70 @@ class TaskListView(APIView):
             'request': request,
             'view': self,
         }
-        response.render()
-
-        # Cache the rendered response
-        cache.set(cache_key, response, timeout=60 * 5)  # Cache for 5 minutes
-        logger.info(f"Cache set for key: {cache_key}")
-        return response
+        with timer('render', 'task_list'):
+            response.render()
+        if version is None:
+            return set_validators(response, content_etag(response.content), None)
+        return set_validators(response, *self._list_validators(request, version))
 
     def post(self, request):
         """Create a new task."""
         logger.info(f"TaskListView POST request by user {request.user}")
         serializer = TaskSerializer(data=request.data)
         if serializer.is_valid():
-            task = TaskService.create_task(serializer.validated_data)
+            task = TaskService.create_task(request.user, serializer.validated_data)
             logger.info(f"Task created: {task.title}")
-            # Invalidate cache after creating a task
-            self._invalidate_cache()
             return Response(TaskSerializer(task).data, status=status.HTTP_201_CREATED)
         logger.error(f"Task creation failed: {serializer.errors}")
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def _generate_cache_key(self, request):
-        """Generate a unique cache key based on filters, sorting, and pagination."""
-        query_params = sorted(request.GET.items())  # Sort query params to ensure consistent keys
-        query_string = md5(str(query_params).encode('utf-8')).hexdigest()
-        return f"task_list:{request.user.id}:{query_string}"
+        """
+        Generate a unique cache key based on filters, sorting, and pagination.
 
-    def _invalidate_cache(self):
-        """Invalidate task list cache."""
-        cache.clear()
-        logger.info("Task list cache invalidated")
+        The key embeds the generation of the user's task lists, so any write to one of
+        their tasks (which bumps it) makes all of their cached lists unreachable at once.
+        """
+        return task_list_cache_key(request, get_generation(task_list_namespace(request.user.id)))
+
+
+class TaskExportView(APIView):
+    """Stream every task of the user matching the list filters as NDJSON or CSV."""
+    permission_classes = [IsAuthenticated]
+    filterset_class = TaskFilter
+    ordering_fields = TaskListView.ordering_fields
+    format_query_param = 'export_format'  # `format` is reserved by DRF for renderer selection
+
+    def get(self, request):
+        """Export filtered, sorted tasks without pagination, in constant memory."""
+        logger.info(f"TaskExportView GET request by user {request.user}")
+        export_format = self._export_format(request)
+        if export_format not in EXPORT_FORMATS:
+            return Response({self.format_query_param: [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = TaskService.get_all_tasks(request.user)
+        tasks = DjangoFilterBackend().filter_queryset(request, tasks, self)
+        tasks = TaskOrderingFilter().filter_queryset(request, tasks, self)
+
+        # Plain tuples fetched chunk by chunk (server-side cursors where supported)
+        rows = tasks.values_list(*EXPORT_FIELDS).iterator(chunk_size=AppConfig().export_chunk_size)
+        content_type, generate = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(generate(rows), content_type=f"{content_type}; charset=utf-8")
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+    def perform_content_negotiation(self, request, force=False):
+        """The export bypasses renderers, so never reject the request over its Accept header."""
+        return super().perform_content_negotiation(request, force=True)
+
+    def _export_format(self, request):
+        """Pick the format from the query string, falling back to the Accept header."""
+        export_format = request.query_params.get(self.format_query_param)
+        if export_format:
+            return export_format.lower()
+        accept = request.META.get('HTTP_ACCEPT', '')
+        return 'csv' if 'text/csv' in accept else 'ndjson'
 
 
 class TaskDetailView(APIView):
@@ -118,27 +482,228 @@ class TaskDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, task_id):
-        """Retrieve a task by ID."""
-        task = TaskService.get_task_by_id(task_id)
+        """Retrieve a task (or its ``?fields=``) by ID, answering conditional requests from ``updated_at`` alone."""
+        if is_conditional(request):
+            updated_at = TaskService.get_task_version(request.user, task_id)
+            if updated_at is None:
+                raise NotFound(detail="Task not found")
+            not_modified = conditional_response(
+                request, task_etag(task_id, updated_at), last_modified_timestamp(updated_at)
+            )
+            if not_modified is not None:
+                return not_modified
+
+        fields = requested_fields(request.query_params)
+        task = TaskService.get_task_by_id(request.user, task_id, fields)
         if not task:
             raise NotFound(detail="Task not found")
-        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
+        response = Response(TaskSerializer(task, fields=fields).data, status=status.HTTP_200_OK)
+        return set_validators(response, task_etag(task.id, task.updated_at), last_modified_timestamp(task.updated_at))
 
     def put(self, request, task_id):
-        """Update a task by ID."""
-        task = TaskService.get_task_by_id(task_id)
-        if not task:
-            raise NotFound(detail="Task not found")
+        """Update the given fields of a task by ID, optionally guarded by ``If-Match``."""
+        # Partial validation needs no instance, so the task is not fetched before the UPDATE
+        serializer = TaskSerializer(data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer = TaskSerializer(task, data=request.data, partial=True)
-        if serializer.is_valid():
-            updated_task = TaskService.update_task(task_id, serializer.validated_data)
-            return Response(TaskSerializer(updated_task).data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            updated_task = TaskService.update_task(
+                request.user, task_id, serializer.validated_data, if_match_versions(request, task_id)
+            )
+        except TaskConflict:
+            raise PreconditionFailed()
+        if not updated_task:
+            raise NotFound(detail="Task not found")
+        response = Response(TaskSerializer(updated_task).data, status=status.HTTP_200_OK)
+        return set_validators(
+            response, task_etag(updated_task.id, updated_task.updated_at), last_modified_timestamp(updated_task.updated_at)
+        )
 
     def delete(self, request, task_id):
-        """Delete a task by ID."""
-        success = TaskService.delete_task(task_id)
+        """Delete a task by ID, optionally guarded by ``If-Match``."""
+        try:
+            success = TaskService.delete_task(request.user, task_id, if_match_versions(request, task_id))
+        except TaskConflict:
+            raise PreconditionFailed()
         if not success:
             raise NotFound(detail="Task not found")
         return Response({"message": "Task deleted successfully"}, status=status.HTTP_204_NO_CONTENT)
+
+
+class TaskBulkView(APIView):
+    """Handle creating, updating, and deleting many tasks in one request."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """Create a list of tasks; nothing is created unless every item is valid."""
+        logger.info(f"TaskBulkView POST request by user {request.user}")
+        serializer = TaskSerializer(data=request.data, many=True, allow_empty=False,
+                                    max_length=AppConfig().bulk_max_items)
+        if not serializer.is_valid():
+            logger.error(f"Bulk task creation failed: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = TaskService.bulk_create_tasks(request.user, serializer.validated_data)
+        return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        """Partially update a list of tasks, each identified by its ``id``."""
+        logger.info(f"TaskBulkView PATCH request by user {request.user}")
+        serializer = TaskSerializer(data=request.data, many=True, partial=True, allow_empty=False,
+                                    max_length=AppConfig().bulk_max_items)
+        if not serializer.is_valid():
+            logger.error(f"Bulk task update failed: {serializer.errors}")
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # `id` is read-only on TaskSerializer, so it is read from the raw items
+        errors = [{} for _ in request.data]
+        task_ids = []
+        for index, item in enumerate(request.data):
+            task_id = item.get('id')
+            if not isinstance(task_id, int) or isinstance(task_id, bool):
+                errors[index] = {'id': ["A valid task ID is required."]}
+            elif task_id in task_ids:
+                errors[index] = {'id': ["Duplicate task ID."]}
+            task_ids.append(task_id)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        updated_tasks, missing_ids = TaskService.bulk_update_tasks(
+            request.user, list(zip(task_ids, serializer.validated_data))
+        )
+        if missing_ids:
+            errors = [{'id': ["Task not found."]} if task_id in missing_ids else {} for task_id in task_ids]
+            return Response(errors, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(TaskSerializer(updated_tasks, many=True).data, status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        """Delete a list of tasks given as ``{"ids": [...]}``."""
+        logger.info(f"TaskBulkView DELETE request by user {request.user}")
+        serializer = TaskBulkDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        task_ids = serializer.validated_data['ids']
+        deleted, missing_ids = TaskService.bulk_delete_tasks(request.user, task_ids)
+        if missing_ids:
+            return Response({'ids': {task_ids.index(task_id): ["Task not found."] for task_id in missing_ids}},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        return Response({"message": f"{deleted} tasks deleted successfully"}, status=status.HTTP_200_OK)
+
+
+class TaskStatsView(APIView):
+    """The user's task counts by priority, completion and overdue state, in constant time for dashboards."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """Return the current task counts, read from counters maintained on every write."""
+        logger.info(f"TaskStatsView GET request by user {request.user}")
+        return Response(TaskService.get_task_stats(request.user), status=status.HTTP_200_OK)
+
+
+class TaskChangesView(APIView):
+    """
+    Delta sync for polling clients: the tasks written and deleted since a sync token.
+
+    Changes are read in ``(updated_at, id)`` order and deletes from the tombstones the
+    database records on every delete, each in batches of at most ``limit``. Follow
+    ``next_token`` while ``has_more`` is true. A task can be reported again if it is
+    written between batches, so clients should upsert changes by ID.
+    """
+    permission_classes = [IsAuthenticated]
+    token_query_param = 'since'
+    limit_query_param = 'limit'
+    invalid_token_message = 'Invalid sync token'
+
+    def get(self, request):
+        """Return one batch of changes and deletions with the token to resume from."""
+        logger.info(f"TaskChangesView GET request by user {request.user}")
+        config = AppConfig()
+        limit = self.get_limit(request)
+        position, tombstone_id = self.decode_token(request, config)
+        # Writes stamp updated_at before they commit, so the newest ones could still be
+        # joined by rows with earlier stamps; they are left for the next poll
+        until = timezone.now() - timedelta(seconds=config.sync_safety_lag)
+
+        batch = TaskService.get_task_changes(request.user, position, tombstone_id, until, limit)
+        serializer = TaskRowSerializer()
+        changes = serializer.to_representation(serializer.rows(batch['changed']))
+        deleted = batch['deleted']
+        has_more = len(changes) > limit or len(deleted) > limit
+        changes, deleted = changes[:limit], deleted[:limit]
+
+        if changes:
+            position = (parse_datetime(changes[-1]['updated_at']), changes[-1]['id'])
+        tombstone_id = deleted[-1][0] if deleted else batch['tombstone_id']
+        return Response({
+            'changes': changes,
+            'deleted': [task_id for _, task_id in deleted],
+            'has_more': has_more,
+            'next_token': self.encode_token(position, tombstone_id),
+        }, status=status.HTTP_200_OK)
+
+    def get_limit(self, request):
+        """Read ``limit`` from the query string, capped at ``sync_batch_size``."""
+        batch_size = AppConfig().sync_batch_size
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return batch_size
+        return min(limit, batch_size) if limit > 0 else batch_size
+
+    @staticmethod
+    def encode_token(position, tombstone_id):
+        """Encode the sync position and the time it was issued as an opaque token."""
+        updated_at, task_id = position if position is not None else (None, None)
+        payload = json.dumps({
+            'u': updated_at.isoformat() if updated_at is not None else None,
+            'i': task_id,
+            'd': tombstone_id,
+            'at': int(time.time()),
+        }, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_token(self, request, config):
+        """
+        Decode the ``since`` parameter into ``(position, tombstone_id)``; both None on a first sync.
+
+        Tokens issued before the tombstone retention window may have missed compacted
+        deletes and are rejected with 410.
+        """
+        token = request.query_params.get(self.token_query_param)
+        if not token:
+            return None, None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            issued_at, tombstone_id = int(payload['at']), int(payload['d'])
+            position = None
+            if payload['u'] is not None:
+                updated_at = parse_datetime(payload['u'])
+                if updated_at is None:
+                    raise ValueError("Malformed sync position.")
+                position = (updated_at, int(payload['i']))
+        except (TypeError, ValueError, KeyError):
+            raise ParseError(detail=self.invalid_token_message)
+        if issued_at < time.time() - config.sync_tombstone_retention_days * 86400:
+            raise SyncTokenExpired()
+        return position, tombstone_id
+
+
+class MetricsView(APIView):
+    """Expose this process's latency, query and cache metrics in the Prometheus text format."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        """Render the metrics, requiring ``metrics_token`` as a bearer token when one is configured."""
+        token = AppConfig().metrics_token
+        if token and not hmac.compare_digest(request.META.get('HTTP_AUTHORIZATION', ''), f"Bearer {token}"):
+            raise PermissionDenied("Invalid metrics token.")
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    def perform_content_negotiation(self, request, force=False):
+        """Scrapers ask for Prometheus/OpenMetrics media types that no renderer advertises."""
+        return super().perform_content_negotiation(request, force=True)
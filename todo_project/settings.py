@@ -56,7 +56,7 @@ config = AppConfig()
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'tasks.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -78,6 +78,9 @@ SIMPLE_JWT = {
 }
 
 MIDDLEWARE = [
+    'tasks.middleware.MetricsMiddleware',  # Outermost, so request latency covers all other middleware
+    # 'tasks.middleware.QueryBudgetMiddleware',  # Development only: flags endpoints over their query budget
+    'tasks.middleware.CompressionMiddleware',  # Negotiates gzip (zstd/br when installed) for API responses
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -184,6 +187,11 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'error.log'),
             'formatter': 'verbose',
         },
+        # Records from the tasks app are written by a background thread
+        'queue': {
+            'class': 'tasks.log_handlers.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console', 'cfg://handlers.file'],
+        },
     },
     'loggers': {
         'django': {
@@ -192,16 +200,24 @@ LOGGING = {
             'propagate': True,
         },
         'tasks': {  # Custom logger for the tasks app
-            'handlers': ['console', 'file'],
+            'handlers': ['queue'],
             'level': 'DEBUG',
             'propagate': False,
         },
     },
 }
 
+# One SQLite file shared by every worker on the host, so entries and invalidations
+# are seen by all of them; tasks.cache keeps a size-bounded LRU in front of it
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'tasks.cache_backends.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_BYTES': 256 * 1024 * 1024,
+        },
     }
 }
+
+# Runs the tests against a temporary cache file, never the shared one above
+TEST_RUNNER = 'tasks.test_runner.TaskTestRunner'